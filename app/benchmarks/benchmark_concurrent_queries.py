@@ -0,0 +1,132 @@
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+
+from app.core.inference_limiter import InferenceLimiter
+from app.processing.single_query_inference import run_inference, run_inference_async
+
+# Throughput of /rag/query under N concurrent clients.
+#
+# Simulated mode (default) needs no Groq key: a fake chain sleeps for --llm-latency seconds and the
+# old blocking handler (sync invoke on the event loop) is compared with the new async path.
+# Live mode (--url) sends real requests to a running server; run it once on the old and once on
+# the new build to compare.
+#
+#   python -m app.benchmarks.benchmark_concurrent_queries --clients 32 --requests 128
+#   python -m app.benchmarks.benchmark_concurrent_queries --url http://localhost:8000 --clients 16
+
+
+class SimulatedChain:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, inputs):
+        time.sleep(self.latency)
+        return {"result": f"answer to {inputs['query']}"}
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(self.latency)
+        return {"result": f"answer to {inputs['query']}"}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, latencies, statuses, elapsed):
+    ok = statuses.get(200, 0)
+    return {
+        "name": name,
+        "requests": sum(statuses.values()),
+        "ok": ok,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+async def run_clients(send_one, clients: int, total_requests: int):
+    latencies = []
+    statuses = Counter()
+    counter = iter(range(total_requests))
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter()
+            status = await send_one(i)
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def benchmark_simulated(clients, total_requests, llm_latency, max_concurrency, max_queue):
+    chain = SimulatedChain(llm_latency)
+
+    # Old handler: synchronous chain call directly inside the coroutine
+    async def blocking_handler(i):
+        run_inference(chain, f"question {i}")
+        return 200
+
+    limiter = InferenceLimiter(max_concurrency=max_concurrency, max_queue=max_queue, queue_timeout=30)
+
+    # New handler: admission control plus native async invocation
+    async def async_handler(i):
+        try:
+            async with limiter.slot():
+                await run_inference_async(chain, f"question {i}")
+            return 200
+        except Exception as e:
+            return getattr(e, "status_code", 500)
+
+    results = []
+    latencies, statuses, elapsed = await run_clients(blocking_handler, clients, total_requests)
+    results.append(summarize("before: blocking invoke", latencies, statuses, elapsed))
+    latencies, statuses, elapsed = await run_clients(async_handler, clients, total_requests)
+    results.append(summarize("after: async + limiter", latencies, statuses, elapsed))
+    return results
+
+
+async def benchmark_live(url, clients, total_requests, query):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url, timeout=120) as http_client:
+        async def send_one(i):
+            response = await http_client.post("/rag/query", json={"query": query})
+            return response.status_code
+
+        latencies, statuses, elapsed = await run_clients(send_one, clients, total_requests)
+    return [summarize(f"live: {url}", latencies, statuses, elapsed)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent /rag/query benchmark")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (live mode)")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="Simulated LLM latency in seconds")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=128)
+    parser.add_argument("--query", default="What is the CGPA of the candidate?")
+    args = parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(benchmark_live(args.url, args.clients, args.requests, args.query))
+    else:
+        results = asyncio.run(benchmark_simulated(args.clients, args.requests, args.llm_latency,
+                                                  args.max_concurrency, args.max_queue))
+    for result in results:
+        print(result)
@@ -0,0 +1,86 @@
+import json
+import time
+import argparse
+
+from app.config.configuration import Config
+from app.benchmarks.synthetic_data import generate_corpus
+from app.processing.onnx_embeddings import QUANTIZATION_CONFIGS, create_onnx_embeddings, check_parity
+
+# Embedding throughput (sentences/sec) of the PyTorch model vs its ONNX Runtime export (fp32 and int8),
+# over a range of thread counts, plus parity of each ONNX variant with PyTorch: cosine agreement of the
+# vectors and top-k retrieval overlap on the synthetic CV corpus (English and Bengali).
+#
+#   python -m app.benchmarks.benchmark_embedding_backends --sentences 2000 --threads 1,4
+#   python -m app.benchmarks.benchmark_embedding_backends --quantization avx512_vnni --min-cosine 0.98
+
+config = Config()
+
+
+def measure_throughput(embeddings, texts, repeats: int):
+    # The first pass loads weights and warms up kernels
+    embeddings.embed_documents(texts[:8])
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(len(texts) / best, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PyTorch vs ONNX Runtime embedding benchmark")
+    parser.add_argument("--model", default=config.HUGGINGFACE_EMBEDDING_MODEL)
+    parser.add_argument("--sentences", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", default="0", help="Comma-separated thread counts; 0 is the library default")
+    parser.add_argument("--quantization", default="none,avx2",
+                        help=f"Comma-separated ONNX variants: none (fp32) or one of {QUANTIZATION_CONFIGS}")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Parity threshold on the mean cosine similarity to PyTorch")
+    args = parser.parse_args()
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    docs, queries = generate_corpus(args.sentences, args.queries)
+    texts = [doc.page_content for doc in docs]
+    query_texts = [query for query, _ in queries]
+    thread_counts = [int(threads) for threads in args.threads.split(",")]
+    variants = [None if name == "none" else name for name in args.quantization.split(",")]
+
+    reference = HuggingFaceEmbeddings(model_name=args.model, model_kwargs={"device": "cpu"},
+                                      encode_kwargs={"normalize_embeddings": True, "batch_size": args.batch_size})
+    default_torch_threads = torch.get_num_threads()
+    rows = []
+    for threads in thread_counts:
+        torch.set_num_threads(threads or default_torch_threads)
+        rows.append({"backend": "torch", "threads": threads,
+                     "sentences_per_s": measure_throughput(reference, texts, args.repeats)})
+    torch.set_num_threads(default_torch_threads)
+
+    failed = False
+    for quantization in variants:
+        name = f"onnx-qint8-{quantization}" if quantization else "onnx-fp32"
+        parity = None
+        for threads in thread_counts:
+            candidate = create_onnx_embeddings(args.model, quantization=quantization, intra_op_threads=threads,
+                                               batch_size=args.batch_size)
+            row = {"backend": name, "threads": threads,
+                   "sentences_per_s": measure_throughput(candidate, texts, args.repeats)}
+            if parity is None:
+                parity = check_parity(reference, candidate, texts, query_texts, k=args.k)
+                parity["passed"] = parity["cosine_mean"] >= args.min_cosine
+                failed = failed or not parity["passed"]
+                row["parity"] = parity
+            rows.append(row)
+
+    torch_rate = {row["threads"]: row["sentences_per_s"] for row in rows if row["backend"] == "torch"}
+    for row in rows:
+        row["speedup_vs_torch"] = round(row["sentences_per_s"] / torch_rate[row["threads"]], 2)
+        print(json.dumps(row, ensure_ascii=False))
+    if failed:
+        raise SystemExit(f"ONNX embeddings below the parity threshold (mean cosine < {args.min_cosine})")
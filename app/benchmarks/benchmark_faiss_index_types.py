@@ -0,0 +1,78 @@
+import time
+import argparse
+import faiss
+import numpy as np
+
+from app.processing.faiss_index_factory import build_faiss_index, make_search_parameters
+
+# Recall@k, query latency and memory of each FAISS index type against the exact flat index,
+# on synthetic clustered embeddings.
+#
+#   python -m app.benchmarks.benchmark_faiss_index_types --vectors 100000 --dim 768 --k 5
+
+
+def generate_clustered_embeddings(n_vectors: int, dim: int, n_clusters: int = 256, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n_vectors)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n_vectors, dim)).astype(np.float32)
+    # Sentence-transformer embeddings are normalized
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def recall_at_k(found_ids, true_ids):
+    k = true_ids.shape[1]
+    hits = sum(len(set(found[:k]) & set(true)) for found, true in zip(found_ids, true_ids))
+    return hits / true_ids.size
+
+
+def index_memory_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def benchmark_index(index, queries, true_ids, k, search_parameters=None):
+    start = time.perf_counter()
+    for query in queries:
+        _, ids = index.search(query.reshape(1, -1), k, params=search_parameters)
+    single_latency = (time.perf_counter() - start) / len(queries)
+    _, found_ids = index.search(queries, k, params=search_parameters)
+    return {"recall_at_k": round(recall_at_k(found_ids, true_ids), 4),
+            "latency_ms": round(single_latency * 1000, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS index type benchmark")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--types", default="flat,ivf_flat,hnsw,ivf_pq,sq8")
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--ef-search", default="16,64,256")
+    args = parser.parse_args()
+
+    vectors = generate_clustered_embeddings(args.vectors, args.dim)
+    queries = generate_clustered_embeddings(args.queries, args.dim, seed=1)
+
+    flat_index, _ = build_faiss_index(vectors, "flat")
+    _, true_ids = flat_index.search(queries, args.k)
+
+    for index_type in args.types.split(","):
+        start = time.perf_counter()
+        index, build_params = build_faiss_index(vectors, index_type)
+        build_s = round(time.perf_counter() - start, 2)
+        memory_mb = round(index_memory_bytes(index) / 1024 ** 2, 1)
+
+        if build_params["index_type"] in ("ivf_flat", "ivf_pq"):
+            knobs = [("nprobe", int(n)) for n in args.nprobe.split(",")]
+        elif build_params["index_type"] == "hnsw":
+            knobs = [("ef_search", int(n)) for n in args.ef_search.split(",")]
+        else:
+            knobs = [(None, None)]
+
+        for knob, value in knobs:
+            search_parameters = make_search_parameters(index, **({knob: value} if knob else {}))
+            result = benchmark_index(index, queries, true_ids, args.k, search_parameters)
+            print({"index_type": build_params["index_type"], knob or "search": value, "build_s": build_s,
+                   "memory_mb": memory_mb, **result})
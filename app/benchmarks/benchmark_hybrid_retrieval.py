@@ -0,0 +1,61 @@
+import time
+import argparse
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.benchmarks.synthetic_data import generate_corpus
+from app.benchmarks.fake_embeddings import HashingEmbeddings
+from app.processing.lexical_index import build_lexical_index
+from app.processing.hybrid_retriever import HybridRetriever
+
+# Hit rate@k and retrieval latency of dense-only vs hybrid (BM25 + vector, RRF) retrieval on a synthetic
+# CV-like corpus whose queries ask for exact identifiers (emails, CGPAs, salaries), in English and Bengali.
+#
+#   python -m app.benchmarks.benchmark_hybrid_retrieval --chunks 5000 --queries 300 --k 5
+#   python -m app.benchmarks.benchmark_hybrid_retrieval --embeddings model   # the configured embedding model
+
+def evaluate(retriever, queries, k):
+    hits = 0
+    latencies = []
+    for query, target in queries:
+        start = time.perf_counter()
+        results = retriever.invoke(query)
+        latencies.append(time.perf_counter() - start)
+        hits += any(doc.metadata.get("chunk") == target for doc in results[:k])
+    return {"hit_rate_at_k": round(hits / len(queries), 4),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense vs hybrid retrieval benchmark")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--embeddings", choices=["hashing", "model"], default="hashing")
+    args = parser.parse_args()
+
+    if args.embeddings == "model":
+        from app.processing.generate_embeddings import get_embeddings
+        embeddings = get_embeddings()
+    else:
+        embeddings = HashingEmbeddings()
+
+    docs, queries = generate_corpus(args.chunks, args.queries)
+
+    start = time.perf_counter()
+    vector_store = FAISS.from_documents(docs, embeddings)
+    dense_build_s = round(time.perf_counter() - start, 2)
+    start = time.perf_counter()
+    doc_ids = [vector_store.index_to_docstore_id[row] for row in range(len(docs))]
+    lexical_index = build_lexical_index(docs, doc_ids)
+    lexical_build_s = round(time.perf_counter() - start, 2)
+    lexical_mb = round((lexical_index.postings.nbytes + lexical_index.term_freqs.nbytes
+                        + lexical_index.offsets.nbytes) / 1024 ** 2, 2)
+
+    dense = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": args.k})
+    hybrid = HybridRetriever(vectorstore=vector_store, lexical_index=lexical_index, k=args.k, fetch_k=args.fetch_k)
+    print({"retriever": "dense", "build_s": dense_build_s, **evaluate(dense, queries, args.k)})
+    print({"retriever": "hybrid", "build_s": lexical_build_s, "lexical_index_mb": lexical_mb,
+           "terms": len(lexical_index.terms), **evaluate(hybrid, queries, args.k)})
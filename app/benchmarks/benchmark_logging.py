@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import argparse
+import tempfile
+import numpy as np
+
+# Logging cost on the request path. Each simulated request logs a few INFO lines (query text, timings)
+# and a burst of DEBUG lines (per-chunk style). Compared setups:
+#   sync:    FileHandler + StreamHandler on the calling thread (the previous configure_logging)
+#   queued:  the non-blocking queue handler, JSON file records written by a background thread
+#   sampled: queued, with DEBUG lines sampled and rate limited per call site
+# Requests are --idle-ms apart (time spent waiting on retrieval or the LLM, when a background writer
+# gets to run); only the logging calls are timed. --disk-latency-ms slows every file write down, as a
+# busy or network disk would. The middleware
+# scenario times a no-op ASGI app with and without RequestLoggingMiddleware (request ID + request record).
+#
+#   python -m app.benchmarks.benchmark_logging --requests 2000 --debug-lines 50
+#   python -m app.benchmarks.benchmark_logging --disk-latency-ms 0.2 --requests 500
+
+
+def configure_environment(log_dir: str):
+    """Send the app's own log file to `log_dir` and keep its console quiet; runs before app.core.logger is imported."""
+    os.environ.update({"LOG_FILE": os.path.join(log_dir, "app.log"), "LOG_CONSOLE_LEVEL": "WARNING"})
+
+
+class SlowFileHandler(logging.FileHandler):
+    def __init__(self, path, latency_s: float):
+        super().__init__(path, encoding="utf-8")
+        self.latency_s = latency_s
+
+    def emit(self, record):
+        super().emit(record)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+
+def build_logger(name: str, setup: str, log_dir: str, args):
+    from app.core.logger import TEXT_FORMAT, DATE_FORMAT, JsonFormatter, SamplingFilter, NonBlockingQueueHandler, LogWriter
+    logger = logging.getLogger(f"benchmark_logging.{name}")
+    logger.handlers.clear()
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    file_handler = SlowFileHandler(os.path.join(log_dir, f"{name}.log"), args.disk_latency_ms / 1000)
+    console_handler = logging.StreamHandler(open(os.devnull, "w"))
+    console_handler.setLevel(logging.INFO)
+    if setup == "sync":
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+        for handler in (console_handler, file_handler):
+            logger.addHandler(handler)
+        return logger, None
+
+    file_handler.setFormatter(JsonFormatter())
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+    log_queue = queue.Queue(maxsize=args.queue_size)
+    writer = LogWriter(log_queue, console_handler, file_handler, respect_handler_level=True)
+    writer.start()
+    handler = NonBlockingQueueHandler(log_queue)
+    if setup == "sampled":
+        handler.addFilter(SamplingFilter(logging.INFO, args.sample_every, args.max_per_second))
+    logger.addHandler(handler)
+    return logger, writer
+
+
+def simulate_request(logger, i: int, debug_lines: int):
+    logger.info(f"Processing query: What is the CGPA of candidate {i}?")
+    for line in range(debug_lines):
+        logger.debug("Chunk %d: %s", line + 1, "Computer Science and Engineering with a CGPA of 3.41. " * 3)
+    logger.info(f"Query completed in {i % 97}.{i % 10} ms", extra={"stages_ms": {"retrieve": 8.1, "llm": 846.0}})
+
+
+def run_setup(setup: str, log_dir: str, args):
+    from app.core.logger import NonBlockingQueueHandler
+    logger, writer = build_logger(setup, setup, log_dir, args)
+    dropped_before = NonBlockingQueueHandler.dropped
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.requests):
+        request_start = time.perf_counter()
+        simulate_request(logger, i, args.debug_lines)
+        latencies.append(time.perf_counter() - request_start)
+        if args.idle_ms:
+            time.sleep(args.idle_ms / 1000)
+    request_path_s = sum(latencies)
+    if writer is not None:
+        writer.stop()
+    # Includes the idle time and, for the queued setups, draining what is left in the queue
+    total_s = time.perf_counter() - start
+    for handler in (writer.handlers if writer is not None else logger.handlers):
+        handler.close()
+
+    latencies_us = np.array(latencies) * 1e6
+    with open(os.path.join(log_dir, f"{setup}.log"), "rb") as f:
+        written = sum(1 for _ in f)
+    return {"setup": setup, "requests": args.requests,
+            "lines_per_request": args.debug_lines + 2,
+            "per_request_p50_us": round(float(np.percentile(latencies_us, 50)), 1),
+            "per_request_p99_us": round(float(np.percentile(latencies_us, 99)), 1),
+            "per_request_mean_us": round(float(latencies_us.mean()), 1),
+            "request_path_s": round(request_path_s, 3),
+            "wall_s": round(total_s, 3),
+            "lines_written": written,
+            "dropped": NonBlockingQueueHandler.dropped - dropped_before}
+
+
+async def measure_middleware(requests: int):
+    from app.core.logger import RequestLoggingMiddleware
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/rag/query", "headers": []}
+    results = {}
+    for name, asgi_app in (("plain", app), ("request_logging", RequestLoggingMiddleware(app))):
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await asgi_app(dict(scope), receive, send)
+            latencies.append(time.perf_counter() - start)
+        results[name] = np.array(latencies) * 1e6
+    added = results["request_logging"] - results["plain"]
+    return {"setup": "middleware", "requests": requests,
+            "plain_p50_us": round(float(np.percentile(results["plain"], 50)), 1),
+            "request_logging_p50_us": round(float(np.percentile(results["request_logging"], 50)), 1),
+            "added_p50_us": round(float(np.percentile(added, 50)), 1),
+            "added_p99_us": round(float(np.percentile(added, 99)), 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Request-path cost of synchronous vs queued logging")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--debug-lines", type=int, default=20, help="DEBUG lines per request")
+    parser.add_argument("--idle-ms", type=float, default=1.0, help="Untimed wait between requests")
+    parser.add_argument("--disk-latency-ms", type=float, default=0.0, help="Added latency per file write")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--sample-every", type=int, default=10)
+    parser.add_argument("--max-per-second", type=int, default=50)
+    parser.add_argument("--setups", default="sync,queued,sampled")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        configure_environment(log_dir)
+        for setup in args.setups.split(","):
+            print(json.dumps(run_setup(setup, log_dir, args)))
+        print(json.dumps(asyncio.run(measure_middleware(args.requests))))
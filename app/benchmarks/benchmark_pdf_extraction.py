@@ -0,0 +1,64 @@
+import os
+import time
+import argparse
+import tempfile
+
+from app.benchmarks.synthetic_data import generate_synthetic_pdf
+from app.processing.pdf_extraction_engine import iter_pdf_pages, get_page_count
+from app.processing.pdf_to_text import pdf2text_pdfplumber, pdf2text_pymupdf
+
+# Compare PDF text extraction backends and worker counts on a synthetic multi-hundred-page PDF.
+# With --scanned-every, some pages are images only and go through OCR (needs Tesseract); each engine
+# run then reports pages and worker seconds per route (text layer, OCR, OCR cache hits).
+#
+#   python -m app.benchmarks.benchmark_pdf_extraction --pages 400 --workers 1,2,4
+#   python -m app.benchmarks.benchmark_pdf_extraction --pages 100 --scanned-every 5 --backends pymupdf
+
+def time_engine(pdf_path, backends, workers):
+    start = time.perf_counter()
+    page_count = 0
+    characters = 0
+    routes = {}
+    for page in iter_pdf_pages(pdf_path, backends=backends, workers=workers, stats=routes):
+        page_count += 1
+        characters += len(page.text)
+    elapsed = time.perf_counter() - start
+    return {"method": f"engine[{backends}]", "workers": workers, "pages": page_count,
+            "characters": characters, "elapsed_s": round(elapsed, 3),
+            "pages_per_s": round(page_count / elapsed, 1) if elapsed else 0.0, "routes": routes}
+
+
+def time_legacy(name, extractor, pdf_path, output_path, pages):
+    start = time.perf_counter()
+    text = extractor(pdf_path, output_path) or ""
+    elapsed = time.perf_counter() - start
+    return {"method": name, "workers": 1, "pages": pages, "characters": len(text),
+            "elapsed_s": round(elapsed, 3), "pages_per_s": round(pages / elapsed, 1) if elapsed else 0.0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF extraction benchmark")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--backends", default="pymupdf;pdfplumber;pymupdf,pdfplumber",
+                        help="Semicolon separated list of backend chains")
+    parser.add_argument("--pdf", default=None, help="Use an existing PDF instead of a synthetic one")
+    parser.add_argument("--scanned-every", type=int, default=0, help="Make every n-th synthetic page image-only")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf or generate_synthetic_pdf(os.path.join(tmp_dir, "synthetic.pdf"), args.pages,
+                                                        scanned_every=args.scanned_every)
+        output_path = os.path.join(tmp_dir, "output.txt")
+        pages = get_page_count(pdf_path)
+
+        results = [
+            time_legacy("legacy pdfplumber", pdf2text_pdfplumber, pdf_path, output_path, pages),
+            time_legacy("legacy pymupdf", pdf2text_pymupdf, pdf_path, output_path, pages),
+        ]
+        for backends in args.backends.split(";"):
+            for workers in [int(w) for w in args.workers.split(",")]:
+                results.append(time_engine(pdf_path, backends, workers))
+
+        for result in results:
+            print(result)
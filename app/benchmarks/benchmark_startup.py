@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Cold-start cost of the API: each run is a fresh interpreter that imports app.main, runs the lifespan
+# startup, waits for /health/ready (when the build has it) and sends the first /rag/query.
+# Reported from process launch: import time, startup, readiness and time to first answer.
+# Offline like benchmark_suite (fake LLM, hashing embeddings unless --embeddings huggingface); run it
+# on two builds to compare them.
+#
+#   python -m app.benchmarks.benchmark_startup --runs 5
+#   python -m app.benchmarks.benchmark_startup --embeddings huggingface --warmup-mode blocking
+
+
+async def measure_first_query(app, timings):
+    import httpx
+    async with app.router.lifespan_context(app):
+        timings["started"] = time.time()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup", timeout=600) as client:
+            while True:
+                response = await client.get("/health/ready")
+                if response.status_code != 503:
+                    break
+                await asyncio.sleep(0.01)
+            timings["ready"] = time.time()
+            response = await client.post("/rag/query", json={"query": "Whose email address is faisal.0@example.com?"})
+            timings["first_query"] = time.time()
+            timings["first_query_status"] = response.status_code
+
+
+# Runs in the measured child process
+def run_child():
+    timings = {}
+    start = time.perf_counter()
+    import app.main
+    timings["import_s"] = time.perf_counter() - start
+    timings["imported"] = time.time()
+    asyncio.run(measure_first_query(app.main.app, timings))
+    print(json.dumps(timings))
+
+
+def build_default_store(work_dir: str):
+    from app.benchmarks.synthetic_data import generate_corpus
+    from app.processing.generate_embeddings import get_embeddings
+    from app.processing.generate_vector_db import build_vector_store_from_embeddings
+
+    docs, _ = generate_corpus(200, 0)
+    vectors = get_embeddings().embed_documents([doc.page_content for doc in docs])
+    build_vector_store_from_embeddings(docs, vectors, os.environ["VECTOR_STORE_PATH"])
+
+
+def summarize(values):
+    values = np.array(values, dtype=np.float64)
+    return {"mean": round(float(values.mean()), 3), "min": round(float(values.min()), 3),
+            "p50": round(float(np.percentile(values, 50)), 3), "max": round(float(values.max()), 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--embeddings", choices=["hashing", "huggingface"], default="hashing")
+    parser.add_argument("--warmup-mode", default=None, help="WARMUP_MODE for the measured processes")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        sys.exit(0)
+
+    from app.benchmarks.benchmark_suite import configure_environment
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        configure_environment(argparse.Namespace(llm_latency_ms=0, llm_tokens_per_second=0, llm_output_tokens=8,
+                                                 embeddings=args.embeddings, ingestion_workers=1,
+                                                 answer_cache=False), work_dir)
+        if args.warmup_mode:
+            os.environ["WARMUP_MODE"] = args.warmup_mode
+        build_default_store(work_dir)
+
+        runs = []
+        for _ in range(args.runs):
+            launched = time.time()
+            output = subprocess.run([sys.executable, "-m", "app.benchmarks.benchmark_startup", "--child"],
+                                    capture_output=True, text=True, check=True).stdout
+            timings = json.loads(output.strip().splitlines()[-1])
+            runs.append({"import_s": timings["import_s"],
+                         "imported_s": timings["imported"] - launched,
+                         "startup_s": timings["started"] - launched,
+                         "ready_s": timings["ready"] - launched,
+                         "first_query_s": timings["first_query"] - launched,
+                         "first_query_status": timings["first_query_status"]})
+
+    result = {key: summarize([run[key] for run in runs]) for key in runs[0] if key != "first_query_status"}
+    result["first_query_status"] = sorted({run["first_query_status"] for run in runs})
+    print(json.dumps({"runs": args.runs, "embeddings": args.embeddings, **result}, indent=2))
@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from dotenv import load_dotenv
+
+from app.benchmarks.synthetic_data import generate_cv_pdf
+
+# End-to-end benchmark suite that needs no Groq key or model download: the LLM is the deterministic
+# FakeChatModel (LLM_PROVIDER=fake) and embeddings are hashed trigrams unless --embeddings huggingface.
+# Synthetic CV PDFs are ingested through the background job pipeline, then queries are sent to the
+# FastAPI app in-process. Each scenario reports p50/p95/p99 latency, throughput and peak RSS as JSON;
+# --compare prints the change against an earlier run.
+#
+#   python -m app.benchmarks.benchmark_suite --output app/data/benchmarks/baseline.json
+#   python -m app.benchmarks.benchmark_suite --compare app/data/benchmarks/baseline.json --max-regression 10
+#   python -m app.benchmarks.benchmark_suite --documents 8 --pages 20 --clients 32 --requests 400
+
+QUERY_SCENARIOS = ["single_document_query", "multi_document_query", "mixed_load"]
+
+# Request mix of the mixed_load scenario: (weight, kind)
+MIXED_LOAD = [(0.4, "query_by_document"), (0.2, "query_by_document_stream"), (0.2, "query_corpus"),
+              (0.1, "query_default"), (0.1, "list_vector_stores")]
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def configure_environment(args, work_dir: str):
+    """
+    Point every data path at `work_dir` and select the offline LLM and embeddings. Runs before any
+    app module is imported, because each module reads Config at import time.
+    """
+    load_dotenv()
+    for name, default in {"CORS_ORIGINS": "*", "HUGGINGFACE_EMBEDDING_MODEL": "l3cube-pune/bengali-sentence-similarity-sbert",
+                          "GROQ_API_KEY": "offline", "LLM_MODEL": "fake", "CHUNK_SIZE": "1000",
+                          "CHUNK_OVERLAP": "200"}.items():
+        os.environ.setdefault(name, default)
+    vector_store_dir = os.path.join(work_dir, "vectorstores")
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        "FAKE_LLM_OUTPUT_TOKENS": str(args.llm_output_tokens),
+        "EMBEDDING_PROVIDER": args.embeddings,
+        "VECTOR_STORE_DIR": vector_store_dir,
+        # The first synthetic document doubles as the default store behind /rag/query
+        "VECTOR_STORE_PATH": os.path.join(vector_store_dir, "faiss_index_bench_0"),
+        "DOCUMENT_CATALOG_PATH": os.path.join(work_dir, "catalog.sqlite"),
+        "DOCUMENT_REGISTRY_PATH": os.path.join(work_dir, "document_registry.json"),
+        "INGESTION_JOBS_DIR": os.path.join(work_dir, "jobs"),
+        "INGESTION_MAX_WORKERS": str(args.ingestion_workers),
+        "EMBEDDING_CACHE_DIR": os.path.join(work_dir, "embedding_cache"),
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+        "ANSWER_CACHE_BACKEND": "memory",
+    })
+    for name in ["pdfs", "texts", "vectorstores"]:
+        os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+
+
+def _rss_bytes(pid="self"):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def _child_pids():
+    pids = []
+    for task in os.listdir("/proc/self/task"):
+        try:
+            with open(f"/proc/self/task/{task}/children") as f:
+                pids.extend(f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+# Peak resident memory while a scenario runs, of this process and with its worker processes (ingestion
+# and PDF extraction pools) added. Sampled from /proc; without it, the process-lifetime ru_maxrss.
+class RssSampler:
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak = 0
+        self.peak_with_workers = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._proc = os.path.exists("/proc/self/statm")
+
+    def _sample(self):
+        own = _rss_bytes()
+        workers = 0
+        for pid in _child_pids():
+            try:
+                workers += _rss_bytes(pid)
+            except OSError:
+                continue
+        self.peak = max(self.peak, own)
+        self.peak_with_workers = max(self.peak_with_workers, own + workers)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def __enter__(self):
+        if self._proc:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        return False
+
+    def result(self):
+        if not self._proc:
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = self.peak_with_workers = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return {"peak_rss_mb": round(self.peak / 1024 ** 2, 1),
+                "peak_rss_with_workers_mb": round(self.peak_with_workers / 1024 ** 2, 1)}
+
+
+def latency_summary(latencies_s, elapsed_s: float, errors: int = 0):
+    latencies_ms = np.array(latencies_s, dtype=np.float64) * 1000
+    if not len(latencies_ms):
+        return {"requests": 0, "errors": errors}
+    return {"requests": len(latencies_ms), "errors": errors,
+            "throughput_per_s": round(len(latencies_ms) / elapsed_s, 2) if elapsed_s else None,
+            "latency_mean_ms": round(float(latencies_ms.mean()), 2),
+            "latency_p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+            "latency_p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+            "latency_p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+            "latency_max_ms": round(float(latencies_ms.max()), 2)}
+
+
+# Ingestion throughput: all synthetic PDFs are queued at once on the ingestion job pool
+def run_ingestion_scenario(args, work_dir: str):
+    from app.core.ingestion_jobs import ingestion_job_manager
+    from app.core.job_store import load_job, COMPLETED, FAILED
+    from app.core.document_catalog import get_vector_store_path
+
+    test_sets, documents = {}, []
+    for i in range(args.documents):
+        document_id = f"bench_{i}"
+        pdf_path = os.path.join(work_dir, "pdfs", f"{document_id}.pdf")
+        test_sets[document_id] = generate_cv_pdf(pdf_path, args.pages, seed=args.seed + i)
+        documents.append((document_id, {"pdf": pdf_path,
+                                        "text": os.path.join(work_dir, "texts", f"{document_id}.txt"),
+                                        "vector_store": get_vector_store_path(document_id)}))
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        job_ids = [ingestion_job_manager.submit(document_id, paths) for document_id, paths in documents]
+        while True:
+            jobs = [load_job(job_id) for job_id in job_ids]
+            if all(job is not None and job["status"] in (COMPLETED, FAILED) for job in jobs):
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+    ingestion_job_manager.shutdown()
+
+    completed = [job for job in jobs if job["status"] == COMPLETED]
+    chunks = sum(job["stages"]["chunk"]["done"] or 0 for job in completed)
+    result = {"documents": len(jobs), "failed": len(jobs) - len(completed), "pages": args.documents * args.pages,
+              "chunks": chunks, "elapsed_s": round(elapsed, 3),
+              "pages_per_s": round(len(completed) * args.pages / elapsed, 2),
+              "chunks_per_s": round(chunks / elapsed, 2),
+              # Throughput in documents per second; per-document latency runs from submission to
+              # completion, so it includes queueing
+              **latency_summary([job["finished_at"] - job["created_at"] for job in completed], elapsed,
+                                errors=len(jobs) - len(completed)),
+              "stage_mean_s": {stage: round(float(np.mean([job["stages"][stage]["duration_s"] for job in completed])), 3)
+                               for stage in ["extract", "chunk", "embed", "index"]} if completed else {},
+              **rss.result()}
+    for job in jobs:
+        if job["status"] == FAILED:
+            print(f"Ingestion of {job['document_id']} failed: {job['error']}", file=sys.stderr)
+    return result, test_sets
+
+
+def build_request(kind: str, rng, test_sets):
+    document_id = rng.choice(sorted(test_sets))
+    item = rng.choice(test_sets[document_id])
+    if kind == "query_by_document":
+        return "POST", "/rag/query-by-document", {"query": item["query"], "document_id": document_id}
+    if kind == "query_by_document_stream":
+        return "POST", "/rag/query-by-document-stream", {"query": item["query"], "document_id": document_id}
+    if kind == "query_corpus":
+        return "POST", "/rag/query-corpus", {"query": item["query"]}
+    if kind == "query_default":
+        return "POST", "/rag/query", {"query": rng.choice(test_sets["bench_0"])["query"]}
+    return "GET", "/rag/list-vector-stores", None
+
+
+async def send(client, method: str, url: str, body):
+    start = time.perf_counter()
+    try:
+        if method == "GET":
+            response = await client.get(url)
+        else:
+            # Read streamed (server-sent events) answers to the end
+            async with client.stream(method, url, json=body) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+        ok = response.status_code == 200
+    except Exception as e:
+        print(f"{method} {url} failed: {e}", file=sys.stderr)
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+async def run_requests(client, requests, clients: int):
+    """Send `requests` from `clients` concurrent workers; returns per-request (kind, latency, ok) and elapsed."""
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            kind, method, url, body = queue.get_nowait()
+            latency, ok = await send(client, method, url, body)
+            results.append((kind, latency, ok))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return results, time.perf_counter() - start
+
+
+def summarize_requests(results, elapsed: float):
+    return latency_summary([latency for _, latency, ok in results if ok], elapsed,
+                           errors=sum(1 for _, _, ok in results if not ok))
+
+
+async def run_query_scenarios(args, test_sets, scenarios):
+    import httpx
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            # Load every document's store and chain once so the scenarios measure warm queries
+            warmup_start = time.perf_counter()
+            await run_requests(client, [("warmup", *build_request("query_by_document", random.Random(i), {d: test_sets[d]}))
+                                        for i, d in enumerate(sorted(test_sets))], clients=1)
+            results["warmup_s"] = round(time.perf_counter() - warmup_start, 3)
+
+            if "single_document_query" in scenarios:
+                requests = [("query_by_document", *build_request("query_by_document", rng, test_sets))
+                            for _ in range(args.queries)]
+                with RssSampler() as rss:
+                    outcome, elapsed = await run_requests(client, requests, clients=1)
+                results["single_document_query"] = {**summarize_requests(outcome, elapsed), **rss.result()}
+
+            if "multi_document_query" in scenarios:
+                requests = [("query_corpus", *build_request("query_corpus", rng, test_sets))
+                            for _ in range(args.queries)]
+                with RssSampler() as rss:
+                    outcome, elapsed = await run_requests(client, requests, clients=1)
+                results["multi_document_query"] = {"documents": len(test_sets),
+                                                   **summarize_requests(outcome, elapsed), **rss.result()}
+
+            if "mixed_load" in scenarios:
+                weights, kinds = zip(*MIXED_LOAD)
+                requests = [(kind, *build_request(kind, rng, test_sets))
+                            for kind in rng.choices(kinds, weights=weights, k=args.requests)]
+                with RssSampler() as rss:
+                    outcome, elapsed = await run_requests(client, requests, clients=args.clients)
+                results["mixed_load"] = {
+                    "clients": args.clients, **summarize_requests(outcome, elapsed), **rss.result(),
+                    "by_kind": {kind: summarize_requests([r for r in outcome if r[0] == kind], elapsed)
+                                for kind in kinds}}
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "git_commit": commit}
+
+
+# Lower is better for latencies and memory, higher for throughput
+def metric_direction(name: str):
+    if name.endswith("_ms") or name.endswith("_mb") or name == "elapsed_s":
+        return -1
+    if name.endswith("_per_s"):
+        return 1
+    return 0
+
+
+def compare_reports(report, baseline):
+    """Per scenario and metric: baseline, current and relative change (positive = worse)."""
+    rows = []
+    for scenario, metrics in report["scenarios"].items():
+        base_metrics = baseline.get("scenarios", {}).get(scenario)
+        if not isinstance(metrics, dict) or not isinstance(base_metrics, dict):
+            continue
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            direction = metric_direction(name)
+            if not direction or not isinstance(value, (int, float)) or not isinstance(base, (int, float)) or not base:
+                continue
+            rows.append({"scenario": scenario, "metric": name, "baseline": base, "current": value,
+                         "regression_pct": round(-direction * (value - base) / base * 100, 1)})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark suite")
+    parser.add_argument("--scenarios", default=",".join(QUERY_SCENARIOS),
+                        help="Comma separated query scenarios; ingestion always runs first to create the documents")
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50, help="Sequential queries per single/multi-document scenario")
+    parser.add_argument("--requests", type=int, default=200, help="Requests in the mixed load scenario")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients in the mixed load scenario")
+    parser.add_argument("--ingestion-workers", type=int, default=2)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50)
+    parser.add_argument("--llm-output-tokens", type=int, default=32)
+    parser.add_argument("--embeddings", choices=["hashing", "huggingface"], default="hashing")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache on (off by default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="Keep generated PDFs and stores here instead of a temp dir")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--compare", default=None, help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit with status 1 when any metric is this many percent worse than --compare")
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(QUERY_SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = os.path.abspath(args.work_dir or tmp_dir)
+        configure_environment(args, work_dir)
+        ingestion, test_sets = run_ingestion_scenario(args, work_dir)
+        report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment_info(),
+                  "settings": {key: value for key, value in vars(args).items()
+                               if key not in ("output", "compare", "max_regression", "work_dir")},
+                  "scenarios": {"ingestion": ingestion}}
+        if ingestion["failed"] == 0 and scenarios:
+            query_results = asyncio.run(run_query_scenarios(args, test_sets, scenarios))
+            report["warmup_s"] = query_results.pop("warmup_s")
+            report["scenarios"].update(query_results)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print(f"Warning: {args.compare} was run with different settings", file=sys.stderr)
+        rows = compare_reports(report, baseline)
+        for row in rows:
+            print(row)
+        if args.max_regression is not None and any(row["regression_pct"] > args.max_regression for row in rows):
+            print(f"Regression above {args.max_regression}% against {args.compare}", file=sys.stderr)
+            sys.exit(1)
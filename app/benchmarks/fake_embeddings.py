@@ -0,0 +1,23 @@
+import zlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+# Offline stand-in for the sentence-transformer (EMBEDDING_PROVIDER=hashing) used by the benchmarks:
+# hashed character trigrams, L2-normalized, so similar texts get similar vectors without a model download.
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        text = f"  {text.lower()}  "
+        for i in range(len(text) - 2):
+            vector[zlib.crc32(text[i:i + 3].encode("utf-8")) % self.dim] += 1.0
+        return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
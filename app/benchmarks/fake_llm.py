@@ -0,0 +1,87 @@
+import time
+import asyncio
+from typing import Any, Iterator, AsyncIterator, List
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.language_models.chat_models import BaseChatModel
+
+NOT_FOUND_ANSWER = "Information not found in the document."
+
+
+def _prompt_text(messages: List[BaseMessage]):
+    return "\n".join(message.content if isinstance(message.content, str) else str(message.content)
+                     for message in messages)
+
+
+# Offline stand-in for ChatGroq (LLM_PROVIDER=fake) used by the benchmarks: waits `latency_ms` before the
+# first token, then emits `tokens_per_second`. The answer is the first `output_tokens` words of the
+# prompt's Context, so the same prompt always gives the same answer.
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    latency_ms: float = 200
+    tokens_per_second: float = 50
+    output_tokens: int = 32
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer_tokens(self, prompt: str):
+        context = prompt.split("Context:", 1)[-1].split("Question:", 1)[0]
+        words = context.split()[:self.output_tokens]
+        if not words:
+            words = NOT_FOUND_ANSWER.split()
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def _token_delay(self):
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _usage(self, prompt: str, tokens):
+        # Whitespace words stand in for tokenizer tokens
+        prompt_tokens = len(prompt.split())
+        return {"input_tokens": prompt_tokens, "output_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)}
+
+    def _result(self, prompt: str, tokens):
+        message = AIMessage(content="".join(tokens), usage_metadata=self._usage(prompt, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)],
+                          llm_output={"model_name": self.model_name})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        tokens = self._answer_tokens(prompt)
+        time.sleep(self.latency_ms / 1000 + len(tokens) * self._token_delay())
+        return self._result(prompt, tokens)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        tokens = self._answer_tokens(prompt)
+        await asyncio.sleep(self.latency_ms / 1000 + len(tokens) * self._token_delay())
+        return self._result(prompt, tokens)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        tokens = self._answer_tokens(prompt)
+        time.sleep(self.latency_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self._token_delay())
+            usage = self._usage(prompt, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        tokens = self._answer_tokens(prompt)
+        await asyncio.sleep(self.latency_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            usage = self._usage(prompt, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
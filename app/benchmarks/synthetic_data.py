@@ -0,0 +1,89 @@
+import random
+from langchain_core.documents import Document
+
+# Synthetic CV-like corpora and PDFs shared by the benchmarks. Every record carries exact identifiers
+# (email, CGPA, salary) so queries have one known right answer.
+
+FIRST_NAMES = ["Faisal", "Ahmed", "Nusrat", "Tanvir", "Farhana", "Rakib", "Sadia", "Imran", "Mehedi", "Jannat"]
+LAST_NAMES = ["Bijoy", "Hossain", "Rahman", "Islam", "Akter", "Chowdhury", "Karim", "Sultana", "Haque", "Das"]
+COMPANIES = ["Business Automation Limited", "Brain Station 23", "Therap BD", "Samsung R&D", "Pathao"]
+BENGALI_COMPANIES = ["বিজনেস অটোমেশন লিমিটেড", "ব্রেইন স্টেশন", "থেরাপ বিডি", "স্যামসাং গবেষণা", "পাঠাও"]
+
+SAMPLE_PARAGRAPH = (
+    "Khulna University of Engineering & Technology offers undergraduate programs in Computer Science "
+    "and Engineering. Applicants must submit their CGPA, email address and expected salary. "
+)
+
+
+def generate_record(rng, record_id: str):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {"name": name,
+            "email": f"{name.split()[0].lower()}.{record_id}@example.com",
+            "cgpa": f"{rng.uniform(2.5, 4.0):.2f}",
+            "salary": f"{rng.randint(15, 150)},{rng.randint(0, 999):03d}",
+            "company": rng.randrange(len(COMPANIES))}
+
+
+def record_text(record, bengali: bool = True):
+    text = (f"{record['name']} studied Computer Science and Engineering with a CGPA of {record['cgpa']}. "
+            f"Contact email: {record['email']}. Currently works at {COMPANIES[record['company']]} "
+            f"with a salary of {record['salary']} Taka")
+    if not bengali:
+        return text + "."
+    return text + f"। বর্তমানে {BENGALI_COMPANIES[record['company']]} এ কর্মরত। বেতন {record['salary']} টাকা।"
+
+
+def generate_corpus(n_chunks: int, n_queries: int, seed: int = 0):
+    """One chunk per record and up to `n_queries` (query, chunk index) pairs, in English and Bengali."""
+    rng = random.Random(seed)
+    docs, queries = [], []
+    for i in range(n_chunks):
+        record = generate_record(rng, str(i))
+        docs.append(Document(page_content=record_text(record), metadata={"chunk": i}))
+        if len(queries) < n_queries:
+            queries.append((rng.choice([f"Whose email address is {record['email']}?",
+                                        f"Which candidate has a CGPA of {record['cgpa']}?",
+                                        f"Who earns a salary of {record['salary']} Taka?",
+                                        f"কার বেতন {record['salary']} টাকা?"]), i))
+    rng.shuffle(queries)
+    return docs, queries
+
+
+def generate_synthetic_pdf(pdf_path: str, pages: int, lines_per_page: int = 40, scanned_every: int = 0):
+    """A text PDF; with `scanned_every` set, every n-th page is an image of the text only, like a scan."""
+    import fitz  # PyMuPDF
+    with fitz.open() as doc, fitz.open() as scratch:
+        for page_number in range(pages):
+            text = "\n".join(f"Page {page_number + 1} line {line}: {SAMPLE_PARAGRAPH[:90]}"
+                             for line in range(lines_per_page))
+            scanned = scanned_every and (page_number + 1) % scanned_every == 0
+            page = (scratch if scanned else doc).new_page()
+            page.insert_text((36, 40), text, fontsize=8)
+            if scanned:
+                doc.new_page().insert_image(page.rect, pixmap=page.get_pixmap(dpi=150))
+        doc.save(pdf_path)
+    return pdf_path
+
+
+def generate_cv_pdf(pdf_path: str, pages: int, records_per_page: int = 6, seed: int = 0):
+    """
+    A PDF of candidate records and a test set for it, in the batch evaluation format
+    ({id, query, expected_answer, gold_chunks}). The text is English only: the PDF base fonts
+    have no Bengali glyphs.
+    """
+    import fitz  # PyMuPDF
+    rng = random.Random(seed)
+    items = []
+    with fitz.open() as doc:
+        for page_number in range(pages):
+            records = [generate_record(rng, f"{seed}.{page_number}.{i}") for i in range(records_per_page)]
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(36, 36, page.rect.width - 36, page.rect.height - 36),
+                                "\n\n".join(record_text(record, bengali=False) for record in records), fontsize=9)
+            for record in records:
+                items.append({"id": record["email"],
+                              "query": f"Whose email address is {record['email']}?",
+                              "expected_answer": record["name"],
+                              "gold_chunks": [record["email"]]})
+        doc.save(pdf_path)
+    return items
@@ -13,10 +13,162 @@ class Config:
         self.VECTOR_STORE_DIR = self.get_required_env("VECTOR_STORE_DIR")    
         self.CHUNK_OVERLAP = int(self.get_required_env("CHUNK_OVERLAP"))
         self.CHUNK_SIZE = int(self.get_required_env("CHUNK_SIZE"))
-        
+
+        # Startup warm-up of models and the default index: "background" (serve at once, /health/ready reports
+        # progress), "blocking" (finish before serving) or "off" (load on first use)
+        self.WARMUP_MODE = self.get_optional_env("WARMUP_MODE", "background")
+
+        # Loaded vector store / RAG chain cache
+        self.VECTOR_STORE_CACHE_MAX_ENTRIES = int(self.get_optional_env("VECTOR_STORE_CACHE_MAX_ENTRIES", 16))
+        self.VECTOR_STORE_CACHE_MAX_BYTES = int(self.get_optional_env("VECTOR_STORE_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+        # Query embedding micro-batching
+        self.EMBEDDING_BATCH_MAX_SIZE = int(self.get_optional_env("EMBEDDING_BATCH_MAX_SIZE", 32))
+        self.EMBEDDING_BATCH_MAX_WAIT_MS = float(self.get_optional_env("EMBEDDING_BATCH_MAX_WAIT_MS", 5))
+
+        # Page-level PDF text extraction
+        self.PDF_EXTRACTION_BACKENDS = self.get_optional_env("PDF_EXTRACTION_BACKENDS", "pymupdf,pdfplumber")
+        self.PDF_EXTRACTION_WORKERS = int(self.get_optional_env("PDF_EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+        self.PDF_EXTRACTION_PAGES_PER_TASK = int(self.get_optional_env("PDF_EXTRACTION_PAGES_PER_TASK", 16))
+
+        # OCR of pages without a usable text layer (fewer than OCR_MIN_PAGE_CHARS characters, or unmapped glyphs):
+        # rasterized at OCR_DPI and read by Tesseract across OCR_WORKERS processes, cached per page content and settings
+        self.OCR_ENABLED = self.get_optional_env("OCR_ENABLED", "true").lower() == "true"
+        self.OCR_LANGUAGES = self.get_optional_env("OCR_LANGUAGES", "ben+eng")
+        self.OCR_DPI = int(self.get_optional_env("OCR_DPI", 300))
+        self.OCR_TESSERACT_CONFIG = self.get_optional_env("OCR_TESSERACT_CONFIG", "--oem 1 --psm 3")
+        self.OCR_WORKERS = int(self.get_optional_env("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+        self.OCR_MIN_PAGE_CHARS = int(self.get_optional_env("OCR_MIN_PAGE_CHARS", 20))
+        self.OCR_CACHE_DIR = self.get_optional_env("OCR_CACHE_DIR", "app/data/ocr_cache")
+
+        # On-disk vector store format for new stores: compact (mmap-able index + SQLite docstore) or pickle
+        self.VECTOR_STORE_FORMAT = self.get_optional_env("VECTOR_STORE_FORMAT", "compact")
+
+        # FAISS index type (auto, flat, ivf_flat, hnsw, ivf_pq, sq8) and default search-time knobs
+        self.FAISS_INDEX_TYPE = self.get_optional_env("FAISS_INDEX_TYPE", "auto")
+        self.FAISS_NPROBE = int(self.get_optional_env("FAISS_NPROBE", 0)) or None
+        self.FAISS_EF_SEARCH = int(self.get_optional_env("FAISS_EF_SEARCH", 0)) or None
+
+        # Content-addressed chunk embedding cache and uploaded document registry
+        self.EMBEDDING_CACHE_DIR = self.get_optional_env("EMBEDDING_CACHE_DIR", "app/data/embedding_cache")
+        self.DOCUMENT_REGISTRY_PATH = self.get_optional_env("DOCUMENT_REGISTRY_PATH", "app/data/document_registry.json")
+
+        # Catalog of searchable documents and parallel cross-document search
+        self.DOCUMENT_CATALOG_PATH = self.get_optional_env("DOCUMENT_CATALOG_PATH", "app/data/catalog.sqlite")
+        self.CORPUS_SEARCH_WORKERS = int(self.get_optional_env("CORPUS_SEARCH_WORKERS", 4))
+
+        # Incremental updates rebuild a store once deleted rows exceed this fraction of its FAISS index
+        self.COMPACTION_TOMBSTONE_RATIO = float(self.get_optional_env("COMPACTION_TOMBSTONE_RATIO", 0.2))
+
+        # PDF uploads are streamed to UPLOAD_TMP_DIR (on the same filesystem as app/data/pdfs, for an atomic
+        # rename) in blocks of UPLOAD_WRITE_BUFFER_BYTES and rejected past UPLOAD_MAX_BYTES or UPLOAD_MAX_PAGES
+        self.UPLOAD_TMP_DIR = self.get_optional_env("UPLOAD_TMP_DIR", "app/data/pdfs/.incoming")
+        self.UPLOAD_MAX_BYTES = int(self.get_optional_env("UPLOAD_MAX_BYTES", 100 * 1024 ** 2))
+        self.UPLOAD_MAX_PAGES = int(self.get_optional_env("UPLOAD_MAX_PAGES", 2000))
+        self.UPLOAD_MAX_FILES = int(self.get_optional_env("UPLOAD_MAX_FILES", 20))
+        self.UPLOAD_WRITE_BUFFER_BYTES = int(self.get_optional_env("UPLOAD_WRITE_BUFFER_BYTES", 1024 ** 2))
+
+        # Background ingestion jobs
+        self.INGESTION_JOBS_DIR = self.get_optional_env("INGESTION_JOBS_DIR", "app/data/jobs")
+        self.INGESTION_MAX_WORKERS = int(self.get_optional_env("INGESTION_MAX_WORKERS", 2))
+        self.INGESTION_MAX_PENDING_JOBS = int(self.get_optional_env("INGESTION_MAX_PENDING_JOBS", 64))
+
+        # Streaming ingestion: items (pages, embedding batches) buffered between concurrent stages, and chunks per embedding batch
+        self.INGESTION_STREAM_BUFFER = int(self.get_optional_env("INGESTION_STREAM_BUFFER", 8))
+        self.INGESTION_EMBED_BATCH_SIZE = int(self.get_optional_env("INGESTION_EMBED_BATCH_SIZE", 64))
+
+        # Concurrent LLM inference limits
+        self.INFERENCE_MAX_CONCURRENCY = int(self.get_optional_env("INFERENCE_MAX_CONCURRENCY", 8))
+        self.INFERENCE_MAX_QUEUE = int(self.get_optional_env("INFERENCE_MAX_QUEUE", 32))
+        self.INFERENCE_QUEUE_TIMEOUT = float(self.get_optional_env("INFERENCE_QUEUE_TIMEOUT", 10))
+
+        # Context assembly before the LLM: overlapping/adjacent chunks are merged, near-duplicates (share of a
+        # passage's word 3-grams found in a better-ranked one) dropped, and passages packed into a token budget
+        # (0: no budget). Tokens are counted with CONTEXT_TOKENIZER (a Hugging Face tokenizer) or estimated.
+        self.CONTEXT_PACKING_ENABLED = self.get_optional_env("CONTEXT_PACKING_ENABLED", "true").lower() == "true"
+        self.CONTEXT_TOKEN_BUDGET = int(self.get_optional_env("CONTEXT_TOKEN_BUDGET", 1500))
+        self.CONTEXT_DEDUP_THRESHOLD = float(self.get_optional_env("CONTEXT_DEDUP_THRESHOLD", 0.8))
+        self.CONTEXT_TOKENIZER = self.get_optional_env("CONTEXT_TOKENIZER", None)
+
+        # Retrieval: "hybrid" fuses BM25 and vector results by reciprocal rank, "dense" is vector search only
+        self.RETRIEVAL_MODE = self.get_optional_env("RETRIEVAL_MODE", "hybrid")
+        self.HYBRID_FETCH_K = int(self.get_optional_env("HYBRID_FETCH_K", 20))
+        self.HYBRID_RRF_K = int(self.get_optional_env("HYBRID_RRF_K", 60))
+
+        # Optional cross-encoder reranking of over-fetched candidates (backend: torch or onnx)
+        self.RERANKER_ENABLED = self.get_optional_env("RERANKER_ENABLED", "false").lower() == "true"
+        self.RERANKER_MODEL = self.get_optional_env("RERANKER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+        self.RERANKER_BACKEND = self.get_optional_env("RERANKER_BACKEND", "torch")
+        self.RERANKER_ONNX_FILE = self.get_optional_env("RERANKER_ONNX_FILE", None)
+        self.RERANKER_FETCH_K = int(self.get_optional_env("RERANKER_FETCH_K", 30))
+        self.RERANKER_BATCH_SIZE = int(self.get_optional_env("RERANKER_BATCH_SIZE", 32))
+        self.RERANKER_TIME_BUDGET_MS = float(self.get_optional_env("RERANKER_TIME_BUDGET_MS", 500))
+        self.RERANKER_MAX_PENDING = int(self.get_optional_env("RERANKER_MAX_PENDING", 4))
+        self.RERANKER_CACHE_MAX_ENTRIES = int(self.get_optional_env("RERANKER_CACHE_MAX_ENTRIES", 10000))
+
+        # Batch evaluation: concurrent items (retrieval + LLM call) and largest accepted API batch
+        self.EVALUATION_MAX_CONCURRENCY = int(self.get_optional_env("EVALUATION_MAX_CONCURRENCY", 8))
+        self.EVALUATION_MAX_ITEMS = int(self.get_optional_env("EVALUATION_MAX_ITEMS", 2000))
+
+        # Multi-query batches: largest accepted batch and concurrent LLM calls per batch
+        self.QUERY_BATCH_MAX_ITEMS = int(self.get_optional_env("QUERY_BATCH_MAX_ITEMS", 256))
+        self.QUERY_BATCH_MAX_CONCURRENCY = int(self.get_optional_env("QUERY_BATCH_MAX_CONCURRENCY", 8))
+
+        # Logging: records are queued (up to LOG_QUEUE_SIZE, dropped beyond) and written by a background thread
+        # to the console and LOG_FILE (JSON lines or text), rotated by time (LOG_ROTATION_WHEN) or size
+        # (LOG_MAX_BYTES), or by an outside rotator (LOG_ROTATION=external). DEBUG lines are sampled (1 in LOG_DEBUG_SAMPLE_EVERY) and rate limited per call site
+        self.LOG_LEVEL = self.get_optional_env("LOG_LEVEL", "DEBUG").upper()
+        self.LOG_CONSOLE_LEVEL = self.get_optional_env("LOG_CONSOLE_LEVEL", "INFO").upper()
+        self.LOG_FILE = self.get_optional_env("LOG_FILE", "logs/log_file.log")
+        self.LOG_FORMAT = self.get_optional_env("LOG_FORMAT", "json")
+        self.LOG_ROTATION = self.get_optional_env("LOG_ROTATION", "time")
+        self.LOG_ROTATION_WHEN = self.get_optional_env("LOG_ROTATION_WHEN", "midnight")
+        self.LOG_MAX_BYTES = int(self.get_optional_env("LOG_MAX_BYTES", 50 * 1024 ** 2))
+        self.LOG_BACKUP_COUNT = int(self.get_optional_env("LOG_BACKUP_COUNT", 14))
+        self.LOG_QUEUE_SIZE = int(self.get_optional_env("LOG_QUEUE_SIZE", 10000))
+        self.LOG_DEBUG_SAMPLE_EVERY = int(self.get_optional_env("LOG_DEBUG_SAMPLE_EVERY", 10))
+        self.LOG_DEBUG_MAX_PER_SECOND = int(self.get_optional_env("LOG_DEBUG_MAX_PER_SECOND", 50))
+        # One structured record per HTTP request with its status, duration and stage timings
+        self.LOG_REQUESTS = self.get_optional_env("LOG_REQUESTS", "true").lower() == "true"
+
+        # Prometheus metrics at /metrics and optional OpenTelemetry spans (OTLP exporter)
+        self.METRICS_ENABLED = self.get_optional_env("METRICS_ENABLED", "true").lower() == "true"
+        self.OTEL_TRACING_ENABLED = self.get_optional_env("OTEL_TRACING_ENABLED", "false").lower() == "true"
+        self.OTEL_SERVICE_NAME = self.get_optional_env("OTEL_SERVICE_NAME", "rag-api")
+
+        # LLM and embedding providers (embeddings: huggingface, onnx or hashing); "fake" and "hashing" are
+        # offline stand-ins for the benchmark suite
+        self.LLM_PROVIDER = self.get_optional_env("LLM_PROVIDER", "groq")
+        self.FAKE_LLM_LATENCY_MS = float(self.get_optional_env("FAKE_LLM_LATENCY_MS", 200))
+        self.FAKE_LLM_TOKENS_PER_SECOND = float(self.get_optional_env("FAKE_LLM_TOKENS_PER_SECOND", 50))
+        self.FAKE_LLM_OUTPUT_TOKENS = int(self.get_optional_env("FAKE_LLM_OUTPUT_TOKENS", 32))
+        self.EMBEDDING_PROVIDER = self.get_optional_env("EMBEDDING_PROVIDER", "huggingface")
+        self.HASHING_EMBEDDING_DIM = int(self.get_optional_env("HASHING_EMBEDDING_DIM", 384))
+
+        # EMBEDDING_PROVIDER=onnx: the embedding model exported to ONNX (int8 when a quantization preset is
+        # set: arm64, avx2, avx512, avx512_vnni) and run by ONNX Runtime; thread counts of 0 keep its defaults
+        self.EMBEDDING_ONNX_DIR = self.get_optional_env("EMBEDDING_ONNX_DIR", "app/data/onnx_models")
+        self.EMBEDDING_ONNX_QUANTIZATION = self.get_optional_env("EMBEDDING_ONNX_QUANTIZATION", None)
+        self.EMBEDDING_ONNX_INTRA_OP_THREADS = int(self.get_optional_env("EMBEDDING_ONNX_INTRA_OP_THREADS", 0))
+        self.EMBEDDING_ONNX_INTER_OP_THREADS = int(self.get_optional_env("EMBEDDING_ONNX_INTER_OP_THREADS", 0))
+
+        # Answer cache in front of the RAG chain (exact and semantic query matches)
+        self.ANSWER_CACHE_ENABLED = self.get_optional_env("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self.ANSWER_CACHE_BACKEND = self.get_optional_env("ANSWER_CACHE_BACKEND", "memory")
+        self.ANSWER_CACHE_PATH = self.get_optional_env("ANSWER_CACHE_PATH", "app/data/answer_cache.sqlite")
+        self.ANSWER_CACHE_MAX_ENTRIES = int(self.get_optional_env("ANSWER_CACHE_MAX_ENTRIES", 1000))
+        self.ANSWER_CACHE_TTL_SECONDS = float(self.get_optional_env("ANSWER_CACHE_TTL_SECONDS", 24 * 3600))
+        self.ANSWER_CACHE_SIMILARITY_THRESHOLD = float(self.get_optional_env("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95))
+
     def get_required_env(self, env_variable):
         value = os.getenv(env_variable)
         if value is None:
             error_message = f"Invalid or missing '{env_variable}' in the environment variables"
             return error_message
-        return value
\ No newline at end of file
+        return value
+
+    def get_optional_env(self, env_variable, default):
+        value = os.getenv(env_variable)
+        if value is None or value == "":
+            return default
+        return value
@@ -0,0 +1,210 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("ANSWER_CACHE")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    -- Never reused, so an id held by one process always names the same answer
+    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    version TEXT NOT NULL,
+    normalized_query TEXT NOT NULL,
+    query TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    embedding BLOB,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_query(query: str):
+    text = unicodedata.normalize("NFC", query).casefold()
+    text = " ".join(text.split())
+    # Trailing punctuation, including the Bengali danda, does not change the question
+    return re.sub(r"[\s?!.।॥]+$", "", text)
+
+
+# Version of the things that shape an answer other than the index: retriever type, prompt template and LLM
+def chain_fingerprint(rag_chain):
+    llm_chain = rag_chain.combine_documents_chain.llm_chain
+    llm_name = getattr(llm_chain.llm, "model_name", None) or config.LLM_MODEL
+    retriever_name = type(rag_chain.retriever).__name__
+    # Context packing settings change what the LLM sees
+    settings = getattr(rag_chain.combine_documents_chain, "settings", None)
+    packing = settings() if settings else ""
+    return hashlib.sha1(f"{retriever_name}\0{llm_chain.prompt.template}\0{llm_name}\0{packing}".encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """
+    Answers keyed by scope (which index was searched) and version (index + prompt + LLM).
+    Matches on the exact normalized query, then on query embedding similarity. Entries expire after
+    `ttl_seconds`, are evicted least recently used, and entries of an older version are dropped
+    the first time their scope is looked up with a newer one.
+
+    With a SQLite file, several processes share the stored answers: row ids are assigned by SQLite,
+    a process evicting an entry from memory leaves the row to others, and the table is trimmed to the
+    newest `max_entries` rows. Lookups never touch the file; rows they find stale or expired are
+    deleted by the next store().
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float, db_path: str = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._stale_rows = []
+        # Ids of memory-only entries (no SQLite backend) count down, so they never meet a row id
+        self._next_memory_id = -1
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path:
+            self._load_from_db()
+
+    def lookup_exact(self, scope: str, version: str, query: str):
+        normalized = normalize_query(query)
+        with self._lock:
+            for entry in self._scope_entries(scope, version):
+                if entry["normalized_query"] == normalized:
+                    self._entries.move_to_end(entry["entry_id"])
+                    self.exact_hits += 1
+                    return {"answer": entry["answer"], "match": "exact", "similarity": 1.0}
+        return None
+
+    def lookup_semantic(self, scope: str, version: str, query_embedding):
+        with self._lock:
+            entries = [entry for entry in self._scope_entries(scope, version) if entry["embedding"] is not None]
+            if entries:
+                matrix = np.stack([entry["embedding"] for entry in entries])
+                query_vector = np.asarray(query_embedding, dtype=np.float32)
+                similarities = matrix @ query_vector / (
+                    np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector) + 1e-12)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry = entries[best]
+                    self._entries.move_to_end(entry["entry_id"])
+                    self.semantic_hits += 1
+                    return {"answer": entry["answer"], "match": "semantic", "similarity": float(similarities[best]),
+                            "cached_query": entry["query"]}
+            self.misses += 1
+        return None
+
+    def store(self, scope: str, version: str, query: str, answer: str, query_embedding=None):
+        """Cache an answer. Writes the SQLite file when there is one, so call it off the event loop."""
+        embedding = None if query_embedding is None else np.asarray(query_embedding, dtype=np.float32)
+        entry = {"scope": scope, "version": version, "normalized_query": normalize_query(query), "query": query,
+                 "answer": answer, "embedding": embedding, "created_at": time.time()}
+        with self._lock:
+            if self.db_path:
+                db = self._connection()
+                with db:
+                    self._delete_stale_rows(db)
+                    cursor = db.execute(
+                        "INSERT INTO answers (scope, version, normalized_query, query, answer, embedding, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (scope, version, entry["normalized_query"], query, answer,
+                         None if embedding is None else embedding.tobytes(), entry["created_at"]))
+                    entry["entry_id"] = cursor.lastrowid
+                    db.execute("DELETE FROM answers WHERE entry_id <= ?", (entry["entry_id"] - self.max_entries,))
+            else:
+                entry["entry_id"] = self._next_memory_id
+                self._next_memory_id -= 1
+            self._add(entry)
+            while len(self._entries) > self.max_entries:
+                self._forget(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_scope_prefix(self, prefix: str):
+        with self._lock:
+            for scope in [scope for scope in self._scopes if scope.startswith(prefix)]:
+                for entry_id in list(self._scopes.get(scope, ())):
+                    self._forget(entry_id)
+            if self.db_path:
+                db = self._connection()
+                with db:
+                    db.execute("DELETE FROM answers WHERE substr(scope, 1, ?) = ?", (len(prefix), prefix))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "exact_hits": self.exact_hits, "semantic_hits": self.semantic_hits, "misses": self.misses,
+                    "evictions": self.evictions,
+                    "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                    "backend": "sqlite" if self.db_path else "memory"}
+
+    def _scope_entries(self, scope, version):
+        now = time.time()
+        entries = []
+        for entry_id in list(self._scopes.get(scope, ())):
+            entry = self._entries[entry_id]
+            if entry["version"] != version or now - entry["created_at"] > self.ttl_seconds:
+                # Index rebuilt, prompt/LLM changed, or expired: no process can serve it any more
+                self._forget(entry_id)
+                if self.db_path:
+                    self._stale_rows.append(entry_id)
+            else:
+                entries.append(entry)
+        return entries
+
+    def _add(self, entry):
+        self._entries[entry["entry_id"]] = entry
+        self._scopes.setdefault(entry["scope"], set()).add(entry["entry_id"])
+
+    def _forget(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        scope_ids = self._scopes.get(entry["scope"])
+        if scope_ids is not None:
+            scope_ids.discard(entry_id)
+            if not scope_ids:
+                del self._scopes[entry["scope"]]
+
+    def _delete_stale_rows(self, db):
+        if self._stale_rows:
+            db.executemany("DELETE FROM answers WHERE entry_id = ?", [(entry_id,) for entry_id in self._stale_rows])
+            self._stale_rows = []
+
+    # One connection per cache, used under its lock
+    def _connection(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._db.executescript(SQLITE_SCHEMA)
+        return self._db
+
+    def _load_from_db(self):
+        cutoff = time.time() - self.ttl_seconds
+        db = self._connection()
+        with db:
+            db.execute("DELETE FROM answers WHERE created_at < ?", (cutoff,))
+            rows = db.execute("SELECT entry_id, scope, version, normalized_query, query, answer, embedding, created_at "
+                              "FROM answers ORDER BY entry_id DESC LIMIT ?", (self.max_entries,)).fetchall()
+        for entry_id, scope, version, normalized, query, answer, embedding, created_at in reversed(rows):
+            self._add({"entry_id": entry_id, "scope": scope, "version": version, "normalized_query": normalized,
+                       "query": query, "answer": answer, "created_at": created_at,
+                       "embedding": None if embedding is None else np.frombuffer(embedding, dtype=np.float32)})
+        logger.info(f"Loaded {len(rows)} cached answers from {self.db_path}")
+
+
+answer_cache = AnswerCache(max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+                           ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+                           similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                           db_path=config.ANSWER_CACHE_PATH if config.ANSWER_CACHE_BACKEND == "sqlite" else None)
@@ -0,0 +1,158 @@
+import os
+import time
+import shutil
+import sqlite3
+from contextlib import closing
+from filelock import FileLock
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("DOCUMENT_CATALOG")
+
+VECTOR_STORE_PREFIX = "faiss_index_"
+# Updates write a new version of a store next to it: faiss_index_<document_id>.v<milliseconds>
+VERSION_SEPARATOR = ".v"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    vector_store_path TEXT NOT NULL,
+    source_pdf TEXT,
+    chunk_count INTEGER,
+    index_type TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+
+# Where a document's first vector store is built; its file lock lives next to it
+def get_base_vector_store_path(document_id: str):
+    return os.path.join(config.VECTOR_STORE_DIR, f"{VECTOR_STORE_PREFIX}{document_id}")
+
+
+# The document's current store version, as recorded in the catalog
+def get_vector_store_path(document_id: str):
+    document = get_document_store(document_id)
+    return document["vector_store_path"] if document else get_base_vector_store_path(document_id)
+
+
+def new_vector_store_version_path(document_id: str):
+    return f"{get_base_vector_store_path(document_id)}{VERSION_SEPARATOR}{int(time.time() * 1000)}"
+
+
+# Document ID and version (0 for the base directory) of a store directory name, or None
+def parse_vector_store_name(name: str):
+    if not name.startswith(VECTOR_STORE_PREFIX) or name.endswith(".tmp"):
+        return None
+    document_id, separator, version = name[len(VECTOR_STORE_PREFIX):].partition(VERSION_SEPARATOR)
+    if separator and not version.isdigit():
+        return None
+    return document_id, int(version or 0)
+
+
+# Every store directory of a document on disk, oldest version first
+def list_vector_store_versions(document_id: str):
+    versions = []
+    if os.path.exists(config.VECTOR_STORE_DIR):
+        for name in os.listdir(config.VECTOR_STORE_DIR):
+            parsed = parse_vector_store_name(name)
+            path = os.path.join(config.VECTOR_STORE_DIR, name)
+            if parsed is not None and parsed[0] == document_id and os.path.isdir(path):
+                versions.append((parsed[1], path))
+    return [path for _, path in sorted(versions)]
+
+
+def _connect():
+    os.makedirs(os.path.dirname(config.DOCUMENT_CATALOG_PATH) or ".", exist_ok=True)
+    # Ingestion workers and API workers write from different processes; wait on locks instead of failing
+    connection = sqlite3.connect(config.DOCUMENT_CATALOG_PATH, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# Catalog of searchable documents; each document is one vector store shard
+def register_document_store(document_id: str, vector_store_path: str, source_pdf: str = None,
+                            chunk_count: int = None, index_type: str = None):
+    with closing(_connect()) as connection, connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO documents (document_id, vector_store_path, source_pdf, chunk_count, index_type, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (document_id, vector_store_path, source_pdf, chunk_count, index_type, time.time()))
+    logger.info(f"Registered document {document_id} in catalog")
+
+
+def switch_document_store(document_id: str, vector_store_path: str, chunk_count: int = None, index_type: str = None):
+    """
+    Point a document at a new version of its vector store, with its stats, in one transaction: readers
+    resolve the document to either the old directory or the new one. Returns the previous path.
+    """
+    with closing(_connect()) as connection, connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute("SELECT vector_store_path FROM documents WHERE document_id = ?",
+                                 (document_id,)).fetchone()
+        if row is None:
+            connection.execute(
+                "INSERT INTO documents (document_id, vector_store_path, chunk_count, index_type, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", (document_id, vector_store_path, chunk_count, index_type, time.time()))
+        else:
+            connection.execute("UPDATE documents SET vector_store_path = ?, chunk_count = ?, index_type = ? "
+                               "WHERE document_id = ?", (vector_store_path, chunk_count, index_type, document_id))
+    return row["vector_store_path"] if row else get_base_vector_store_path(document_id)
+
+
+def remove_document_store(document_id: str):
+    with closing(_connect()) as connection, connection:
+        deleted = connection.execute("DELETE FROM documents WHERE document_id = ?", (document_id,)).rowcount
+    return deleted > 0
+
+
+def get_document_store(document_id: str):
+    with closing(_connect()) as connection:
+        row = connection.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_document_stores():
+    with closing(_connect()) as connection:
+        rows = connection.execute("SELECT * FROM documents ORDER BY created_at").fetchall()
+    return [dict(row) for row in rows]
+
+
+def sync_catalog_with_disk():
+    """
+    Register vector store directories that predate the catalog (the newest version of each document),
+    drop entries whose directory no longer exists, and remove store versions the catalog does not point
+    at: left behind by an update that stopped before or after switching the catalog.
+    """
+    added = removed = stale = 0
+    on_disk = {}
+    if os.path.exists(config.VECTOR_STORE_DIR):
+        for name in os.listdir(config.VECTOR_STORE_DIR):
+            parsed = parse_vector_store_name(name)
+            path = os.path.join(config.VECTOR_STORE_DIR, name)
+            if parsed is not None and os.path.isdir(path):
+                on_disk.setdefault(parsed[0], []).append((parsed[1], path))
+
+    catalog = {document["document_id"]: document for document in list_document_stores()}
+    for document_id, versions in on_disk.items():
+        if document_id not in catalog:
+            catalog[document_id] = {"vector_store_path": max(versions)[1]}
+            register_document_store(document_id, max(versions)[1])
+            added += 1
+        # Writers hold this lock for a whole update, so a version outside the catalog is not being written
+        with FileLock(f"{get_base_vector_store_path(document_id)}.lock"):
+            current = os.path.abspath(get_vector_store_path(document_id))
+            for _, path in versions:
+                if os.path.abspath(path) != current and os.path.exists(current):
+                    shutil.rmtree(path, ignore_errors=True)
+                    stale += 1
+    for document_id, document in catalog.items():
+        if not os.path.exists(document["vector_store_path"]):
+            remove_document_store(document_id)
+            removed += 1
+    if added or removed or stale:
+        logger.info(f"Catalog synced with disk: {added} added, {removed} removed, {stale} stale versions deleted")
+    return added, removed
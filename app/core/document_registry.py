@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import hashlib
+from filelock import FileLock
+
+from app.config.configuration import Config
+
+config = Config()
+
+_lock = FileLock(f"{config.DOCUMENT_REGISTRY_PATH}.lock")
+
+
+def compute_file_hash(file_path: str, block_size: int = 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_registry():
+    if not os.path.exists(config.DOCUMENT_REGISTRY_PATH):
+        return {}
+    with open(config.DOCUMENT_REGISTRY_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_registry(registry: dict):
+    tmp_path = f"{config.DOCUMENT_REGISTRY_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, config.DOCUMENT_REGISTRY_PATH)
+
+
+# Content hash -> uploaded document, used to short-circuit re-uploads of identical PDFs
+def find_document_by_hash(content_hash: str):
+    with _lock:
+        return _read_registry().get(content_hash)
+
+
+def register_document(content_hash: str, document_id: str, job_id: str = None):
+    with _lock:
+        registry = _read_registry()
+        registry[content_hash] = {"document_id": document_id, "job_id": job_id, "registered_at": time.time()}
+        _write_registry(registry)
+
+
+def unregister_document(content_hash: str):
+    with _lock:
+        registry = _read_registry()
+        if registry.pop(content_hash, None) is not None:
+            _write_registry(registry)
+
+
+def unregister_document_id(document_id: str):
+    with _lock:
+        registry = _read_registry()
+        remaining = {content_hash: entry for content_hash, entry in registry.items()
+                     if entry["document_id"] != document_id}
+        if len(remaining) != len(registry):
+            _write_registry(remaining)
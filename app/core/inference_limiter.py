@@ -0,0 +1,112 @@
+import asyncio
+import functools
+import contextvars
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("INFERENCE_LIMITER")
+
+# Bounded pool for blocking work (sync chains, evaluation, vector store loading)
+inference_executor = ThreadPoolExecutor(max_workers=config.INFERENCE_MAX_CONCURRENCY,
+                                        thread_name_prefix="rag-inference")
+
+
+# Runs with the caller's context, so the request ID and stage timings follow the work into the pool
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(inference_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+# Admission control for LLM calls: at most `max_concurrency` running and `max_queue` waiting.
+# Requests beyond that are rejected immediately (429); requests that wait too long get 503.
+# Background work (batch evaluation) shares the running slots but waits for one instead.
+class InferenceLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.background_waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def acquire(self):
+        """Wait for a free slot, or raise 429 (queue full) / 503 (waited too long). Pair with release()."""
+        semaphore = self._get_semaphore()
+        if self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning("Inference queue full, rejecting request")
+            raise HTTPException(status_code=429, detail="Too many concurrent queries, please retry later.",
+                                headers={"Retry-After": "1"})
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"Inference queue wait exceeded {self.queue_timeout}s")
+            raise HTTPException(status_code=503, detail="Query service is busy, please retry later.",
+                                headers={"Retry-After": str(max(1, int(self.queue_timeout)))})
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def background_slot(self):
+        """
+        A slot for work that must not fail under load: waits as long as it takes, and its waiters
+        are not counted against `max_queue`, so they do not crowd out live queries either.
+        """
+        semaphore = self._get_semaphore()
+        self.background_waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.background_waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "background_waiting": self.background_waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+inference_limiter = InferenceLimiter(max_concurrency=config.INFERENCE_MAX_CONCURRENCY,
+                                     max_queue=config.INFERENCE_MAX_QUEUE,
+                                     queue_timeout=config.INFERENCE_QUEUE_TIMEOUT)
@@ -0,0 +1,109 @@
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging, forward_logs_to, log_worker_queue
+from app.core.metrics import INGESTION_STAGE_DURATION
+from app.core.job_store import new_job_record, save_job, load_job, list_jobs, job_has_live_owner, CREATE, QUEUED, RUNNING, FAILED
+from app.processing.ingestion_pipeline import run_ingestion_job
+
+config = Config()
+logger = configure_logging("INGESTION_JOBS")
+
+
+class IngestionQueueFullError(Exception):
+    pass
+
+
+# Runs ingestion jobs on a bounded process pool. Job state lives on disk (see job_store), so jobs
+# that were queued or running when the server stopped are resubmitted on the next start. A running job
+# is owned by the worker holding its lock (job_store.claim_job); jobs with a live owner, e.g. in another
+# uvicorn worker or a process left running by a reload, are not resubmitted.
+class IngestionJobManager:
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.RLock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawned workers do not inherit the parent's loaded models or event loop; their log records
+            # are written by this process
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=forward_logs_to, initargs=(log_worker_queue(),))
+        return self._executor
+
+    def submit(self, document_id: str, paths: dict, operation: str = CREATE, content_hash: str = None):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise IngestionQueueFullError(f"Ingestion queue is full ({self.max_pending} pending jobs)")
+            job_id = uuid.uuid4().hex
+            save_job(new_job_record(job_id, document_id, paths, operation, content_hash))
+            self._dispatch(job_id)
+        logger.info(f"Queued {operation} ingestion job {job_id} for document {document_id}")
+        return job_id
+
+    def resume_pending_jobs(self):
+        resumed = 0
+        with self._lock:
+            for job in list_jobs():
+                if job["status"] not in (QUEUED, RUNNING) or job["job_id"] in self._pending:
+                    continue
+                if job_has_live_owner(job["job_id"]):
+                    continue
+                # Queued jobs may also be waiting in another live process's pool; whichever worker
+                # claims the job first runs it and the other finds it finished
+                job["status"] = QUEUED
+                save_job(job)
+                self._dispatch(job["job_id"])
+                resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} ingestion jobs from a previous run")
+        return resumed
+
+    def _dispatch(self, job_id: str):
+        self._pending.add(job_id)
+        future = self._get_executor().submit(run_ingestion_job, job_id)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            self._pending.discard(job_id)
+        if future.cancelled():
+            # Left as queued on disk; picked up again on the next start
+            return
+        error = future.exception()
+        if error is None and future.result() is None:
+            # Run (or being run) by another process, which records it
+            return
+        job = load_job(job_id)
+        if error is not None:
+            # Worker crashed before it could record the failure itself
+            logger.error(f"Ingestion worker for job {job_id} crashed: {error}")
+            if job is not None:
+                job["status"] = FAILED
+                job["error"] = str(error)
+                save_job(job)
+        if job is not None and config.METRICS_ENABLED:
+            # Stages run in worker processes, so their timings are taken from the job record
+            for stage_name, stage in job["stages"].items():
+                if stage.get("duration_s") is not None:
+                    INGESTION_STAGE_DURATION.observe(stage["duration_s"], stage=stage_name, status=stage["status"])
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "max_pending": self.max_pending, "max_workers": self.max_workers}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+ingestion_job_manager = IngestionJobManager(max_workers=config.INGESTION_MAX_WORKERS,
+                                            max_pending=config.INGESTION_MAX_PENDING_JOBS)
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+from filelock import FileLock, Timeout
+
+from app.config.configuration import Config
+
+config = Config()
+
+JOB_STAGES = ["extract", "chunk", "embed", "index"]
+
+# Job operations: build a new document, add a PDF to one, or re-ingest one of its sources
+CREATE = "create"
+APPEND = "append"
+REPLACE = "replace"
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def job_file_path(job_id: str):
+    return os.path.join(config.INGESTION_JOBS_DIR, f"{job_id}.json")
+
+
+def job_lock_path(job_id: str):
+    return os.path.join(config.INGESTION_JOBS_DIR, f"{job_id}.lock")
+
+
+def new_job_record(job_id: str, document_id: str, paths: dict, operation: str = CREATE, content_hash: str = None):
+    return {
+        "job_id": job_id,
+        "document_id": document_id,
+        "operation": operation,
+        "content_hash": content_hash,
+        "status": QUEUED,
+        "owner_pid": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "duration_s": None,
+        "paths": paths,
+        "stages": {
+            stage: {"status": "pending", "started_at": None, "duration_s": None, "done": 0, "total": None}
+            for stage in JOB_STAGES
+        },
+        "error": None,
+    }
+
+
+# Jobs are persisted as one JSON file each, written atomically so readers never see a partial file
+def save_job(job: dict):
+    os.makedirs(config.INGESTION_JOBS_DIR, exist_ok=True)
+    path = job_file_path(job["job_id"])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_job(job_id: str):
+    path = job_file_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_jobs():
+    if not os.path.exists(config.INGESTION_JOBS_DIR):
+        return []
+    jobs = []
+    for name in sorted(os.listdir(config.INGESTION_JOBS_DIR)):
+        if name.endswith(".json"):
+            job = load_job(name[:-len(".json")])
+            if job is not None:
+                jobs.append(job)
+    return jobs
+
+
+# A job is owned by the process holding its lock file. The lock is released by the OS when that process
+# exits, so a job whose lock can be taken has no live owner.
+def claim_job(job_id: str):
+    """Take ownership of a job: returns its held lock (release it when done), or None if another process owns it."""
+    os.makedirs(config.INGESTION_JOBS_DIR, exist_ok=True)
+    lock = FileLock(job_lock_path(job_id), timeout=0)
+    try:
+        lock.acquire()
+    except Timeout:
+        return None
+    return lock
+
+
+def job_has_live_owner(job_id: str):
+    lock = claim_job(job_id)
+    if lock is None:
+        return True
+    lock.release()
+    return False
@@ -1,6 +1,236 @@
 import os
+import re
+import json
+import time
+import uuid
+import queue
+import atexit
 import logging
-from datetime import datetime
+import threading
+import multiprocessing
+import logging.handlers
+import multiprocessing.util
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.config.configuration import Config
+
+config = Config()
+
+TEXT_FORMAT = '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attributes every LogRecord has; any other attribute came from `extra=` and is written as a JSON field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "request_id"}
+# Accepted X-Request-ID values; anything else is replaced by a new ID
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+_request_id = ContextVar("request_id", default=None)
+_stage_timings = ContextVar("stage_timings", default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request ID and the record's `extra` fields."""
+
+    def format(self, record):
+        entry = {"time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+                 "level": record.levelname, "logger": record.name, "message": record.getMessage()}
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out high-volume lines below `max_level`: of each call site's records, one in `every` is kept,
+    and at most `per_second` a second (0 for no limit). The next kept record of a site carries the number
+    dropped before it as `dropped`.
+    """
+
+    def __init__(self, max_level: int, every: int, per_second: int):
+        super().__init__()
+        self.max_level = max_level
+        self.every = max(every, 1)
+        self.per_second = per_second
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.max_level:
+            return True
+        with self._lock:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                site = self._sites[(record.pathname, record.lineno)] = {"seen": 0, "window": 0.0, "kept": 0, "dropped": 0}
+            site["seen"] += 1
+            keep = (site["seen"] - 1) % self.every == 0
+            if keep and self.per_second:
+                now = time.monotonic()
+                if now - site["window"] >= 1.0:
+                    site["window"], site["kept"] = now, 0
+                keep = site["kept"] < self.per_second
+                site["kept"] += keep
+            if not keep:
+                site["dropped"] += 1
+                return False
+            if site["dropped"]:
+                record.dropped, site["dropped"] = site["dropped"], 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the log writer thread without waiting on it. When the queue is full the record
+    is dropped and counted, so a slow disk never stalls a request.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        # The message is resolved here (its arguments may change later) and the request ID read from this
+        # thread's context; formatting and exception rendering are left to the writer thread. The record is
+        # not copied: this is the only handler of each configured logger
+        record.msg, record.args = record.getMessage(), None
+        if getattr(record, "request_id", None) is None:
+            record.request_id = _request_id.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+class LogWriter(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Waits for room: the queue may be full when the process exits
+        self.queue.put(self._sentinel)
+
+
+def build_log_handlers():
+    """
+    The handlers the writer thread runs: console (text) and the log file (JSON lines or text), rotated by
+    this process or, with LOG_ROTATION=external, reopened when an outside rotator moves it. In pool
+    workers, a single handler sending records to the process that created the pool (forward_logs_to).
+    """
+    if _forward_queue is not None:
+        return [logging.handlers.QueueHandler(_forward_queue)]
+
+    text_formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(config.LOG_CONSOLE_LEVEL)
+    console_handler.setFormatter(text_formatter)
+
+    log_dir = os.path.dirname(config.LOG_FILE)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    if config.LOG_ROTATION == "external":
+        file_handler = logging.handlers.WatchedFileHandler(config.LOG_FILE, encoding="utf-8", delay=True)
+    elif config.LOG_ROTATION == "size":
+        file_handler = logging.handlers.RotatingFileHandler(config.LOG_FILE, maxBytes=config.LOG_MAX_BYTES,
+                                                            backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8",
+                                                            delay=True)
+    else:
+        file_handler = logging.handlers.TimedRotatingFileHandler(config.LOG_FILE, when=config.LOG_ROTATION_WHEN,
+                                                                 backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8",
+                                                                 delay=True)
+    file_handler.setLevel(config.LOG_LEVEL)
+    file_handler.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else text_formatter)
+    return [console_handler, file_handler]
+
+
+_queue = None
+_writer = None
+_queue_handlers = []
+_sampling_filter = SamplingFilter(logging.INFO, config.LOG_DEBUG_SAMPLE_EVERY, config.LOG_DEBUG_MAX_PER_SECOND)
+_writer_lock = threading.Lock()
+# Set in pool workers: their records go to the process that created the pool
+_forward_queue = None
+# In a process that starts pools: the queue its workers' records arrive on, and the thread draining it
+_worker_queue = None
+_worker_listener = None
+
+
+# The process-wide log queue, and the writer thread draining it into the handlers (started on first use)
+def get_log_queue():
+    global _queue, _writer
+    with _writer_lock:
+        if _writer is None:
+            _queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+            _writer = LogWriter(_queue, *build_log_handlers(), respect_handler_level=True)
+            _writer.start()
+            for handler in _queue_handlers:
+                handler.queue = _queue
+    return _queue
+
+
+# Write out queued records and stop the writer thread; runs at exit
+def stop_logging():
+    global _writer, _worker_queue, _worker_listener
+    with _writer_lock:
+        listener, _worker_queue, _worker_listener = _worker_listener, None, None
+    if listener is not None:
+        listener.stop()
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+        for handler in writer.handlers:
+            handler.close()
+
+
+def _reset_after_fork():
+    # The writer thread does not survive a fork, and the queue's lock may be held: the child starts afresh
+    global _queue, _writer, _writer_lock, _worker_queue, _worker_listener
+    _writer_lock = threading.Lock()
+    _queue = _writer = _worker_queue = _worker_listener = None
+    if _queue_handlers:
+        get_log_queue()
+
+
+# Process pools send their workers' records here (initializer=forward_logs_to, initargs=(log_worker_queue(),)),
+# so one writer owns the log file: processes rotating the same file would move it away under each other
+def log_worker_queue():
+    global _worker_queue, _worker_listener
+    if _forward_queue is not None:
+        # A pool started from a pool worker forwards straight to the writing process
+        return _forward_queue
+    local_handler = NonBlockingQueueHandler(get_log_queue())
+    with _writer_lock:
+        if _worker_listener is None:
+            _worker_queue = multiprocessing.get_context("spawn").Queue()
+            _queue_handlers.append(local_handler)
+            _worker_listener = logging.handlers.QueueListener(_worker_queue, local_handler)
+            _worker_listener.start()
+        return _worker_queue
+
+
+def forward_logs_to(log_queue):
+    """Process pool initializer: write this worker's records to `log_queue` (log_worker_queue) rather than the log file."""
+    global _forward_queue
+    _forward_queue = log_queue
+    stop_logging()
+    if _queue_handlers:
+        get_log_queue()
+    # Pool workers exit without running atexit handlers
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=10)
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def logging_stats():
+    return {"queued": _queue.qsize() if _queue is not None else 0, "dropped": NonBlockingQueueHandler.dropped}
+
 
 def configure_logging(logger_name: str = "fastapi_app"):
     logger = logging.getLogger(logger_name)
@@ -9,27 +239,88 @@ def configure_logging(logger_name: str = "fastapi_app"):
     if logger.handlers:
         return logger
 
-    # Ensure log directory exists
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
+    # Records are queued here and written by the writer thread, off the calling thread
+    handler = NonBlockingQueueHandler(get_log_queue())
+    handler.addFilter(_sampling_filter)
+    _queue_handlers.append(handler)
+    logger.addHandler(handler)
+    logger.setLevel(config.LOG_LEVEL)
+    # Root handlers would write the record again, synchronously
+    logger.propagate = False
 
-    # Generate file name with current date
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    log_filename = f"log_file_{current_date}.log"
-    log_file_path = os.path.join(log_dir, log_filename)
+    return logger
 
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    logger.addHandler(console_handler)
 
-    # File handler with daily log file
-    file_handler = logging.FileHandler(log_file_path, mode='a')
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+request_logger = configure_logging("REQUEST")
 
-    logger.setLevel(logging.DEBUG)
 
-    return logger
+def current_request_id():
+    return _request_id.get()
+
+
+@contextmanager
+def log_context(request_id: str):
+    """Tag the records logged inside the block (and in tasks or executor calls it starts) with `request_id`."""
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+# Adds a stage duration to the current request's timings (logged with the request); no-op outside requests
+def record_stage_timing(stage: str, seconds: float):
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def collecting_stage_timings():
+    return _stage_timings.get() is not None
+
+
+# Endpoints polled by probes and scrapers are not logged per request
+_UNLOGGED_PATHS = ("/metrics", "/health/live", "/health/ready")
+
+
+# ASGI middleware: gives each HTTP request an ID (its X-Request-ID header, or a new one) carried by every
+# record logged while handling it and returned in the X-Request-ID response header. With LOG_REQUESTS on,
+# one record per request logs its status, duration (until the last streamed byte) and stage timings.
+class RequestLoggingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        id_token = _request_id.set(request_id)
+        timings = {}
+        timings_token = _stage_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = dict(message, headers=[*message.get("headers", []),
+                                                 (b"x-request-id", request_id.encode("latin-1"))])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if config.LOG_REQUESTS and scope["path"] not in _UNLOGGED_PATHS:
+                duration_ms = round((time.perf_counter() - start) * 1000, 1)
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                request_logger.info(
+                    f"{scope['method']} {route} {status['code']} in {duration_ms}ms",
+                    extra={"method": scope["method"], "route": route, "status": status["code"],
+                           "duration_ms": duration_ms,
+                           "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}})
+            _stage_timings.reset(timings_token)
+            _request_id.reset(id_token)
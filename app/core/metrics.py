@@ -0,0 +1,351 @@
+import time
+import threading
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging, logging_stats, record_stage_timing, collecting_stage_timings
+
+config = Config()
+logger = configure_logging("METRICS")
+
+# Seconds; covers sub-millisecond FAISS searches up to slow LLM round-trips and index builds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Tokens per LLM prompt
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 1536, 2048, 3072, 4096, 6144, 8192, 16384)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            for labelvalues, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, labelvalues, [("le", _format_value(float(bound)))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, labelvalues, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, labelvalues)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# Exposes the numeric fields of a component's stats() dict, read at scrape time so the hot path pays nothing
+class StatsCollector:
+    def __init__(self, prefix: str, stats_fn, documentation: str, counters=()):
+        self.prefix = prefix
+        self.stats_fn = stats_fn
+        self.documentation = documentation
+        self.counters = set(counters)
+
+    def render(self):
+        try:
+            stats = self.stats_fn()
+        except Exception as e:
+            logger.error(f"Metrics collector {self.prefix} failed: {e}")
+            return []
+        lines = []
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{key}_total" if key in self.counters else f"{self.prefix}_{key}"
+            type_name = "counter" if key in self.counters else "gauge"
+            lines += [f"# HELP {name} {self.documentation}: {key}", f"# TYPE {name} {type_name}",
+                      f"{name} {_format_value(value)}"]
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        lines = []
+        for collector in collectors:
+            lines.extend(collector.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.register(Histogram(
+    "rag_stage_duration_seconds", "Duration of request pipeline stages", ["stage"]))
+INGESTION_STAGE_DURATION = registry.register(Histogram(
+    "rag_ingestion_stage_duration_seconds", "Duration of PDF ingestion job stages", ["stage", "status"]))
+LLM_TOKENS = registry.register(Counter(
+    "rag_llm_tokens_total", "LLM tokens by direction (prompt or completion)", ["direction"]))
+CONTEXT_TOKENS = registry.register(Histogram(
+    "rag_context_tokens", "Estimated tokens per LLM prompt: retrieved context, packed context and whole prompt",
+    ["part"], buckets=TOKEN_BUCKETS))
+LLM_REQUESTS = registry.register(Counter(
+    "rag_llm_requests_total", "LLM calls by outcome", ["outcome"]))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "rag_http_request_duration_seconds", "HTTP request duration until the response body is sent",
+    ["method", "route", "status"]))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "rag_http_requests_in_flight", "HTTP requests currently being handled"))
+
+
+def register_stats_collector(prefix: str, stats_fn, documentation: str, counters=()):
+    if config.METRICS_ENABLED:
+        registry.register(StatsCollector(prefix, stats_fn, documentation, counters))
+
+
+register_stats_collector("rag_log", logging_stats, "Log writer queue", counters=("dropped",))
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+# OpenTelemetry tracer, set up on first use when OTEL_TRACING_ENABLED; exported over OTLP
+# (endpoint from the standard OTEL_EXPORTER_OTLP_* variables)
+def get_tracer():
+    global _tracer
+    if not config.OTEL_TRACING_ENABLED:
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from opentelemetry import trace
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+                provider = TracerProvider(resource=Resource.create({"service.name": config.OTEL_SERVICE_NAME}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                trace.set_tracer_provider(provider)
+                _tracer = trace.get_tracer("rag")
+                logger.info("OpenTelemetry tracing enabled")
+    return _tracer
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a pipeline stage into rag_stage_duration_seconds and, with tracing on, a `rag.<stage>` span."""
+    if not config.METRICS_ENABLED and not config.OTEL_TRACING_ENABLED and not collecting_stage_timings():
+        yield
+        return
+    tracer = get_tracer()
+    start = time.perf_counter()
+    try:
+        if tracer is None:
+            yield
+        else:
+            with tracer.start_as_current_span(f"rag.{stage}"):
+                yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+# Also kept with the current request's timings for its request log record
+def observe_stage(stage: str, seconds: float):
+    if config.METRICS_ENABLED:
+        STAGE_DURATION.observe(seconds, stage=stage)
+    record_stage_timing(stage, seconds)
+
+
+def observe_context_tokens(stats: dict):
+    if config.METRICS_ENABLED:
+        for part, key in (("retrieved", "retrieved_context_tokens"), ("packed", "context_tokens"),
+                          ("prompt", "prompt_tokens")):
+            if stats.get(key) is not None:
+                CONTEXT_TOKENS.observe(stats[key], part=part)
+
+
+# LangChain callbacks for the parts of a chain run we do not call directly: retrieval inside
+# RetrievalQA and the LLM call (duration and token usage)
+class MetricsCallbackHandler(BaseCallbackHandler):
+    def __init__(self):
+        self._starts = {}
+        self._spans = {}
+
+    def _start(self, run_id, stage):
+        self._starts[run_id] = time.perf_counter()
+        tracer = get_tracer()
+        if tracer is not None:
+            self._spans[run_id] = tracer.start_span(f"rag.{stage}")
+
+    def _end(self, run_id, stage):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            observe_stage(stage, time.perf_counter() - start)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end()
+        return start is not None
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "retrieve")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, "retrieve")
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "retrieve")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if not self._end(run_id, "llm"):
+            return
+        LLM_REQUESTS.inc(outcome="success")
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+        LLM_TOKENS.inc(prompt_tokens, direction="prompt")
+        LLM_TOKENS.inc(completion_tokens, direction="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if self._end(run_id, "llm"):
+            LLM_REQUESTS.inc(outcome="error")
+
+
+metrics_callback_handler = MetricsCallbackHandler()
+
+
+# Callbacks to attach to chains and LLMs; empty when metrics and tracing are off
+def get_metrics_callbacks():
+    if config.METRICS_ENABLED or config.OTEL_TRACING_ENABLED:
+        return [metrics_callback_handler]
+    return []
+
+
+# ASGI middleware: request duration until the last body chunk (so streamed answers are timed fully)
+# by route template, and requests in flight
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=scope["method"],
+                                          route=route_path, status=status["code"])
+
+
+def render_metrics():
+    return registry.render()
@@ -0,0 +1,66 @@
+import time
+
+from app.core.logger import configure_logging
+from app.core.inference_limiter import run_blocking
+
+logger = configure_logging("READINESS")
+
+# Component states
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+# Tracks the components warmed up at startup (models, default indexes, chains) for /health/ready.
+# A component that failed to warm up is retried lazily by the first request that needs it; its getter
+# then reports the load with mark_ready.
+class Readiness:
+    def __init__(self):
+        self.created_at = time.time()
+        self.components = {}
+
+    def expect(self, names):
+        for name in names:
+            self.components.setdefault(name, {"status": PENDING, "duration_s": None, "error": None})
+
+    async def track(self, name: str, func):
+        """Run the blocking loader `func` off the event loop and record how it went."""
+        component = self.components.setdefault(name, {"status": PENDING, "duration_s": None, "error": None})
+        component["status"] = LOADING
+        start = time.perf_counter()
+        try:
+            await run_blocking(func)
+            component["status"] = READY
+            component["error"] = None
+        except Exception as e:
+            component["status"] = FAILED
+            component["error"] = str(e)
+            logger.error(f"Warm-up of {name} failed: {e}")
+        finally:
+            component["duration_s"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Warm-up of {name} {component['status']} in {component['duration_s']}s")
+
+    def mark_ready(self, name: str):
+        """Record a component loaded outside warm-up (a lazy retry after a failed warm-up, or a first request)."""
+        component = self.components.get(name)
+        if component is not None and component["status"] != READY:
+            component["status"] = READY
+            component["error"] = None
+            logger.info(f"{name} loaded on demand; marked ready")
+
+    @property
+    def ready(self):
+        return all(component["status"] == READY for component in self.components.values())
+
+    def report(self):
+        return {"ready": self.ready, "uptime_s": round(time.time() - self.created_at, 3),
+                "components": self.components}
+
+    def stats(self):
+        return {"ready": int(self.ready),
+                "components_ready": sum(1 for c in self.components.values() if c["status"] == READY),
+                "components_failed": sum(1 for c in self.components.values() if c["status"] == FAILED)}
+
+
+readiness = Readiness()
@@ -0,0 +1,231 @@
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import FormParserError
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.processing.pdf_extraction_engine import get_page_count
+
+config = Config()
+logger = configure_logging("UPLOAD_STORAGE")
+
+# A PDF's header must start within its first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_WINDOW = 1024
+# Multipart framing and form fields allowed on top of the files when checking Content-Length
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Form fields other than the files are skipped, up to this size each
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class InvalidUploadError(Exception):
+    pass
+
+
+class StagedUpload:
+    """
+    An uploaded PDF being written to UPLOAD_TMP_DIR. Its SHA-256 (the document registry's content hash)
+    is computed as the bytes are written; commit() renames the file into place.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.path = os.path.join(config.UPLOAD_TMP_DIR, f"{uuid.uuid4().hex}.upload.pdf")
+        self.size = 0
+        self.pages = None
+        self.content_hash = None
+        self._digest = hashlib.sha256()
+        self._file = open(self.path, "wb")
+
+    # Runs in a worker thread; hashlib releases the GIL on large buffers
+    def write(self, data: bytes):
+        self._file.write(data)
+        self._digest.update(data)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            self.content_hash = self._digest.hexdigest()
+
+    def commit(self, destination: str):
+        # Same filesystem as app/data/pdfs, so readers see the whole file or none of it
+        os.replace(self.path, destination)
+        self.path = destination
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PdfUploadReceiver:
+    """
+    Streams the file parts named `field_name` of a multipart/form-data body to StagedUploads. The
+    python-multipart callbacks only record events; receive() acts on them between body chunks, writing
+    file data in UPLOAD_WRITE_BUFFER_BYTES blocks from a worker thread so the event loop never waits on
+    the disk. A part is rejected as soon as it passes UPLOAD_MAX_BYTES or its header is not a PDF's.
+    """
+
+    def __init__(self, field_name: str, max_files: int):
+        self.field_name = field_name
+        self.max_files = max_files
+        self.uploads = []
+        self._events = []
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._current = None
+        self._skipped_bytes = 0
+        self._buffer = bytearray()
+        self._head = b""
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._events.append(("part", options.get(b"name", b"").decode("utf-8", "replace"),
+                             options.get(b"filename", b"").decode("utf-8", "replace")))
+
+    def on_part_data(self, data, start, end):
+        self._events.append(("data", data[start:end]))
+
+    def on_part_end(self):
+        self._events.append(("end",))
+
+    async def _flush(self):
+        if self._buffer:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            await asyncio.to_thread(self._current.write, data)
+
+    async def _handle(self, event):
+        if event[0] == "part":
+            _, name, filename = event
+            if name != self.field_name:
+                self._current, self._skipped_bytes = None, 0
+                return
+            if not filename:
+                raise InvalidUploadError(f"Field '{self.field_name}' must be a file")
+            if len(self.uploads) >= self.max_files:
+                raise InvalidUploadError(f"At most {self.max_files} PDF files per request")
+            self._current = await asyncio.to_thread(StagedUpload, filename)
+            self._head = b""
+            self.uploads.append(self._current)
+        elif event[0] == "data":
+            data = event[1]
+            if self._current is None:
+                self._skipped_bytes += len(data)
+                if self._skipped_bytes > MAX_FIELD_BYTES:
+                    raise InvalidUploadError("Form field too large")
+                return
+            self._current.size += len(data)
+            if self._current.size > config.UPLOAD_MAX_BYTES:
+                raise UploadTooLargeError(f"{self._current.filename} is larger than {config.UPLOAD_MAX_BYTES} bytes")
+            if len(self._head) < PDF_HEADER_WINDOW:
+                self._head += data[:PDF_HEADER_WINDOW - len(self._head)]
+                if len(self._head) >= PDF_HEADER_WINDOW:
+                    self._check_header()
+            self._buffer += data
+            if len(self._buffer) >= config.UPLOAD_WRITE_BUFFER_BYTES:
+                await self._flush()
+        elif event[0] == "end" and self._current is not None:
+            self._check_header()
+            await self._flush()
+            await asyncio.to_thread(self._current.close)
+            self._current = None
+
+    def _check_header(self):
+        if PDF_MAGIC not in self._head:
+            raise InvalidUploadError(f"{self._current.filename} is not a PDF")
+
+    async def receive(self, stream, boundary: bytes):
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin, "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value, "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished, "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end})
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                for event in self._events:
+                    await self._handle(event)
+                self._events.clear()
+            parser.finalize()
+        except FormParserError as e:
+            raise InvalidUploadError(f"Invalid multipart body: {e}")
+        if self._current is not None:
+            raise InvalidUploadError("Incomplete multipart body")
+        if not self.uploads:
+            raise InvalidUploadError(f"No PDF file in field '{self.field_name}'")
+
+
+# Page count of a complete staged PDF, checked against UPLOAD_MAX_PAGES
+def check_page_count(upload: StagedUpload):
+    try:
+        upload.pages = get_page_count(upload.path)
+    except Exception as e:
+        logger.warning(f"Could not open uploaded PDF {upload.filename}: {e}")
+        raise InvalidUploadError(f"{upload.filename} is not a readable PDF")
+    if upload.pages > config.UPLOAD_MAX_PAGES:
+        raise UploadTooLargeError(f"{upload.filename} has {upload.pages} pages, more than {config.UPLOAD_MAX_PAGES}")
+
+
+async def receive_pdf_uploads(request, field_name: str, max_files: int = 1):
+    """
+    Stream the PDFs in the `field_name` parts of a multipart/form-data request to UPLOAD_TMP_DIR,
+    hashing them as they arrive. A declared Content-Length over the limits is rejected before any of the
+    body is read, and complete files are checked against UPLOAD_MAX_PAGES. Returns the StagedUploads in
+    request order; on any error (including a client disconnect) every staged file is removed.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise InvalidUploadError("Expected a multipart/form-data request")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_files * config.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLargeError(f"Request body of {content_length} bytes exceeds the upload limit")
+
+    os.makedirs(config.UPLOAD_TMP_DIR, exist_ok=True)
+    receiver = PdfUploadReceiver(field_name, max_files)
+    try:
+        await receiver.receive(request.stream(), params[b"boundary"])
+        for upload in receiver.uploads:
+            await asyncio.to_thread(check_page_count, upload)
+    except BaseException:
+        for upload in receiver.uploads:
+            upload.discard()
+        raise
+    return receiver.uploads
+
+
+# Staged files left behind by a crashed process; run at startup
+def remove_stale_uploads(max_age_s: float = 3600):
+    if not os.path.isdir(config.UPLOAD_TMP_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(config.UPLOAD_TMP_DIR):
+        path = os.path.join(config.UPLOAD_TMP_DIR, name)
+        if name.endswith(".upload.pdf") and time.time() - os.path.getmtime(path) > max_age_s:
+            os.remove(path)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale staged uploads from {config.UPLOAD_TMP_DIR}")
+    return removed
@@ -0,0 +1,156 @@
+import os
+import weakref
+import threading
+from collections import OrderedDict
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("VECTOR_STORE_CACHE")
+
+
+# Version of an on-disk vector store: changes whenever the directory or any file in it is rewritten
+def get_directory_version(directory_path: str):
+    mtimes = [os.stat(directory_path).st_mtime_ns]
+    total_bytes = 0
+    for name in os.listdir(directory_path):
+        file_stat = os.stat(os.path.join(directory_path, name))
+        mtimes.append(file_stat.st_mtime_ns)
+        total_bytes += file_stat.st_size
+    return max(mtimes), total_bytes
+
+
+class CacheEntry:
+    def __init__(self, value, version, size_bytes):
+        self.value = value
+        self.version = version
+        self.size_bytes = size_bytes
+
+
+# Serializes loads of one key. Held weakly by the cache, so it goes away once no load is using it
+class LoadingLock:
+    __slots__ = ("_lock", "__weakref__")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+# Process-wide LRU cache of loaded vector stores and their RAG chains, keyed by document ID
+class VectorStoreCache:
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading_locks = weakref.WeakValueDictionary()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key: str, directory_path: str, loader):
+        """
+        Return the cached value for `key`, calling `loader(directory_path)` on a miss.
+        Concurrent misses for the same key share a single load.
+        """
+        version, size_bytes = get_directory_version(directory_path)
+        # An update switches the document to a new directory
+        version = (directory_path, version)
+
+        entry = self._get_if_current(key, version)
+        if entry is not None:
+            return entry.value
+
+        with self._get_loading_lock(key):
+            # Another request may have finished loading while we waited
+            entry = self._get_if_current(key, version, count_miss=False)
+            if entry is not None:
+                return entry.value
+
+            logger.info(f"Loading vector store for key {key} from {directory_path}")
+            value = loader(directory_path)
+            self._put(key, CacheEntry(value, version, size_bytes))
+            return value
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry.size_bytes
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "keys": list(self._entries.keys()),
+                "estimated_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _get_if_current(self, key, version, count_miss=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version != version:
+                # Index was rebuilt on disk since it was cached
+                logger.info(f"Vector store for key {key} changed on disk, invalidating")
+                del self._entries[key]
+                self._total_bytes -= entry.size_bytes
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _get_loading_lock(self, key):
+        with self._lock:
+            lock = self._loading_locks.get(key)
+            if lock is None:
+                lock = LoadingLock()
+                self._loading_locks[key] = lock
+            return lock
+
+    def _put(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size_bytes
+            self._entries[key] = entry
+            self._total_bytes += entry.size_bytes
+            # Evict least recently used entries, but always keep the one just loaded
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size_bytes
+                self.evictions += 1
+                logger.info(f"Evicted vector store for key {evicted_key} from cache")
+
+
+vector_store_cache = VectorStoreCache(max_entries=config.VECTOR_STORE_CACHE_MAX_ENTRIES,
+                                      max_bytes=config.VECTOR_STORE_CACHE_MAX_BYTES)
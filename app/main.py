@@ -1,13 +1,46 @@
 import uvicorn
-import logging
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.config.configuration import Config
 from app.routes.rag_route import router as rag_router
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.logger import configure_logging, RequestLoggingMiddleware
+from app.core.readiness import readiness
+from app.services.rag_service import warm_up
+from app.core.ingestion_jobs import ingestion_job_manager
+from app.core.document_catalog import sync_catalog_with_disk
+from app.core.upload_storage import remove_stale_uploads
+
+config = Config()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Catalogue vector stores created before the catalog existed
+    sync_catalog_with_disk()
+    # Staged uploads of a previous process that never finished
+    remove_stale_uploads()
+    # Pick up ingestion jobs left queued or running by a previous process
+    ingestion_job_manager.resume_pending_jobs()
+    # Load the embedding model, default index and chains concurrently (see WARMUP_MODE)
+    warmup = None
+    if config.WARMUP_MODE == "blocking":
+        await warm_up()
+    elif config.WARMUP_MODE == "background":
+        warmup = await warm_up(background=True)
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+    ingestion_job_manager.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(title="RAG API", 
               description="API for querying Bangla and English using a RAG system", 
-              version="1.0.0")
+              version="1.0.0",
+              lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -18,9 +51,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight metrics
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Request IDs on log records and one structured log record per request (outermost, so it times
+# the whole request)
+app.add_middleware(RequestLoggingMiddleware)
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = configure_logging("MAIN")
 
 # Include the router
 app.include_router(rag_router, prefix="/rag")
@@ -33,6 +73,25 @@ async def get_index():
     return {"message": "Hello route triggered!"}
 
 
+# Liveness: the process is up and serving requests
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+# Readiness: startup warm-up finished (503 while loading or after a failed component)
+@app.get("/health/ready")
+async def readiness_check():
+    report = readiness.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
+# Prometheus scrape endpoint (text exposition format)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # Entry point for running the application
 def run():
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
@@ -0,0 +1,184 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+from contextlib import nullcontext
+import numpy as np
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import track_stage
+from app.processing.single_query_inference import answer_from_documents_async
+from app.processing.context_packing import collect_context_stats
+
+config = Config()
+logger = configure_logging("BATCH_EVALUATION")
+
+NOT_FOUND_ANSWER = "Information not found in the document."
+
+
+# Test sets are JSONL (one object per line) or CSV with columns: query, expected_answer and optionally
+# id and gold_chunks. Gold chunks are text snippets of the chunks that should be retrieved
+# (a list in JSONL, "|"-separated in CSV).
+def load_test_set(path: str):
+    items = []
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                gold_chunks = [chunk for chunk in (row.get("gold_chunks") or "").split("|") if chunk.strip()]
+                items.append({"id": row.get("id"), "query": row["query"], "expected_answer": row["expected_answer"],
+                              "gold_chunks": gold_chunks})
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    items.append({"id": row.get("id"), "query": row["query"], "expected_answer": row["expected_answer"],
+                                  "gold_chunks": row.get("gold_chunks") or []})
+    for position, item in enumerate(items):
+        if item["id"] is None:
+            item["id"] = str(position)
+    return items
+
+
+def _normalize(text: str):
+    return " ".join(text.split()).casefold()
+
+
+def retrieval_metrics(docs, gold_chunks):
+    """recall@k (share of gold chunks found in the k retrieved) and reciprocal rank of the first relevant chunk."""
+    gold = [_normalize(chunk) for chunk in gold_chunks]
+    retrieved = [_normalize(doc.page_content) for doc in docs]
+    found = [any(chunk in text for text in retrieved) for chunk in gold]
+    first_relevant = next((rank for rank, text in enumerate(retrieved, start=1)
+                           if any(chunk in text for chunk in gold)), None)
+    return {"recall_at_k": sum(found) / len(gold), "reciprocal_rank": 1.0 / first_relevant if first_relevant else 0.0}
+
+
+def cosine_similarities(embeddings, answers, expected_answers, batch_size: int = 64):
+    """Row-wise cosine similarity of answers vs expected answers, embedded together in batches."""
+    texts = [answer or NOT_FOUND_ANSWER for answer in answers] + list(expected_answers)
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[start:start + batch_size]))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    answer_matrix, expected_matrix = matrix[:len(answers)], matrix[len(answers):]
+    return np.sum(answer_matrix * expected_matrix, axis=1)
+
+
+async def evaluate_item(rag_chain, item, semaphore, llm_slot=None):
+    async with semaphore:
+        start = time.perf_counter()
+        result = {"id": item["id"], "query": item["query"], "expected_answer": item["expected_answer"]}
+        try:
+            # Retrieve once; the same documents produce the answer and the retrieval metrics
+            with track_stage("retrieve"):
+                docs = await rag_chain.retriever.ainvoke(item["query"])
+            retrieve_ms = (time.perf_counter() - start) * 1000
+            async with (llm_slot() if llm_slot else nullcontext()):
+                with collect_context_stats() as context_stats:
+                    answer = await answer_from_documents_async(rag_chain, docs, item["query"])
+            result.update({"actual": answer, "prompt_tokens": context_stats.get("prompt_tokens"),
+                           "context": [f"[Doc {i+1}]: {doc.page_content[:500]}" for i, doc in enumerate(docs)],
+                           "retrieve_ms": round(retrieve_ms, 1)})
+            if item.get("gold_chunks"):
+                result.update(retrieval_metrics(docs, item["gold_chunks"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Evaluation error for item {item['id']}: {e}")
+            result.update({"actual": None, "error": str(e)})
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+
+def summarize(results, elapsed_s: float, pass_threshold: float):
+    scored = [result for result in results if result.get("cosine_similarity") is not None]
+    similarities = np.array([result["cosine_similarity"] for result in scored], dtype=np.float32)
+    with_gold = [result for result in results if "recall_at_k" in result]
+    latencies = np.array([result["latency_ms"] for result in results], dtype=np.float32)
+    prompt_tokens = [result["prompt_tokens"] for result in results if result.get("prompt_tokens") is not None]
+    summary = {
+        "items": len(results),
+        "errors": sum(1 for result in results if result.get("error")),
+        "mean_cosine_similarity": round(float(similarities.mean()), 4) if len(scored) else None,
+        "median_cosine_similarity": round(float(np.median(similarities)), 4) if len(scored) else None,
+        "pass_threshold": pass_threshold,
+        "pass_rate": round(float((similarities >= pass_threshold).mean()), 4) if len(scored) else None,
+        "items_with_gold_chunks": len(with_gold),
+        "mean_recall_at_k": round(float(np.mean([r["recall_at_k"] for r in with_gold])), 4) if with_gold else None,
+        "mrr": round(float(np.mean([r["reciprocal_rank"] for r in with_gold])), 4) if with_gold else None,
+        "mean_prompt_tokens": round(float(np.mean(prompt_tokens)), 1) if prompt_tokens else None,
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1) if len(results) else None,
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1) if len(results) else None,
+        "elapsed_s": round(elapsed_s, 2),
+        "items_per_s": round(len(results) / elapsed_s, 2) if elapsed_s else None,
+    }
+    return summary
+
+
+async def evaluate_batch(items, rag_chain, embeddings, concurrency: int = None, pass_threshold: float = 0.8,
+                         llm_slot=None):
+    """
+    Evaluate a test set: at most `concurrency` items retrieve and call the LLM at once (`llm_slot`, if given,
+    is an async context manager factory taken around each LLM call), then all answers are scored in
+    one batched embedding pass. Returns (results in input order, summary).
+    """
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency or config.EVALUATION_MAX_CONCURRENCY)
+    results = await asyncio.gather(*(evaluate_item(rag_chain, item, semaphore, llm_slot) for item in items))
+
+    answered = [result for result in results if not result.get("error")]
+    if answered:
+        loop = asyncio.get_running_loop()
+        similarities = await loop.run_in_executor(None, cosine_similarities, embeddings,
+                                                  [result["actual"] for result in answered],
+                                                  [result["expected_answer"] for result in answered])
+        for result, similarity in zip(answered, similarities):
+            result["cosine_similarity"] = round(float(similarity), 4)
+
+    summary = summarize(results, time.perf_counter() - start, pass_threshold)
+    logger.info(f"Batch evaluation summary: {summary}")
+    return list(results), summary
+
+
+def write_results(results, summary, output_path: str):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    summary_path = f"{os.path.splitext(output_path)[0]}.summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary_path
+
+
+if __name__ == '__main__':
+    from app.processing.generate_vector_db import load_vector_store
+    from app.processing.generate_rag_chain import create_rag_chain
+    from app.processing.generate_embeddings import get_embeddings
+    from app.processing.lexical_index import load_lexical_index
+    from app.core.document_catalog import get_vector_store_path
+
+    parser = argparse.ArgumentParser(description="Evaluate the RAG chain on a JSONL/CSV test set")
+    parser.add_argument("--test-set", required=True)
+    parser.add_argument("--output", default="app/data/evaluations/results.jsonl")
+    parser.add_argument("--document-id", default=None, help="Evaluate against an uploaded document's vector store")
+    parser.add_argument("--concurrency", type=int, default=config.EVALUATION_MAX_CONCURRENCY)
+    parser.add_argument("--pass-threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    saved_vector_store_path = get_vector_store_path(args.document_id) if args.document_id else config.VECTOR_STORE_PATH
+    vector_store = load_vector_store(saved_vector_store_path)
+    rag_chain = create_rag_chain(vector_store, load_lexical_index(saved_vector_store_path))
+
+    items = load_test_set(args.test_set)
+    logger.info(f"Evaluating {len(items)} items from {args.test_set} with concurrency {args.concurrency}")
+    results, summary = asyncio.run(evaluate_batch(items, rag_chain, get_embeddings(),
+                                                  concurrency=args.concurrency, pass_threshold=args.pass_threshold))
+    summary_path = write_results(results, summary, args.output)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    logger.info(f"Results written to {args.output}, summary to {summary_path}")
@@ -0,0 +1,170 @@
+import time
+import asyncio
+from contextlib import nullcontext
+import numpy as np
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import track_stage
+from app.core.inference_limiter import run_blocking
+from app.core.answer_cache import normalize_query
+from app.processing.hybrid_retriever import HybridRetriever
+from app.processing.reranker import RerankingRetriever
+from app.processing.single_query_inference import answer_from_documents_async, context_fields
+from app.processing.context_packing import collect_context_stats
+
+config = Config()
+logger = configure_logging("BATCH_QUERY")
+
+
+def batch_similarity_search(vector_store, query_vectors, k: int):
+    """
+    One FAISS search for all query vectors. Returns, per query, the (doc, distance) list that
+    similarity_search_with_score_by_vector would return.
+    """
+    distances, rows = vector_store.index.search(np.asarray(query_vectors, dtype=np.float32), k)
+    results = []
+    for query_distances, query_rows in zip(distances, rows):
+        query_results = []
+        for distance, row in zip(query_distances, query_rows):
+            # -1 pads results when fewer than k rows match (small or filtered indexes)
+            if row == -1:
+                continue
+            doc_id = vector_store.index_to_docstore_id[int(row)]
+            query_results.append((vector_store.docstore.search(doc_id), float(distance)))
+        results.append(query_results)
+    return results
+
+
+def retrieve_batch(retriever, queries, query_vectors):
+    """Retrieve for several queries of one document with a single batched vector search; same results as retriever.invoke."""
+    if isinstance(retriever, RerankingRetriever):
+        start = time.perf_counter()
+        candidates = retrieve_batch(retriever.base_retriever, queries, query_vectors)
+        retrieve_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        return [retriever.rerank(query, docs, retrieve_ms=retrieve_ms) for query, docs in zip(queries, candidates)]
+    if isinstance(retriever, HybridRetriever):
+        with track_stage("vector_search"):
+            dense_results = batch_similarity_search(retriever.vectorstore, query_vectors, retriever.fetch_k)
+        return [retriever.fuse(query, results) for query, results in zip(queries, dense_results)]
+    with track_stage("vector_search"):
+        dense_results = batch_similarity_search(retriever.vectorstore, query_vectors,
+                                                retriever.search_kwargs.get("k", 4))
+    return [[doc for doc, _ in results] for results in dense_results]
+
+
+async def answer_query_batch(items, targets, embeddings, concurrency: int = None, llm_slot=None, answer_cache=None):
+    """
+    Answer (query, document_id) items. Yields ("result", {...}) for each item as soon as its answer is
+    ready (in completion order, with the item's `index`), then ("done", stats).
+
+    `targets` maps each document_id to {"rag_chain", "scope", "version"} (scope and version as used by
+    the answer cache). Identical questions to the same document are answered once; the distinct
+    questions are embedded in one batch, each document's index is searched once for all of its
+    questions, and at most `concurrency` LLM calls run at a time (each also inside `llm_slot`, if given).
+    """
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency or config.QUERY_BATCH_MAX_CONCURRENCY)
+
+    # One unit of work per distinct (document, normalized question)
+    units = {}
+    for index, item in enumerate(items):
+        key = (item["document_id"], normalize_query(item["query"]))
+        units.setdefault(key, {"document_id": item["document_id"], "query": item["query"], "indices": []})
+        units[key]["indices"].append(index)
+    units = list(units.values())
+    stats = {"items": len(items), "unique_queries": len(units), "documents": len(targets),
+             "cache_hits": 0, "errors": 0, "prompt_tokens": 0}
+
+    def results_for(unit, result):
+        for position, index in enumerate(unit["indices"]):
+            yield {"index": index, "document_id": unit["document_id"], "query": items[index]["query"],
+                   **result, **({"duplicate_of": unit["indices"][0]} if position else {})}
+
+    # Exact cache hits need neither embedding nor retrieval
+    pending = []
+    for unit in units:
+        target = targets[unit["document_id"]]
+        hit = answer_cache.lookup_exact(target["scope"], target["version"], unit["query"]) if answer_cache else None
+        if hit is None:
+            pending.append(unit)
+        else:
+            unit["hit"] = hit
+
+    if pending:
+        # Distinct question texts are embedded in one forward pass, whatever their document
+        texts = list(dict.fromkeys(unit["query"] for unit in pending))
+        embed_start = time.perf_counter()
+        with track_stage("embed_query"):
+            vectors = dict(zip(texts, await run_blocking(embeddings.embed_documents, texts)))
+        stats["embed_ms"] = round((time.perf_counter() - embed_start) * 1000, 1)
+        for unit in pending:
+            unit["vector"] = vectors[unit["query"]]
+
+        if answer_cache:
+            for unit in pending:
+                target = targets[unit["document_id"]]
+                unit["hit"] = answer_cache.lookup_semantic(target["scope"], target["version"], unit["vector"])
+            pending = [unit for unit in pending if unit["hit"] is None]
+
+    for unit in units:
+        if unit.get("hit") is not None:
+            stats["cache_hits"] += 1
+            hit = unit["hit"]
+            for result in results_for(unit, {"answer": hit["answer"], "cached": True, "cache_match": hit["match"],
+                                              "cache_similarity": round(hit["similarity"], 4),
+                                              "latency_ms": round((time.perf_counter() - start) * 1000, 1)}):
+                yield "result", result
+
+    # One batched search per document index, run concurrently across documents
+    by_document = {}
+    for unit in pending:
+        by_document.setdefault(unit["document_id"], []).append(unit)
+    retrievals = {}
+    for document_id, document_units in by_document.items():
+        retriever = targets[document_id]["rag_chain"].retriever
+        retrievals[document_id] = asyncio.ensure_future(run_blocking(
+            retrieve_batch, retriever, [unit["query"] for unit in document_units],
+            [unit["vector"] for unit in document_units]))
+
+    async def answer_unit(unit, position):
+        target = targets[unit["document_id"]]
+        try:
+            docs = (await retrievals[unit["document_id"]])[position]
+            async with semaphore:
+                async with (llm_slot() if llm_slot else nullcontext()):
+                    with collect_context_stats() as context_stats:
+                        answer = await answer_from_documents_async(target["rag_chain"], docs, unit["query"])
+            if answer_cache:
+                try:
+                    await run_blocking(answer_cache.store, target["scope"], target["version"], unit["query"],
+                                       answer, unit["vector"])
+                except Exception as e:
+                    logger.error(f"Answer cache write failed for {target['scope']}: {e}")
+            result = {"answer": answer, "cached": False, **context_fields(context_stats)}
+            stats["prompt_tokens"] += context_stats.get("prompt_tokens", 0)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Batch query error for document {unit['document_id']}: {e}")
+            result = {"answer": None, "cached": False, "error": getattr(e, "detail", None) or str(e)}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return unit, result
+
+    tasks = [asyncio.ensure_future(answer_unit(unit, position))
+             for document_units in by_document.values() for position, unit in enumerate(document_units)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            unit, result = await next_done
+            if result.get("error"):
+                stats["errors"] += len(unit["indices"])
+            for item_result in results_for(unit, result):
+                yield "result", item_result
+    finally:
+        # The consumer stopped early (client disconnect): drop the answers still in flight
+        for task in [*tasks, *retrievals.values()]:
+            task.cancel()
+
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Batch query summary: {stats}")
+    yield "done", stats
@@ -0,0 +1,280 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+
+from app.core.logger import configure_logging
+
+logger = configure_logging("COMPACT_VECTOR_STORE")
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    doc_id TEXT PRIMARY KEY,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS index_map (
+    faiss_row INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    faiss_row INTEGER PRIMARY KEY
+);
+"""
+
+
+def is_compact_vector_store(saved_vector_store_path: str):
+    return os.path.exists(os.path.join(saved_vector_store_path, DOCSTORE_FILE))
+
+
+class SqliteConnection:
+    """One SQLite connection per thread for a docstore file."""
+
+    def __init__(self, db_path: str, read_only: bool):
+        self.db_path = db_path
+        self.read_only = read_only
+        self._local = threading.local()
+
+    def get(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.read_only:
+                connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                connection = sqlite3.connect(self.db_path, check_same_thread=False)
+                connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+
+# Chunk texts and metadata in SQLite; only the chunks a search returns are read and materialized
+class SqliteDocstore(Docstore):
+    def __init__(self, connection: SqliteConnection):
+        self.connection = connection
+
+    def search(self, search: str):
+        row = self.connection.get().execute(
+            "SELECT page_content, metadata FROM chunks WHERE doc_id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts: dict):
+        with self.connection.get() as db:
+            db.executemany("INSERT OR REPLACE INTO chunks (doc_id, page_content, metadata) VALUES (?, ?, ?)",
+                           [(doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                            for doc_id, doc in texts.items()])
+
+    def delete(self, ids: list):
+        with self.connection.get() as db:
+            db.executemany("DELETE FROM chunks WHERE doc_id = ?", [(doc_id,) for doc_id in ids])
+
+    def __len__(self):
+        return self.connection.get().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+# FAISS row -> docstore id, backed by the same SQLite file instead of an in-memory dict
+class SqliteIndexMap(MutableMapping):
+    def __init__(self, connection: SqliteConnection):
+        self.connection = connection
+
+    def __getitem__(self, faiss_row):
+        row = self.connection.get().execute(
+            "SELECT doc_id FROM index_map WHERE faiss_row = ?", (int(faiss_row),)).fetchone()
+        if row is None:
+            raise KeyError(faiss_row)
+        return row[0]
+
+    def __setitem__(self, faiss_row, doc_id):
+        self.update({faiss_row: doc_id})
+
+    def __delitem__(self, faiss_row):
+        with self.connection.get() as db:
+            db.execute("DELETE FROM index_map WHERE faiss_row = ?", (int(faiss_row),))
+
+    def update(self, other=(), **kwargs):
+        items = dict(other, **kwargs)
+        with self.connection.get() as db:
+            db.executemany("INSERT OR REPLACE INTO index_map (faiss_row, doc_id) VALUES (?, ?)",
+                           [(int(faiss_row), doc_id) for faiss_row, doc_id in items.items()])
+
+    def __iter__(self):
+        for (faiss_row,) in self.connection.get().execute("SELECT faiss_row FROM index_map ORDER BY faiss_row"):
+            yield faiss_row
+
+    def __len__(self):
+        return self.connection.get().execute("SELECT COUNT(*) FROM index_map").fetchone()[0]
+
+
+def read_faiss_index(index_path: str, mmap: bool = True):
+    """
+    Read a FAISS index, memory-mapping it when this FAISS build supports it for the index type,
+    so several worker processes share the page cache instead of each holding a copy.
+    """
+    if mmap:
+        for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+            flag = getattr(faiss, flag_name, None)
+            if flag is None:
+                continue
+            try:
+                return faiss.read_index(index_path, flag | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                continue
+        logger.debug(f"Memory-mapping not supported for {index_path}, reading into memory")
+    return faiss.read_index(index_path)
+
+
+def save_compact_vector_store(vector_store, saved_vector_store_path: str):
+    """Write the FAISS index plus a SQLite docstore (no pickle) into `saved_vector_store_path`."""
+    os.makedirs(saved_vector_store_path, exist_ok=True)
+    faiss.write_index(vector_store.index, os.path.join(saved_vector_store_path, INDEX_FILE))
+
+    db_path = os.path.join(saved_vector_store_path, DOCSTORE_FILE)
+    tmp_db_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_db_path):
+        os.remove(tmp_db_path)
+    db = sqlite3.connect(tmp_db_path)
+    try:
+        db.executescript(SCHEMA)
+        with db:
+            rows = ((faiss_row, doc_id) for faiss_row, doc_id in vector_store.index_to_docstore_id.items())
+            db.executemany("INSERT INTO index_map (faiss_row, doc_id) VALUES (?, ?)", rows)
+            chunks = []
+            for doc_id in vector_store.index_to_docstore_id.values():
+                doc = vector_store.docstore.search(doc_id)
+                chunks.append((doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False)))
+            db.executemany("INSERT INTO chunks (doc_id, page_content, metadata) VALUES (?, ?, ?)", chunks)
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp_db_path, db_path)
+
+
+class CompactVectorStoreWriter:
+    """
+    Write a compact store chunk batch by chunk batch: chunks go to the SQLite docstore and vectors to
+    a spill file as they arrive, so neither is held in memory. close() writes the FAISS index, built
+    by the caller over vectors().
+    """
+
+    SPILL_FILE = "vectors.f32.tmp"
+
+    def __init__(self, saved_vector_store_path: str):
+        os.makedirs(saved_vector_store_path, exist_ok=True)
+        self.path = saved_vector_store_path
+        self.db = sqlite3.connect(os.path.join(saved_vector_store_path, DOCSTORE_FILE))
+        self.db.executescript(SCHEMA)
+        self.spill_path = os.path.join(saved_vector_store_path, self.SPILL_FILE)
+        self.spill = open(self.spill_path, "wb")
+        self.count = 0
+        self.dim = None
+
+    def add(self, docs, vectors):
+        """Append chunks with their vectors; returns their docstore ids."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.dim = vectors.shape[1]
+        doc_ids = [str(uuid.uuid4()) for _ in docs]
+        with self.db:
+            self.db.executemany("INSERT INTO index_map (faiss_row, doc_id) VALUES (?, ?)",
+                                [(self.count + i, doc_id) for i, doc_id in enumerate(doc_ids)])
+            self.db.executemany("INSERT INTO chunks (doc_id, page_content, metadata) VALUES (?, ?, ?)",
+                                [(doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                                 for doc_id, doc in zip(doc_ids, docs)])
+        self.spill.write(vectors.tobytes())
+        self.count += len(doc_ids)
+        return doc_ids
+
+    def vectors(self):
+        """All vectors added so far, memory-mapped from the spill file."""
+        self.spill.flush()
+        return np.memmap(self.spill_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+    def close(self, index=None):
+        """Write `index` and drop the spill file; without an index the store is left incomplete."""
+        self.spill.close()
+        self.db.close()
+        if index is not None:
+            faiss.write_index(index, os.path.join(self.path, INDEX_FILE))
+        os.remove(self.spill_path)
+
+
+def load_compact_vector_store(saved_vector_store_path: str, embeddings, mmap: bool = True):
+    index = read_faiss_index(os.path.join(saved_vector_store_path, INDEX_FILE), mmap=mmap)
+    # A writable store (mmap=False) also opens the docstore read-write
+    connection = SqliteConnection(os.path.join(saved_vector_store_path, DOCSTORE_FILE), read_only=mmap)
+    return FAISS(embedding_function=embeddings,
+                 index=index,
+                 docstore=SqliteDocstore(connection),
+                 index_to_docstore_id=SqliteIndexMap(connection))
+
+
+# FAISS rows of deleted chunks; they stay in the index until compaction and are filtered out at search time
+def read_tombstones(saved_vector_store_path: str):
+    db_path = os.path.join(saved_vector_store_path, DOCSTORE_FILE)
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        # Stores written before incremental updates have no tombstones table
+        if db.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'tombstones'").fetchone() is None:
+            return []
+        return [faiss_row for (faiss_row,) in db.execute("SELECT faiss_row FROM tombstones ORDER BY faiss_row")]
+    finally:
+        db.close()
+
+
+def read_live_chunks(saved_vector_store_path: str):
+    """(doc_id, Document) of every live chunk in FAISS row order."""
+    db = sqlite3.connect(f"file:{os.path.join(saved_vector_store_path, DOCSTORE_FILE)}?mode=ro", uri=True)
+    try:
+        rows = db.execute("SELECT chunks.doc_id, chunks.page_content, chunks.metadata FROM index_map "
+                          "JOIN chunks ON chunks.doc_id = index_map.doc_id ORDER BY index_map.faiss_row").fetchall()
+    finally:
+        db.close()
+    return [(doc_id, Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata)))
+            for doc_id, page_content, metadata in rows]
+
+
+def update_compact_vector_store(saved_vector_store_path: str, remove_doc_ids, docs, vectors):
+    """
+    Update a compact store in place: the rows of removed chunks become tombstones and the new
+    vectors are appended to the index. Callers run this on a private copy of the store.
+    Returns the docstore ids of the added chunks.
+    """
+    index_path = os.path.join(saved_vector_store_path, INDEX_FILE)
+    index = faiss.read_index(index_path)
+    first_row = index.ntotal
+    if len(docs):
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    doc_ids = [str(uuid.uuid4()) for _ in docs]
+
+    removed = set(remove_doc_ids)
+    db = sqlite3.connect(os.path.join(saved_vector_store_path, DOCSTORE_FILE))
+    try:
+        db.executescript(SCHEMA)
+        with db:
+            rows = [(faiss_row,) for faiss_row, doc_id in db.execute("SELECT faiss_row, doc_id FROM index_map")
+                    if doc_id in removed]
+            db.executemany("INSERT OR IGNORE INTO tombstones (faiss_row) VALUES (?)", rows)
+            db.executemany("DELETE FROM index_map WHERE faiss_row = ?", rows)
+            db.executemany("DELETE FROM chunks WHERE doc_id = ?", [(doc_id,) for doc_id in removed])
+            db.executemany("INSERT INTO index_map (faiss_row, doc_id) VALUES (?, ?)",
+                           [(first_row + i, doc_id) for i, doc_id in enumerate(doc_ids)])
+            db.executemany("INSERT INTO chunks (doc_id, page_content, metadata) VALUES (?, ?, ?)",
+                           [(doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                            for doc_id, doc in zip(doc_ids, docs)])
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    faiss.write_index(index, index_path)
+    logger.info(f"Updated {saved_vector_store_path}: {len(rows)} chunks removed, {len(doc_ids)} added")
+    return doc_ids
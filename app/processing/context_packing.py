@@ -0,0 +1,231 @@
+import math
+from functools import lru_cache
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.documents import Document
+from langchain_core.prompts import format_document
+from langchain.chains.combine_documents.stuff import StuffDocumentsChain
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import observe_context_tokens
+
+config = Config()
+logger = configure_logging("CONTEXT_PACKING")
+
+# Shortest shared text accepted as chunk overlap when chunks carry no offsets
+MIN_OVERLAP_CHARS = 20
+# Word n-grams compared to find near-duplicate passages
+SHINGLE_SIZE = 3
+
+_context_stats = ContextVar("context_stats", default=None)
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    if not config.CONTEXT_TOKENIZER:
+        return None
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(config.CONTEXT_TOKENIZER)
+
+
+def count_tokens(text: str):
+    """
+    Tokens in `text` by CONTEXT_TOKENIZER (a Hugging Face tokenizer name), or estimated as one token per
+    4 UTF-8 bytes, which tracks BPE tokenizers for English and Bengali alike.
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+@contextmanager
+def collect_context_stats():
+    """Collect the packing stats of the prompt built inside the block, including in threads it starts."""
+    stats = {}
+    token = _context_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _context_stats.reset(token)
+
+
+def _offsets(doc):
+    start, end = doc.metadata.get("start_offset"), doc.metadata.get("end_offset")
+    return (start, end) if start is not None and end is not None else None
+
+
+def _join_by_offsets(first: Document, second: Document):
+    """
+    The text of `first` continued by `second` as their offsets place them, or None when they are apart
+    or their texts do not agree with the offsets.
+    """
+    a, b = first.page_content, second.page_content
+    (start, end), (next_start, next_end) = _offsets(first), _offsets(second)
+    if end - start != len(a) or next_end - next_start != len(b):
+        return None
+    # Consecutive chunks are at most one separating space apart
+    if next_start == end + 1:
+        return a + " " + b
+    if not start <= next_start <= end:
+        return None
+    overlap = a[next_start - start:]
+    if next_end <= end:
+        return a if overlap.startswith(b) else None
+    return a + b[len(overlap):] if b.startswith(overlap) else None
+
+
+def join_passages(first: Document, second: Document):
+    """
+    The text of `first` continued by `second`, when `second` overlaps the end of `first` or directly
+    follows it in the same source; None otherwise. Chunks from streaming ingestion are matched by their
+    offsets, older chunks by a shared suffix and prefix of at least MIN_OVERLAP_CHARS.
+    """
+    if first.metadata.get("source") != second.metadata.get("source"):
+        return None
+    if _offsets(first) and _offsets(second):
+        text = _join_by_offsets(first, second)
+        if text is not None:
+            return text
+    # No offsets, or offsets that no longer match the text: a chunk kept unchanged by a replace keeps
+    # the offsets it had in the previous version of the PDF
+    a, b = first.page_content, second.page_content
+    if b in a:
+        return a
+    for overlap in range(min(len(a), len(b)) - 1, MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:overlap]):
+            return a + b[overlap:]
+    return None
+
+
+def merge_passages(docs):
+    """
+    Merge overlapping and adjacent chunks of the same source into passages. Returns (rank, Document,
+    chunk count) per passage, ranked by its best chunk; a passage keeps that chunk's metadata, with
+    offsets and pages widened to the whole passage.
+    """
+    passages = [(rank, doc, 1) for rank, doc in enumerate(docs)]
+    merged = True
+    while merged:
+        merged = False
+        for i, (rank, first, count) in enumerate(passages):
+            for j, (other_rank, second, other_count) in enumerate(passages):
+                text = join_passages(first, second) if i != j else None
+                if text is None:
+                    continue
+                best = first if rank <= other_rank else second
+                metadata = dict(best.metadata)
+                if _offsets(first) and _offsets(second) and _join_by_offsets(first, second) is not None:
+                    metadata["start_offset"] = first.metadata["start_offset"]
+                    metadata["end_offset"] = max(first.metadata["end_offset"], second.metadata["end_offset"])
+                else:
+                    # Joined by text, so the offsets would not describe the passage
+                    metadata.pop("start_offset", None)
+                    metadata.pop("end_offset", None)
+                if "page" in first.metadata and "page" in second.metadata:
+                    metadata["page"] = min(first.metadata["page"], second.metadata["page"])
+                    metadata["page_end"] = max(first.metadata.get("page_end", first.metadata["page"]),
+                                               second.metadata.get("page_end", second.metadata["page"]))
+                passages[i] = (min(rank, other_rank), Document(id=best.id, page_content=text, metadata=metadata),
+                               count + other_count)
+                del passages[j]
+                merged = True
+                break
+            if merged:
+                break
+    return sorted(passages, key=lambda passage: passage[0])
+
+
+def _shingles(text: str):
+    words = text.casefold().split()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+
+
+def drop_near_duplicates(passages, threshold: float):
+    """Drop passages whose word shingles are mostly (>= threshold) contained in a better-ranked passage."""
+    kept, kept_shingles = [], []
+    for passage in passages:
+        shingles = _shingles(passage[1].page_content)
+        if any(len(shingles & other) >= threshold * len(shingles) for other in kept_shingles):
+            continue
+        kept.append(passage)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def pack_documents(docs, token_budget: int = None, dedup_threshold: float = None, document_prompt=None,
+                   separator: str = "\n\n"):
+    """
+    Pack retrieved chunks for the prompt: merge overlapping or adjacent chunks of the same source, drop
+    near-duplicate passages, then keep passages in rank order while their formatted text fits in
+    `token_budget` tokens (0 for no budget). A first passage larger than the budget is cut to fit.
+    Returns (passages, stats).
+    """
+    token_budget = config.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    dedup_threshold = config.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+
+    def formatted(doc):
+        return format_document(doc, document_prompt) if document_prompt is not None else doc.page_content
+
+    separator_tokens = count_tokens(separator)
+    retrieved_tokens = sum(count_tokens(formatted(doc)) for doc in docs) + separator_tokens * max(len(docs) - 1, 0)
+    merged = merge_passages(docs)
+    passages = drop_near_duplicates(merged, dedup_threshold)
+
+    packed, used, truncated = [], 0, False
+    for _, doc, _ in passages:
+        tokens = count_tokens(formatted(doc)) + (separator_tokens if packed else 0)
+        if token_budget and used + tokens > token_budget:
+            if packed:
+                continue
+            # Nothing fits yet: keep the start of the best passage, cut at a word boundary
+            keep_chars = int(len(doc.page_content) * token_budget / tokens)
+            doc = Document(id=doc.id, page_content=doc.page_content[:keep_chars].rsplit(" ", 1)[0],
+                           metadata=dict(doc.metadata, truncated=True))
+            tokens = count_tokens(formatted(doc))
+            truncated = True
+        packed.append(doc)
+        used += tokens
+
+    stats = {"retrieved_chunks": len(docs), "passages": len(packed),
+             "merged_chunks": len(docs) - len(merged), "near_duplicates": len(merged) - len(passages),
+             "over_budget": len(passages) - len(packed), "truncated": truncated,
+             "retrieved_context_tokens": retrieved_tokens, "context_tokens": used}
+    return packed, stats
+
+
+class PackedStuffDocumentsChain(StuffDocumentsChain):
+    """
+    The "stuff" chain with a context assembly step: retrieved chunks are packed (pack_documents) before
+    they are formatted into the prompt, when `packing` is on. The prompt's token count and the packing
+    stats are recorded for collect_context_stats and the rag_context_tokens metric.
+    """
+
+    packing: bool = True
+    token_budget: int = 0
+    dedup_threshold: float = 0.8
+
+    def build_inputs(self, docs, **kwargs):
+        """Prompt inputs for `docs` and the packing stats, including the prompt's token count."""
+        if self.packing:
+            docs, stats = pack_documents(docs, self.token_budget, self.dedup_threshold,
+                                         self.document_prompt, self.document_separator)
+        else:
+            stats = {"retrieved_chunks": len(docs), "passages": len(docs)}
+        inputs = super()._get_inputs(docs, **kwargs)
+        stats["prompt_tokens"] = count_tokens(self.llm_chain.prompt.format(**inputs))
+        observe_context_tokens(stats)
+        return inputs, stats
+
+    def _get_inputs(self, docs, **kwargs):
+        inputs, stats = self.build_inputs(docs, **kwargs)
+        collected = _context_stats.get()
+        if collected is not None:
+            collected.update(stats)
+        logger.debug(f"Context packing: {stats}")
+        return inputs
+
+    def settings(self):
+        """What changes the context of a prompt; part of the answer cache version."""
+        return f"packing={self.packing}:budget={self.token_budget}:dedup={self.dedup_threshold}"
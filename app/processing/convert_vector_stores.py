@@ -0,0 +1,59 @@
+import os
+import pickle
+import argparse
+from types import SimpleNamespace
+
+import faiss
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.processing.compact_vector_store import save_compact_vector_store, is_compact_vector_store, load_compact_vector_store
+
+config = Config()
+logger = configure_logging("CONVERT_VECTOR_STORES")
+
+
+# Convert a LangChain save_local directory (index.faiss + pickled index.pkl) to the compact format in place
+def convert_vector_store(saved_vector_store_path: str, remove_pickle: bool = False):
+    pickle_path = os.path.join(saved_vector_store_path, "index.pkl")
+    if is_compact_vector_store(saved_vector_store_path):
+        logger.info(f"Already compact: {saved_vector_store_path}")
+    else:
+        if not os.path.exists(pickle_path):
+            raise FileNotFoundError(f"No index.pkl found in: {saved_vector_store_path}")
+        # Only convert stores this application wrote; unpickling runs arbitrary code
+        with open(pickle_path, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        index = faiss.read_index(os.path.join(saved_vector_store_path, "index.faiss"))
+        save_compact_vector_store(SimpleNamespace(index=index, docstore=docstore,
+                                                  index_to_docstore_id=index_to_docstore_id),
+                                  saved_vector_store_path)
+
+        converted = load_compact_vector_store(saved_vector_store_path, embeddings=None)
+        if len(converted.index_to_docstore_id) != len(index_to_docstore_id):
+            raise ValueError(f"Converted store has {len(converted.index_to_docstore_id)} rows, "
+                             f"expected {len(index_to_docstore_id)}")
+        logger.info(f"Converted {saved_vector_store_path} ({len(index_to_docstore_id)} chunks)")
+
+    if remove_pickle and os.path.exists(pickle_path):
+        os.remove(pickle_path)
+        logger.info(f"Removed {pickle_path}")
+
+
+def convert_all_vector_stores(vector_store_dir: str, remove_pickle: bool = False):
+    for name in sorted(os.listdir(vector_store_dir)):
+        path = os.path.join(vector_store_dir, name)
+        if os.path.isdir(path) and name.startswith("faiss_index"):
+            try:
+                convert_vector_store(path, remove_pickle=remove_pickle)
+            except Exception as e:
+                logger.error(f"Failed to convert {path}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert pickled FAISS vector stores to the compact format")
+    parser.add_argument("--dir", default=config.VECTOR_STORE_DIR)
+    parser.add_argument("--remove-pickle", action="store_true", help="Delete index.pkl after converting")
+    args = parser.parse_args()
+
+    convert_all_vector_stores(args.dir, remove_pickle=args.remove_pickle)
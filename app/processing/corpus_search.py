@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import track_stage
+from app.core.document_catalog import list_document_stores
+from app.processing.generate_embeddings import get_embeddings
+
+config = Config()
+logger = configure_logging("CORPUS_SEARCH")
+
+# FAISS releases the GIL during search, so shards are searched in parallel threads
+shard_search_executor = ThreadPoolExecutor(max_workers=config.CORPUS_SEARCH_WORKERS,
+                                           thread_name_prefix="corpus-search")
+
+
+def search_shards(query_vector, document_ids, get_vector_store, k: int):
+    """
+    Search each document's vector store with one precomputed query vector and merge the
+    per-shard top-k into a global top-k by L2 distance.
+    """
+    def search_one(document_id):
+        vector_store = get_vector_store(document_id)
+        results = vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+        return [(document_id, doc, score) for doc, score in results]
+
+    merged = []
+    for shard_results in shard_search_executor.map(search_one, document_ids):
+        merged.extend(shard_results)
+    merged.sort(key=lambda result: result[2])
+    return merged[:k]
+
+
+# Retriever over several documents' stores; `document_ids=None` searches every catalogued document
+class CorpusRetriever(BaseRetriever):
+    get_vector_store: Callable[[str], Any]
+    document_ids: Optional[List[str]] = None
+    k: int = 5
+
+    def resolve_document_ids(self):
+        if self.document_ids is not None:
+            return list(self.document_ids)
+        return [document["document_id"] for document in list_document_stores()]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        document_ids = self.resolve_document_ids()
+        if not document_ids:
+            return []
+        # The query is embedded once, whatever the number of shards
+        query_vector = get_embeddings().embed_query(query)
+        with track_stage("corpus_search"):
+            results = search_shards(query_vector, document_ids, self.get_vector_store, self.k)
+        documents = []
+        for document_id, doc, score in results:
+            documents.append(Document(page_content=doc.page_content,
+                                      metadata={**doc.metadata, "document_id": document_id, "score": float(score)}))
+        return documents
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from filelock import FileLock
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("EMBEDDING_CACHE")
+
+KEY_SIZE = 16  # bytes of the blake2b digest stored per row
+# Keys per `IN (...)` query, under SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+KEYS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (key BLOB PRIMARY KEY, row INTEGER NOT NULL) WITHOUT ROWID;
+"""
+
+
+def normalize_chunk_text(text: str):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def chunk_cache_key(model_name: str, text: str):
+    return hashlib.blake2b(f"{model_name}\0{normalize_chunk_text(text)}".encode("utf-8"),
+                           digest_size=KEY_SIZE).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of chunk embeddings for one embedding model.
+
+    vectors.f32 holds float32 rows (memory-mapped on read) and keys.sqlite maps each 16-byte content
+    hash to its row, so lookups read the keys they need from disk instead of holding every key in
+    memory. Rows are appended under a file lock, vectors before keys, so a key is only visible once
+    its vector is on disk.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.keys_path = os.path.join(self.directory, "keys.sqlite")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.lock = FileLock(os.path.join(self.directory, ".lock"))
+        self.dim = self._read_dim()
+        self._local = threading.local()
+        self._import_legacy_keys()
+
+    def _read_dim(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)["dim"]
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Ingestion workers of other processes append to the same cache; wait on their writes
+            connection = sqlite3.connect(self.keys_path, timeout=30, check_same_thread=False)
+            connection.executescript(KEYS_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _import_legacy_keys(self):
+        # Caches written before keys.sqlite kept the keys in keys.bin, one per row
+        legacy_path = os.path.join(self.directory, "keys.bin")
+        if not os.path.exists(legacy_path):
+            return
+        with self.lock:
+            if not os.path.exists(legacy_path):
+                return
+            with open(legacy_path, "rb") as f:
+                data = f.read()
+            with self._connection() as db:
+                db.executemany("INSERT OR IGNORE INTO keys (key, row) VALUES (?, ?)",
+                               ((data[i * KEY_SIZE:(i + 1) * KEY_SIZE], i) for i in range(len(data) // KEY_SIZE)))
+            os.remove(legacy_path)
+
+    def _find_rows(self, keys):
+        unique_keys = list(dict.fromkeys(keys))
+        rows = {}
+        db = self._connection()
+        for start in range(0, len(unique_keys), LOOKUP_BATCH_SIZE):
+            batch = unique_keys[start:start + LOOKUP_BATCH_SIZE]
+            rows.update(db.execute(f"SELECT key, row FROM keys WHERE key IN ({', '.join('?' * len(batch))})", batch))
+        return rows
+
+    def lookup(self, texts):
+        """Return a list with the cached vector for each text, or None on a miss."""
+        keys = [chunk_cache_key(self.model_name, text) for text in texts]
+        found = self._find_rows(keys)
+        results = [None] * len(texts)
+        if not found:
+            return results
+        if self.dim is None:
+            self.dim = self._read_dim()
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                            shape=(os.path.getsize(self.vectors_path) // (self.dim * 4), self.dim))
+        for i, key in enumerate(keys):
+            row = found.get(key)
+            if row is not None:
+                results[i] = vectors[row].tolist()
+        return results
+
+    def add(self, texts, vectors):
+        if not texts:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.dim is None:
+                self.dim = self._read_dim() or int(array.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+            if array.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match cache dimension {self.dim}")
+
+            keys = [chunk_cache_key(self.model_name, text) for text in texts]
+            cached = self._find_rows(keys)
+            new_vectors = {}
+            for key, vector in zip(keys, array):
+                if key not in cached:
+                    new_vectors.setdefault(key, vector)
+            if not new_vectors:
+                return
+
+            db = self._connection()
+            row_count = db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM keys").fetchone()[0]
+            # Drop vectors left behind by an append that never wrote its keys
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(row_count * self.dim * 4)
+                f.write(np.stack(list(new_vectors.values())).astype(np.float32).tobytes())
+            with db:
+                db.executemany("INSERT INTO keys (key, row) VALUES (?, ?)",
+                               ((key, row_count + i) for i, key in enumerate(new_vectors)))
+
+    def stats(self):
+        return {"model_name": self.model_name,
+                "entries": self._connection().execute("SELECT COUNT(*) FROM keys").fetchone()[0],
+                "dim": self.dim if self.dim is not None else self._read_dim(),
+                "bytes": os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0}
+
+
+_caches = {}
+
+
+def get_embedding_cache(model_name: str = None):
+    if model_name is None:
+        # Vectors of the offline hashing embeddings or of an int8 model must never be served for the
+        # full-precision model; the fp32 ONNX export matches PyTorch and shares its vectors
+        if config.EMBEDDING_PROVIDER == "hashing":
+            model_name = f"hashing-{config.HASHING_EMBEDDING_DIM}"
+        elif config.EMBEDDING_PROVIDER == "onnx" and config.EMBEDDING_ONNX_QUANTIZATION:
+            model_name = f"{config.HUGGINGFACE_EMBEDDING_MODEL}:qint8-{config.EMBEDDING_ONNX_QUANTIZATION}"
+        else:
+            model_name = config.HUGGINGFACE_EMBEDDING_MODEL
+    if model_name not in _caches:
+        _caches[model_name] = EmbeddingCache(config.EMBEDDING_CACHE_DIR, model_name)
+    return _caches[model_name]
+
+
+def embed_texts_with_cache(texts, embeddings, batch_size: int = 64, on_progress=None):
+    """
+    Embed texts, reusing cached vectors and encoding only the misses. Returns the vectors in input
+    order and a stats dict with hit rate and the bytes of embeddings read from the cache instead of computed.
+    """
+    cache = get_embedding_cache()
+    vectors = cache.lookup(texts)
+    miss_indices = [i for i, vector in enumerate(vectors) if vector is None]
+    hits = len(texts) - len(miss_indices)
+    if on_progress is not None:
+        on_progress(hits, len(texts))
+
+    for start in range(0, len(miss_indices), batch_size):
+        batch = miss_indices[start:start + batch_size]
+        batch_texts = [texts[i] for i in batch]
+        batch_vectors = embeddings.embed_documents(batch_texts)
+        cache.add(batch_texts, batch_vectors)
+        for i, vector in zip(batch, batch_vectors):
+            vectors[i] = vector
+        if on_progress is not None:
+            on_progress(hits + start + len(batch), len(texts))
+
+    stats = {
+        "chunks": len(texts),
+        "cache_hits": hits,
+        "cache_misses": len(miss_indices),
+        "hit_rate": round(hits / len(texts), 4) if texts else 0.0,
+        "bytes_saved": hits * (cache.dim or 0) * np.dtype(np.float32).itemsize,
+    }
+    logger.debug(f"Embedding cache: {stats}")
+    return vectors, stats
@@ -4,6 +4,7 @@ from app.core.logger import configure_logging
 from app.processing.generate_vector_db import load_vector_store
 from app.processing.generate_rag_chain import create_rag_chain
 from app.processing.generate_embeddings import get_embeddings
+from app.processing.single_query_inference import answer_from_documents
 
 logger = configure_logging("EVALUATE_RAG")
 
@@ -11,15 +12,13 @@ logger = configure_logging("EVALUATE_RAG")
 def evaluate_rag_with_reference(query: str, expected_answer: str, rag_chain, embeddings):
     try:
         logger.info(f"Evaluating query: {query}")
-        # retrieved_docs = rag_chain.retriever.invoke(query)
-        result = rag_chain.invoke({"query": query})
-        answer = result.get("result", "").strip()
-
+        # Retrieve once and answer from the same documents that are reported as context
         retrieved_docs = rag_chain.retriever.invoke(query)
+        answer = answer_from_documents(rag_chain, retrieved_docs, query)
         context = [f"[Doc {i+1}]: {doc.page_content[:500]}" for i, doc in enumerate(retrieved_docs)]
 
-        answer_embedding = embeddings.embed_query(answer if answer else "Information not found in the document.")
-        expected_embedding = embeddings.embed_query(expected_answer)
+        answer_embedding, expected_embedding = embeddings.embed_documents(
+            [answer if answer else "Information not found in the document.", expected_answer])
         sim = np.dot(answer_embedding, expected_embedding) / (
             np.linalg.norm(answer_embedding) * np.linalg.norm(expected_embedding)
         )
@@ -0,0 +1,166 @@
+import os
+import json
+import math
+import faiss
+import numpy as np
+
+from app.core.logger import configure_logging
+
+logger = configure_logging("FAISS_INDEX_FACTORY")
+
+INDEX_TYPES = ["flat", "ivf_flat", "hnsw", "ivf_pq", "sq8"]
+INDEX_PARAMS_FILE = "index_params.json"
+
+
+# Pick an index type from corpus size: exact search while it is cheap, graph/IVF as the corpus grows
+def auto_select_index_type(n_vectors: int):
+    if n_vectors < 20_000:
+        return "flat"
+    if n_vectors < 200_000:
+        return "hnsw"
+    if n_vectors < 1_000_000:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def default_build_params(index_type: str, n_vectors: int, dim: int):
+    nlist = int(min(65536, max(1, 4 * math.sqrt(n_vectors))))
+    # IVF training wants roughly 39 vectors per centroid
+    nlist = max(1, min(nlist, n_vectors // 39))
+    if index_type == "ivf_flat":
+        return {"nlist": nlist, "nprobe": max(1, min(nlist, 16))}
+    if index_type == "hnsw":
+        return {"M": 32, "ef_construction": 80, "ef_search": 128}
+    if index_type == "ivf_pq":
+        # Largest sub-quantizer count (at most 64, at least 4 dims each) that divides the dimension
+        m = next(m for m in range(max(1, min(64, dim // 4)), 0, -1) if dim % m == 0)
+        return {"nlist": nlist, "m": m, "nbits": 8, "nprobe": max(1, min(nlist, 16))}
+    return {}
+
+
+def build_faiss_index(vectors, index_type: str = "auto", params: dict = None):
+    """
+    Build an L2 FAISS index of the requested type over `vectors` (row i gets id i).
+    Returns the index and the effective build parameters, including index_type.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    if index_type in (None, "", "auto"):
+        index_type = auto_select_index_type(n_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}'. Available: {INDEX_TYPES + ['auto']}")
+
+    build_params = default_build_params(index_type, n_vectors, dim)
+    build_params.update({k: v for k, v in (params or {}).items() if v is not None})
+
+    # Quantizers need enough training vectors; small corpora fall back to exact search
+    min_training = {"ivf_flat": build_params.get("nlist", 1),
+                    "ivf_pq": max(build_params.get("nlist", 1), 2 ** build_params.get("nbits", 8)),
+                    "sq8": 1}.get(index_type, 0)
+    if n_vectors < min_training:
+        logger.warning(f"{n_vectors} vectors are too few to train '{index_type}', using 'flat'")
+        index_type, build_params = "flat", {}
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, build_params["M"])
+        index.hnsw.efConstruction = build_params["ef_construction"]
+        index.hnsw.efSearch = build_params["ef_search"]
+    elif index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, build_params["nlist"])
+        index.nprobe = build_params["nprobe"]
+    elif index_type == "ivf_pq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, build_params["nlist"],
+                                 build_params["m"], build_params["nbits"])
+        index.nprobe = build_params["nprobe"]
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    build_params["index_type"] = index_type
+    logger.info(f"Built FAISS '{index_type}' index over {n_vectors} vectors with {build_params}")
+    return index, build_params
+
+
+def save_index_params(saved_vector_store_path: str, build_params: dict):
+    with open(os.path.join(saved_vector_store_path, INDEX_PARAMS_FILE), "w", encoding="utf-8") as f:
+        json.dump(build_params, f, indent=2)
+
+
+def load_index_params(saved_vector_store_path: str):
+    path = os.path.join(saved_vector_store_path, INDEX_PARAMS_FILE)
+    if not os.path.exists(path):
+        # Stores built before index types were configurable are flat
+        return {"index_type": "flat"}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Set the default search-time knobs on a loaded index
+def apply_default_search_params(index, nprobe: int = None, ef_search: int = None):
+    ivf_index = faiss.try_extract_index_ivf(index)
+    if nprobe is not None and ivf_index is not None:
+        ivf_index.nprobe = nprobe
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def make_search_parameters(index, nprobe: int = None, ef_search: int = None, excluded_rows=None):
+    """
+    Per-query FAISS search parameters, or None when nothing differs from the index defaults.
+    `excluded_rows` (tombstoned rows) are filtered out of the results by an ID selector.
+    """
+    kwargs = {}
+    if excluded_rows is not None and len(excluded_rows):
+        kwargs["sel"] = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.asarray(excluded_rows, dtype=np.int64)))
+    ivf_index = faiss.try_extract_index_ivf(index)
+    if ivf_index is not None and (nprobe is not None or kwargs):
+        # Unset knobs keep the index's own value; SearchParameters would otherwise reset them
+        return faiss.SearchParametersIVF(nprobe=nprobe or ivf_index.nprobe, **kwargs)
+    if hasattr(index, "hnsw") and (ef_search is not None or kwargs):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or index.hnsw.efSearch, **kwargs)
+    if kwargs:
+        return faiss.SearchParameters(**kwargs)
+    return None
+
+
+# Thin proxy that passes per-query search parameters to FAISS without mutating the shared index
+class ParameterizedIndex:
+    def __init__(self, index, search_parameters, excluded_rows=None):
+        self._index = index
+        self._search_parameters = search_parameters
+        self.excluded_rows = excluded_rows
+
+    def search(self, x, k):
+        return self._index.search(x, k, params=self._search_parameters)
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+
+# Hide tombstoned rows of an incrementally updated store from every search
+def exclude_rows(vector_store, excluded_rows):
+    search_parameters = make_search_parameters(vector_store.index, excluded_rows=excluded_rows)
+    if search_parameters is not None:
+        vector_store.index = ParameterizedIndex(vector_store.index, search_parameters, excluded_rows)
+    return vector_store
+
+
+def with_search_params(vector_store, nprobe: int = None, ef_search: int = None):
+    """
+    Return a shallow copy of a LangChain FAISS store whose searches use the given nprobe/efSearch.
+    The docstore and index data are shared with the original store.
+    """
+    index, excluded_rows = vector_store.index, None
+    if isinstance(index, ParameterizedIndex):
+        index, excluded_rows = index._index, index.excluded_rows
+    if make_search_parameters(index, nprobe=nprobe, ef_search=ef_search) is None:
+        return vector_store
+    search_parameters = make_search_parameters(index, nprobe=nprobe, ef_search=ef_search, excluded_rows=excluded_rows)
+    tuned_store = vector_store.__class__.__new__(vector_store.__class__)
+    tuned_store.__dict__.update(vector_store.__dict__)
+    tuned_store.index = ParameterizedIndex(index, search_parameters, excluded_rows)
+    return tuned_store
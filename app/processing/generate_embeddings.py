@@ -1,26 +1,123 @@
-
-from langchain_huggingface import HuggingFaceEmbeddings
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
 
 from app.config.configuration import Config
 from app.core.logger import configure_logging
+from app.core.metrics import track_stage
+from app.core.readiness import readiness
 
 config=Config()
 logger = configure_logging("GENERATE_EMBEDDINGS")
 
-# Initialize HuggingFace embeddings for Bengali
+_shared_embeddings = None
+_shared_embeddings_lock = threading.Lock()
+
+# Coalesces concurrent embed_query calls into one batched forward pass of the wrapped model
+class BatchedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, max_batch_size: int, max_wait_ms: float):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.batches = 0
+        self.batched_queries = 0
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        with track_stage("embed_query"):
+            if self.max_batch_size <= 1 or self.max_wait <= 0:
+                return self.embeddings.embed_query(text)
+            self._ensure_worker()
+            future = Future()
+            self._pending.put((text, future))
+            return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            # Collect whatever else arrives within the wait window, up to the batch size
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._embed_batch(batch)
+
+    def _embed_batch(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            logger.error(f"Batched embedding error: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_queries += len(batch)
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+# Shared HuggingFace embeddings for Bengali (EMBEDDING_PROVIDER=onnx runs the same model with ONNX Runtime,
+# =hashing gives the offline stand-in); the model is loaded once per process
 def get_embeddings():
-    return HuggingFaceEmbeddings(
-        model_name=config.HUGGINGFACE_EMBEDDING_MODEL,
-        encode_kwargs={'normalize_embeddings': True}
-    )
+    global _shared_embeddings
+    if _shared_embeddings is None:
+        with _shared_embeddings_lock:
+            if _shared_embeddings is None:
+                if config.EMBEDDING_PROVIDER == "hashing":
+                    from app.benchmarks.fake_embeddings import HashingEmbeddings
+                    logger.info(f"Using hashing embeddings ({config.HASHING_EMBEDDING_DIM} dims)")
+                    model = HashingEmbeddings(dim=config.HASHING_EMBEDDING_DIM)
+                elif config.EMBEDDING_PROVIDER == "onnx":
+                    from app.processing.onnx_embeddings import create_onnx_embeddings
+                    model = create_onnx_embeddings(config.HUGGINGFACE_EMBEDDING_MODEL,
+                                                   quantization=config.EMBEDDING_ONNX_QUANTIZATION,
+                                                   intra_op_threads=config.EMBEDDING_ONNX_INTRA_OP_THREADS,
+                                                   inter_op_threads=config.EMBEDDING_ONNX_INTER_OP_THREADS)
+                else:
+                    # Imported here: sentence-transformers pulls in torch, which dominates import time
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    logger.info(f"Loading embedding model: {config.HUGGINGFACE_EMBEDDING_MODEL}")
+                    model = HuggingFaceEmbeddings(
+                        model_name=config.HUGGINGFACE_EMBEDDING_MODEL,
+                        encode_kwargs={'normalize_embeddings': True}
+                    )
+                _shared_embeddings = BatchedEmbeddings(model,
+                                                       max_batch_size=config.EMBEDDING_BATCH_MAX_SIZE,
+                                                       max_wait_ms=config.EMBEDDING_BATCH_MAX_WAIT_MS)
+                readiness.mark_ready("embeddings")
+    return _shared_embeddings
 
-# HuggingFace embeddings for Bengali
+# Micro-batching counters; zeros until the model is loaded, so reading them never loads it
+def get_embedding_batcher_stats():
+    embeddings = _shared_embeddings
+    if embeddings is None:
+        return {"batches": 0, "batched_queries": 0}
+    return {"batches": embeddings.batches, "batched_queries": embeddings.batched_queries}
+
+# HuggingFace embeddings for Bengali, warmed up with a test query
 def initialize_embeddings():
     try:
-        embeddings = HuggingFaceEmbeddings(
-            model_name=config.HUGGINGFACE_EMBEDDING_MODEL,
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        embeddings = get_embeddings()
         _ = embeddings.embed_query("test")
         logger.info("HuggingFace embeddings initialized successfully")
         return embeddings
@@ -29,7 +126,7 @@ def initialize_embeddings():
         raise
 
 if __name__=='__main__':
-  
+
     embeddings = initialize_embeddings()
     embeddings = get_embeddings()
     logger.info(f"Sample embedding: {embeddings.embed_query('This is a test sentence.')}")
@@ -1,34 +1,61 @@
-from langchain_groq import ChatGroq
-from langchain.chains import RetrievalQA
+from langchain.chains import RetrievalQA, LLMChain
 from langchain.prompts import PromptTemplate
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 from app.config.configuration import Config
 from app.core.logger import configure_logging
+from app.core.metrics import get_metrics_callbacks
 from app.processing.generate_vector_db import load_vector_store
+from app.processing.faiss_index_factory import with_search_params
+from app.processing.hybrid_retriever import HybridRetriever
+from app.processing.reranker import RerankingRetriever, get_reranker
+from app.processing.context_packing import PackedStuffDocumentsChain
 
 config=Config()
 logger = configure_logging("GENERATE_RAG_CHAIN")
 
-# Initialize Groq LLM with rate limit handling
+# Initialize Groq LLM with rate limit handling (LLM_PROVIDER=fake gives the offline benchmark model)
 @retry(stop=stop_after_attempt(5), wait=wait_fixed(3))
 def initialize_llm():
     try:
+        if config.LLM_PROVIDER == "fake":
+            from app.benchmarks.fake_llm import FakeChatModel
+            logger.info("Initializing fake LLM")
+            return FakeChatModel(latency_ms=config.FAKE_LLM_LATENCY_MS,
+                                 tokens_per_second=config.FAKE_LLM_TOKENS_PER_SECOND,
+                                 output_tokens=config.FAKE_LLM_OUTPUT_TOKENS,
+                                 callbacks=get_metrics_callbacks())
         if not config.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment variables")
+        from langchain_groq import ChatGroq
         logger.info("Initializing Groq LLM")
         return ChatGroq(
             groq_api_key=config.GROQ_API_KEY,
             model_name=config.LLM_MODEL,
             temperature=0.7,
             max_tokens=512,
+            callbacks=get_metrics_callbacks(),
         )
     except Exception as e:
         logger.error(f"LLM init error: {e}")
         raise
 
-# Create RAG chain
-def create_rag_chain(vector_store):
+# Create RAG chain; with a lexical index (and RETRIEVAL_MODE=hybrid) retrieval fuses BM25 with vector search.
+# With RERANKER_ENABLED, RERANKER_FETCH_K candidates are retrieved and a cross-encoder keeps the best 5.
+def create_rag_chain(vector_store, lexical_index=None):
+    k = config.RERANKER_FETCH_K if config.RERANKER_ENABLED else 5
+    if lexical_index is not None and config.RETRIEVAL_MODE == "hybrid":
+        retriever = HybridRetriever(vectorstore=vector_store, lexical_index=lexical_index,
+                                    k=k, fetch_k=max(config.HYBRID_FETCH_K, k), rrf_k=config.HYBRID_RRF_K)
+    else:
+        retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": k})
+    if config.RERANKER_ENABLED:
+        retriever = RerankingRetriever(base_retriever=retriever, reranker=get_reranker(),
+                                       k=5, time_budget_ms=config.RERANKER_TIME_BUDGET_MS)
+    return create_rag_chain_with_retriever(retriever)
+
+# Create RAG chain over any retriever (a single vector store or the document corpus)
+def create_rag_chain_with_retriever(retriever):
     try:
         logger.info("Creating RAG chain")
         llm = initialize_llm()
@@ -49,18 +76,39 @@ def create_rag_chain(vector_store):
             template=prompt_template,
             input_variables=["context", "question"]
         )
-        chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5}),
-            chain_type_kwargs={"prompt": PROMPT}
+        # "stuff" chain whose retrieved chunks are packed into CONTEXT_TOKEN_BUDGET first
+        combine_documents_chain = PackedStuffDocumentsChain(
+            llm_chain=LLMChain(llm=llm, prompt=PROMPT),
+            document_variable_name="context",
+            packing=config.CONTEXT_PACKING_ENABLED,
+            token_budget=config.CONTEXT_TOKEN_BUDGET,
+            dedup_threshold=config.CONTEXT_DEDUP_THRESHOLD,
         )
+        chain = RetrievalQA(combine_documents_chain=combine_documents_chain, retriever=retriever)
         logger.info("RAG chain created successfully")
         return chain
     except Exception as e:
         logger.error(f"RAG chain error: {e}")
         raise
 
+# Same chain, but its retriever searches with per-query FAISS knobs (IVF nprobe / HNSW efSearch)
+def tune_rag_chain_search(rag_chain, nprobe: int = None, ef_search: int = None):
+    tuned_retriever = tune_retriever_search(rag_chain.retriever, nprobe=nprobe, ef_search=ef_search)
+    if tuned_retriever is rag_chain.retriever:
+        return rag_chain
+    return rag_chain.model_copy(update={"retriever": tuned_retriever})
+
+def tune_retriever_search(retriever, nprobe: int = None, ef_search: int = None):
+    if isinstance(retriever, RerankingRetriever):
+        tuned_base = tune_retriever_search(retriever.base_retriever, nprobe=nprobe, ef_search=ef_search)
+        if tuned_base is retriever.base_retriever:
+            return retriever
+        return retriever.model_copy(update={"base_retriever": tuned_base})
+    tuned_store = with_search_params(retriever.vectorstore, nprobe=nprobe, ef_search=ef_search)
+    if tuned_store is retriever.vectorstore:
+        return retriever
+    return retriever.model_copy(update={"vectorstore": tuned_store})
+
 if __name__=='__main__':
   
     pdf_path = "app/data/pdfs/CV.pdf"
@@ -1,55 +1,160 @@
 import os
 import re
+import logging
+import bisect
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from app.config.configuration import Config
 from app.core.logger import configure_logging
-from app.processing.pdf_to_text import pdf2text_pdfplumber
+from app.processing.pdf_extraction_engine import ExtractedPage, iter_pdf_pages, pdf2text_parallel
 
 config=Config()
 logger = configure_logging("GENERATE_TEXT_CHUNKS")
 
+# Separates pages in the text cache, so cached text keeps its page numbers
+PAGE_BREAK = "\f"
+
+# Extract text from PDF with pdf2text, with caching
+def extract_text_from_pdf(pdf_path: str, cache_path: str):
+    # Check if text file exists
+    if os.path.exists(cache_path):
+        logger.info(f"Loading text from: {cache_path}")
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    logger.info(f"Extracting text from PDF: {pdf_path}")
+    # Extract text page by page across worker processes; pages are streamed to the txt file
+    text = pdf2text_parallel(pdf_path, cache_path)
+    if not text or not text.strip():
+        # Do not leave an empty cache behind for the next attempt
+        os.remove(cache_path)
+        raise ValueError("No text extracted from PDF with pdf2text")
+    logger.debug("Extracted text sample: %s", text[:500])
+    logger.info(f"Saved extracted text to: {cache_path}")
+    return text
+
+# Yield the PDF's pages, from the text cache when present. Extracted pages are written to the cache as
+# they stream past; the cache is only moved into place once the whole PDF is extracted. `extract_stats`
+# receives the per-route page counts of iter_pdf_pages (left empty on a cache hit).
+def iter_text_pages(pdf_path: str, cache_path: str, extract_stats: dict = None):
+    if os.path.exists(cache_path):
+        logger.info(f"Loading text from: {cache_path}")
+        yield from read_cached_pages(cache_path)
+        return
+
+    logger.info(f"Extracting text from PDF: {pdf_path}")
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    has_text = False
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for page in iter_pdf_pages(pdf_path, stats=extract_stats):
+                f.write(page.text + PAGE_BREAK)
+                has_text = has_text or bool(page.text.strip())
+                yield page
+        if not has_text:
+            raise ValueError("No text extracted from PDF with pdf2text")
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Saved extracted text to: {cache_path}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Pages of a text cache, read line by line; caches written before page breaks were recorded are one page
+def read_cached_pages(cache_path: str):
+    page_number, lines = 1, []
+    with open(cache_path, "r", encoding="utf-8") as f:
+        for line in f:
+            *page_ends, line = line.split(PAGE_BREAK)
+            for page_end in page_ends:
+                yield ExtractedPage(page_number, "".join(lines) + page_end, "cache")
+                page_number, lines = page_number + 1, []
+            lines.append(line)
+    if "".join(lines).strip():
+        yield ExtractedPage(page_number, "".join(lines), "cache")
+
+def clean_text(text: str):
+    cleaned_text = re.sub(r'\s+', ' ', text).strip()
+    return cleaned_text.encode('utf-8', errors='replace').decode('utf-8')
+
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        length_function=len,
+        separators=["\n\n", "\n", "।", " ", ""],
+    )
+
+# Clean extracted text and split it into chunks
+def split_text_into_chunks(text: str, source: str):
+    # Create a single Document object
+    data = [Document(page_content=clean_text(text), metadata={"source": source})]
+
+    # Split into chunks
+    chunks = get_text_splitter().split_documents(data)
+    logger.info(f"Created {len(chunks)} chunks")
+    # One line per chunk: skipped entirely unless DEBUG is on, and sampled by the logger when it is
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, chunk in enumerate(chunks):
+            logger.debug("Chunk %d: %s", i + 1, chunk.page_content[:200])
+    return chunks
+
+# (piece, start offset in text) for each piece the splitter cuts `text` into
+def locate_pieces(splitter, text: str):
+    pieces, search_from = [], 0
+    for piece in splitter.split_text(text):
+        start = text.find(piece, search_from)
+        pieces.append((piece, start))
+        search_from = start + 1
+    return pieces
+
+def iter_page_chunks(pages, source: str, splitter=None):
+    """
+    Clean and split a stream of pages into chunks, holding at most one page plus one chunk of text.
+    The unfinished last chunk of each page is split again with the next page, so chunks may span pages
+    as they do when the whole text is split. Each chunk records the pages it spans and its character
+    offsets in the cleaned text (pages joined by a space).
+    """
+    splitter = splitter or get_text_splitter()
+    buffer, buffer_offset = "", 0
+    # (offset, page number) of each page that starts in, or continues into, the buffer
+    page_starts = []
+
+    def make_chunk(piece, start):
+        offsets = [offset for offset, _ in page_starts]
+        page = page_starts[bisect.bisect_right(offsets, start) - 1][1]
+        page_end = page_starts[bisect.bisect_right(offsets, start + len(piece) - 1) - 1][1]
+        return Document(page_content=piece, metadata={"source": source, "page": page, "page_end": page_end,
+                                                      "start_offset": start, "end_offset": start + len(piece)})
+
+    for page in pages:
+        text = clean_text(page.text)
+        if not text:
+            continue
+        if buffer:
+            buffer += " "
+        page_starts.append((buffer_offset + len(buffer), page.page_number))
+        buffer += text
+        pieces = locate_pieces(splitter, buffer)
+        # The last piece may continue on the next page, so it is split again together with it
+        for piece, start in pieces[:-1]:
+            yield make_chunk(piece, buffer_offset + start)
+        carry_start = pieces[-1][1]
+        buffer, buffer_offset = buffer[carry_start:], buffer_offset + carry_start
+        while len(page_starts) > 1 and page_starts[1][0] <= buffer_offset:
+            page_starts.pop(0)
+
+    for piece, start in locate_pieces(splitter, buffer):
+        yield make_chunk(piece, buffer_offset + start)
+
 # Load and preprocess PDF with pdf2text, with caching
 def generate_text_chunks_from_pdf(pdf_path: str, cache_path: str):
     try:
-        # Check if text file exists
-        if os.path.exists(cache_path):
-            logger.info(f"Loading text from: {cache_path}")
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        else:
-            if not os.path.exists(pdf_path):
-                raise FileNotFoundError(f"PDF not found: {pdf_path}")
-
-            logger.info(f"Extracting text from PDF: {pdf_path}")
-            # Extract text using pdf2text
-            text = pdf2text_pdfplumber(pdf_path,cache_path)
-            if not text or not text.strip():
-                raise ValueError("No text extracted from PDF with pdf2text")
-            logger.info(f"Extracted text sample: {text[:500]}")
-            # Save extracted text to txt file
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(text)
-            logger.info(f"Saved extracted text to: {cache_path}")
-
-        # Clean the extracted text
-        cleaned_text = re.sub(r'\s+', ' ', text).strip()
-        cleaned_text = cleaned_text.encode('utf-8', errors='replace').decode('utf-8')
-        # Create a single Document object
-        data = [Document(page_content=cleaned_text, metadata={"source": pdf_path})]
-
-        # Split into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.CHUNK_SIZE,
-            chunk_overlap=config.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", "।", " ", ""],
-        )
-        chunks = text_splitter.split_documents(data)
+        chunks = list(iter_page_chunks(iter_text_pages(pdf_path, cache_path), pdf_path))
         logger.info(f"Created {len(chunks)} chunks")
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Chunk {i+1}: {chunk.page_content[:200]}")
         return chunks
     except Exception as e:
         logger.error(f"Error loading PDF or cache: {e}")
@@ -1,22 +1,60 @@
 import os
 import time
+import numpy as np
 from langchain_community.vectorstores import FAISS
 
 from app.config.configuration import Config
 from app.core.logger import configure_logging
 from app.processing.generate_embeddings import get_embeddings
+from app.processing.embedding_cache import embed_texts_with_cache
+from app.processing.compact_vector_store import save_compact_vector_store, load_compact_vector_store, is_compact_vector_store, read_tombstones
+from app.processing.faiss_index_factory import build_faiss_index, save_index_params, load_index_params, apply_default_search_params, exclude_rows
 from app.processing.generate_text_chunks import generate_text_chunks_from_pdf
+from app.processing.lexical_index import build_lexical_index
 
 config=Config()
 logger = configure_logging("GENERATE_VECTOR_DB")
 
+# Embed chunk texts in batches, reusing cached vectors; `on_progress(done, total)` is called after each batch
+def embed_chunks(docs, batch_size: int = 64, on_progress=None):
+    embeddings = get_embeddings()
+    texts = [doc.page_content for doc in docs]
+    vectors, stats = embed_texts_with_cache(texts, embeddings, batch_size=batch_size, on_progress=on_progress)
+    logger.info(f"Embedding cache: {stats}")
+    return vectors, stats
+
+# Save in the configured on-disk format: "compact" (mmap-able index + SQLite docstore) or "pickle" (LangChain save_local)
+def save_vector_store(vector_store, saved_vector_store_path):
+    if config.VECTOR_STORE_FORMAT == "pickle":
+        vector_store.save_local(saved_vector_store_path)
+    else:
+        save_compact_vector_store(vector_store, saved_vector_store_path)
+
+# Build a FAISS vector store from precomputed chunk embeddings and save it
+def build_vector_store_from_embeddings(docs, vectors, saved_vector_store_path, index_type: str = None, index_params: dict = None):
+    embeddings = get_embeddings()
+    vector_store = FAISS.from_embeddings(
+        text_embeddings=list(zip([doc.page_content for doc in docs], vectors)),
+        embedding=embeddings,
+        metadatas=[doc.metadata for doc in docs],
+    )
+    # Swap LangChain's exact flat index for the configured type; row order (and so docstore ids) is unchanged
+    index, build_params = build_faiss_index(np.asarray(vectors, dtype=np.float32),
+                                            index_type or config.FAISS_INDEX_TYPE, index_params)
+    vector_store.index = index
+    save_vector_store(vector_store, saved_vector_store_path)
+    save_index_params(saved_vector_store_path, build_params)
+    # BM25 index over the same chunks for hybrid retrieval; rows map to docstore ids in index order
+    doc_ids = [vector_store.index_to_docstore_id[row] for row in range(len(docs))]
+    build_lexical_index(docs, doc_ids).save(saved_vector_store_path)
+    return vector_store
+
 # Create FAISS vector store
 def create_vector_store(docs, saved_vector_store_path):
     try:
         logger.info("Creating FAISS vector store")
-        embeddings = get_embeddings()
-        vector_store = FAISS.from_documents(docs, embeddings)
-        vector_store.save_local(saved_vector_store_path)
+        vectors, _ = embed_chunks(docs)
+        vector_store = build_vector_store_from_embeddings(docs, vectors, saved_vector_store_path)
         logger.info("FAISS vector store created and saved")
         return vector_store
     except Exception as e:
@@ -28,7 +66,18 @@ def load_vector_store(saved_vector_store_path):
     if not os.path.exists(saved_vector_store_path):
         raise FileNotFoundError(f"FAISS index not found at: {saved_vector_store_path}")
     embeddings = get_embeddings()
-    return FAISS.load_local(saved_vector_store_path, embeddings, allow_dangerous_deserialization=True)
+    if is_compact_vector_store(saved_vector_store_path):
+        vector_store = load_compact_vector_store(saved_vector_store_path, embeddings)
+    else:
+        vector_store = FAISS.load_local(saved_vector_store_path, embeddings, allow_dangerous_deserialization=True)
+    build_params = load_index_params(saved_vector_store_path)
+    apply_default_search_params(vector_store.index,
+                                nprobe=config.FAISS_NPROBE or build_params.get("nprobe"),
+                                ef_search=config.FAISS_EF_SEARCH or build_params.get("ef_search"))
+    if is_compact_vector_store(saved_vector_store_path):
+        # Chunks deleted by incremental updates stay in the index until compaction
+        vector_store = exclude_rows(vector_store, read_tombstones(saved_vector_store_path))
+    return vector_store
 
 if __name__=='__main__':
   
@@ -0,0 +1,48 @@
+from typing import Any, List
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import track_stage
+
+config = Config()
+logger = configure_logging("HYBRID_RETRIEVER")
+
+
+def reciprocal_rank_fusion(rankings, rrf_k: int = 60):
+    """Fuse ranked id lists: score(id) = sum over rankings of 1 / (rrf_k + rank), rank starting at 1."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+# Dense FAISS search and BM25 over the same chunks, fused by reciprocal rank.
+# The field is named `vectorstore` like VectorStoreRetriever's, so tune_rag_chain_search works on both.
+class HybridRetriever(BaseRetriever):
+    vectorstore: Any
+    lexical_index: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        with track_stage("vector_search"):
+            dense_results = self.vectorstore.similarity_search_with_score(query, k=self.fetch_k)
+        return self.fuse(query, dense_results)
+
+    def fuse(self, query: str, dense_results) -> List[Document]:
+        """Fuse (doc, distance) vector search results, possibly from a batched search, with BM25 for `query`."""
+        dense_docs = {doc.id: doc for doc, _ in dense_results}
+        dense_ranking = [doc.id for doc, _ in dense_results]
+        with track_stage("lexical_search"):
+            lexical_ranking = [doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]
+
+        documents = []
+        for doc_id, score in reciprocal_rank_fusion([dense_ranking, lexical_ranking], self.rrf_k)[:self.k]:
+            doc = dense_docs.get(doc_id) or self.vectorstore.docstore.search(doc_id)
+            documents.append(Document(id=doc_id, page_content=doc.page_content,
+                                      metadata={**doc.metadata, "rrf_score": score}))
+        return documents
@@ -0,0 +1,199 @@
+import os
+import time
+import shutil
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging, log_context
+from app.core.document_catalog import register_document_store, get_vector_store_path
+from app.core.document_registry import register_document, unregister_document_id
+from app.core.job_store import load_job, save_job, claim_job, CREATE, REPLACE, RUNNING, COMPLETED, FAILED
+from app.processing.generate_text_chunks import iter_text_pages, iter_page_chunks
+from app.processing.generate_vector_db import embed_chunks, build_vector_store_from_embeddings
+from app.processing.faiss_index_factory import load_index_params
+from app.processing.vector_store_updates import diff_source_chunks, update_vector_store, list_sources
+from app.processing.streaming_ingestion import stream_pdf_to_vector_store
+
+config = Config()
+logger = configure_logging("INGESTION_PIPELINE")
+
+
+class StageTimer:
+    def __init__(self, job, stage):
+        self.job = job
+        self.stage = self.job["stages"][stage]
+        self.name = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.stage["status"] = RUNNING
+        self.stage["started_at"] = time.time()
+        save_job(self.job)
+        return self
+
+    def progress(self, done, total):
+        self.stage["done"] = done
+        self.stage["total"] = total
+        save_job(self.job)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stage["duration_s"] = round(time.perf_counter() - self.start, 3)
+        self.stage["status"] = FAILED if exc_type else COMPLETED
+        save_job(self.job)
+        logger.info(f"Job {self.job['job_id']} stage {self.name} {self.stage['status']} in {self.stage['duration_s']}s")
+        return False
+
+
+# New compact stores are built by the streaming pipeline, with all four stages running at once. Each
+# stage's throughput is reported in the job file, rewritten at most every PROGRESS_INTERVAL_S.
+PROGRESS_INTERVAL_S = 0.5
+
+
+def run_streaming_create(job: dict, paths: dict, source: str):
+    stages = job["stages"]
+    for stage in stages.values():
+        stage["status"] = RUNNING
+        stage["started_at"] = time.time()
+    save_job(job)
+    last_save = time.perf_counter()
+
+    def on_progress(report):
+        nonlocal last_save
+        for name, throughput in report.items():
+            stages[name]["done"] = throughput["items"]
+            stages[name]["throughput"] = throughput
+        if time.perf_counter() - last_save >= PROGRESS_INTERVAL_S:
+            save_job(job)
+            last_save = time.perf_counter()
+
+    # Build next to the final location and swap in, so readers never open a half-written index
+    tmp_path = f"{paths['vector_store']}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    # Shared with the extract thread, so the job file shows pages per route as they are extracted
+    stages["extract"]["routes"] = {}
+    try:
+        chunk_count, report, cache_stats, build_params = stream_pdf_to_vector_store(
+            paths["pdf"], paths["text"], source, tmp_path, on_progress=on_progress,
+            extract_stats=stages["extract"]["routes"])
+    except Exception:
+        for stage in stages.values():
+            if stage["status"] == RUNNING:
+                stage["status"] = FAILED
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    shutil.rmtree(paths["vector_store"], ignore_errors=True)
+    os.replace(tmp_path, paths["vector_store"])
+
+    for name, throughput in report.items():
+        stages[name].update(status=COMPLETED, duration_s=throughput["wall_s"], done=throughput["items"],
+                            total=throughput["items"], throughput=throughput)
+    stages["embed"]["cache"] = cache_stats
+    register_document_store(job["document_id"], paths["vector_store"], source_pdf=paths["pdf"],
+                            chunk_count=chunk_count, index_type=build_params.get("index_type"))
+
+
+# Extract -> chunk -> embed -> index for one queued job. Runs inside an ingestion worker process and
+# reports progress by rewriting the job file. "append" and "replace" jobs update an existing store;
+# a replace only embeds the chunks whose content changed. The job is claimed first, so a job dispatched
+# by two server processes runs once; returns None when it was not run here.
+def run_ingestion_job(job_id: str):
+    lock = claim_job(job_id)
+    if lock is None:
+        logger.info(f"Ingestion job {job_id} is owned by another process, not running it")
+        return None
+    try:
+        job = load_job(job_id)
+        if job is None:
+            raise FileNotFoundError(f"Ingestion job not found: {job_id}")
+        if job["status"] in (COMPLETED, FAILED):
+            # Finished by another process since it was dispatched here
+            return None
+        return run_claimed_job(job)
+    finally:
+        lock.release()
+
+
+def run_claimed_job(job: dict):
+    job_id = job["job_id"]
+    paths = job["paths"]
+    operation = job.get("operation", CREATE)
+    # Where the PDF ends up: a replacement is staged next to the source it replaces
+    source = paths.get("source", paths["pdf"])
+    job["status"] = RUNNING
+    job["owner_pid"] = os.getpid()
+    job["started_at"] = time.time()
+    job["error"] = None
+    save_job(job)
+    start = time.perf_counter()
+
+    # The worker's log records carry the job ID as their request ID
+    with log_context(job_id):
+        try:
+            if operation == CREATE and config.VECTOR_STORE_FORMAT == "compact":
+                run_streaming_create(job, paths, source)
+            else:
+                run_staged_job(job, paths, operation, source)
+            job["status"] = COMPLETED
+            logger.info(f"Ingestion job {job_id} ({operation}) completed for document {job['document_id']}")
+        except Exception as e:
+            job["status"] = FAILED
+            job["error"] = str(e)
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+        finally:
+            job["finished_at"] = time.time()
+            job["duration_s"] = round(time.perf_counter() - start, 3)
+            save_job(job)
+    return job["status"]
+
+
+# One stage after the other: pickle stores, and updates of existing stores, which need every chunk
+# of the source before diffing or writing
+def run_staged_job(job: dict, paths: dict, operation: str, source: str):
+    with StageTimer(job, "extract") as stage:
+        if operation == REPLACE and os.path.exists(paths["text"]):
+            # The cached text belongs to the PDF being replaced
+            os.remove(paths["text"])
+        stage.stage["routes"] = {}
+        pages = list(iter_text_pages(paths["pdf"], paths["text"], stage.stage["routes"]))
+        stage.progress(len(pages), len(pages))
+
+    removed_doc_ids = []
+    with StageTimer(job, "chunk") as stage:
+        chunks = list(iter_page_chunks(pages, source))
+        stage.progress(len(chunks), len(chunks))
+        if operation == REPLACE:
+            removed_doc_ids, chunks = diff_source_chunks(get_vector_store_path(job["document_id"]), source, chunks)
+            stage.stage["changed"] = {"removed": len(removed_doc_ids), "added": len(chunks)}
+
+    with StageTimer(job, "embed") as stage:
+        stage.progress(0, len(chunks))
+        vectors, cache_stats = embed_chunks(chunks, on_progress=stage.progress)
+        stage.stage["cache"] = cache_stats
+
+    with StageTimer(job, "index") as stage:
+        if operation == CREATE:
+            tmp_path = f"{paths['vector_store']}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            build_vector_store_from_embeddings(chunks, vectors, tmp_path)
+            shutil.rmtree(paths["vector_store"], ignore_errors=True)
+            os.replace(tmp_path, paths["vector_store"])
+            stage.progress(len(vectors), len(vectors))
+            register_document_store(job["document_id"], paths["vector_store"], source_pdf=paths["pdf"],
+                                    chunk_count=len(chunks),
+                                    index_type=load_index_params(paths["vector_store"]).get("index_type"))
+        else:
+            update = update_vector_store(job["document_id"], remove_doc_ids=removed_doc_ids,
+                                         docs=chunks, vectors=vectors)
+            stage.stage["update"] = update
+            stage.progress(len(vectors), len(vectors))
+            if paths["pdf"] != source:
+                os.replace(paths["pdf"], source)
+            if operation == REPLACE:
+                update_registry_after_replace(job)
+
+
+# The registry maps PDF content to documents: once a replacement is indexed, the document no longer
+# holds its old content, and holds exactly the new PDF's when that is its only source
+def update_registry_after_replace(job: dict):
+    unregister_document_id(job["document_id"])
+    if job.get("content_hash") and len(list_sources(get_vector_store_path(job["document_id"]))) == 1:
+        register_document(job["content_hash"], job["document_id"], job["job_id"])
@@ -0,0 +1,198 @@
+import os
+import re
+import json
+import math
+import argparse
+import unicodedata
+from collections import Counter
+import numpy as np
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("LEXICAL_INDEX")
+
+LEXICAL_INDEX_DIR = "lexical"
+
+# Emails and numbers ("3.41", "25,000", "২৫,০০০") stay whole so exact identifiers can be matched.
+# Bengali words keep their vowel signs and hasanta; the danda "।" and other punctuation separate tokens.
+TOKEN_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|\d+(?:[.,]\d+)*"
+    r"|[\u0980-\u09FF]+"
+    r"|[^\W\d_]+"
+)
+
+
+def tokenize(text: str):
+    text = unicodedata.normalize("NFC", text).casefold()
+    # Zero-width (non-)joiners only change Bengali glyph shaping
+    text = text.replace("\u200c", "").replace("\u200d", "")
+    return TOKEN_PATTERN.findall(text)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over a vector store's chunks. Postings of term i are
+    postings[offsets[i]:offsets[i + 1]] (chunk positions) with matching term_freqs;
+    chunk positions map to docstore ids through `doc_ids`.
+    """
+
+    def __init__(self, terms, doc_ids, offsets, postings, term_freqs, doc_lengths, k1: float = 1.5, b: float = 0.75):
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.offsets = offsets
+        self.postings = postings
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(np.mean(doc_lengths)) if len(doc_lengths) else 0.0
+
+    def search(self, query: str, k: int):
+        """Top-k (docstore id, BM25 score) for the query; chunks sharing no term with it are not returned."""
+        n_docs = len(self.doc_ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            matched = True
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            docs = np.asarray(self.postings[start:end])
+            tf = np.asarray(self.term_freqs[start:end], dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            length_norm = 1 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        # Also when no chunk has a token (e.g. image-only pages without OCR): nothing to match
+        if not matched or self.avg_doc_length == 0:
+            return []
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in candidates]
+
+    def save(self, saved_vector_store_path: str):
+        index_dir = os.path.join(saved_vector_store_path, LEXICAL_INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "offsets.npy"), self.offsets)
+        np.save(os.path.join(index_dir, "postings.npy"), self.postings)
+        np.save(os.path.join(index_dir, "term_freqs.npy"), self.term_freqs)
+        np.save(os.path.join(index_dir, "doc_lengths.npy"), self.doc_lengths)
+        with open(os.path.join(index_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump({"terms": self.terms, "doc_ids": self.doc_ids, "k1": self.k1, "b": self.b}, f, ensure_ascii=False)
+
+
+class LexicalIndexBuilder:
+    """
+    Builds a LexicalIndex batch by batch without holding the chunk texts: each batch is tokenized as it
+    is added and its (term, chunk position, term frequency) postings are appended to a spill file in
+    `spill_dir` (or kept as arrays when None). Only the vocabulary, doc ids and chunk lengths stay in
+    memory until build(), which groups the postings by term (about 20 bytes per posting).
+    """
+
+    SPILL_FILE = "lexical_postings.tmp"
+    POSTING = np.dtype([("term", np.int32), ("position", np.int32), ("term_freq", np.uint16)])
+
+    def __init__(self, spill_dir: str = None):
+        self.term_ids = {}
+        self.doc_ids = []
+        self.doc_lengths = []
+        self.count = 0
+        self.spill_path = os.path.join(spill_dir, self.SPILL_FILE) if spill_dir else None
+        self.spill = open(self.spill_path, "wb") if self.spill_path else None
+        self.batches = []
+
+    def add(self, docs, doc_ids):
+        entries = []
+        for doc, doc_id in zip(docs, doc_ids):
+            position = len(self.doc_ids)
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                entries.append((self.term_ids.setdefault(term, len(self.term_ids)), position, min(count, 65535)))
+        batch = np.array(entries, dtype=self.POSTING)
+        self.count += len(batch)
+        if self.spill is not None:
+            self.spill.write(batch.tobytes())
+        else:
+            self.batches.append(batch)
+
+    def build(self):
+        if self.spill is not None:
+            self.spill.close()
+            entries = (np.fromfile(self.spill_path, dtype=self.POSTING) if self.count
+                       else np.zeros(0, dtype=self.POSTING))
+            self.discard()
+        else:
+            entries = np.concatenate(self.batches) if self.batches else np.zeros(0, dtype=self.POSTING)
+        # Stable, so each term's postings stay in chunk order
+        order = np.argsort(entries["term"], kind="stable")
+        offsets = np.zeros(len(self.term_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(entries["term"], minlength=len(self.term_ids)))
+        postings = np.ascontiguousarray(entries["position"][order])
+        term_freqs = np.ascontiguousarray(entries["term_freq"][order])
+        return LexicalIndex(list(self.term_ids), self.doc_ids, offsets, postings, term_freqs,
+                            np.array(self.doc_lengths, dtype=np.int32))
+
+    def discard(self):
+        if self.spill is not None:
+            self.spill.close()
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+
+
+def build_lexical_index(docs, doc_ids):
+    builder = LexicalIndexBuilder()
+    builder.add(docs, doc_ids)
+    return builder.build()
+
+
+# Build from a FAISS vector store in index row order and save it inside the store directory
+def build_lexical_index_for_vector_store(vector_store, saved_vector_store_path: str):
+    doc_ids = [vector_store.index_to_docstore_id[row] for row in range(len(vector_store.index_to_docstore_id))]
+    docs = [vector_store.docstore.search(doc_id) for doc_id in doc_ids]
+    lexical_index = build_lexical_index(docs, doc_ids)
+    lexical_index.save(saved_vector_store_path)
+    logger.info(f"Lexical index built with {len(lexical_index.terms)} terms over {len(doc_ids)} chunks")
+    return lexical_index
+
+
+def load_lexical_index(saved_vector_store_path: str):
+    """Load the store's lexical index, or None if it has none. Postings are memory-mapped and paged in on use."""
+    index_dir = os.path.join(saved_vector_store_path, LEXICAL_INDEX_DIR)
+    vocabulary_path = os.path.join(index_dir, "vocabulary.json")
+    if not os.path.exists(vocabulary_path):
+        return None
+    with open(vocabulary_path, "r", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+              for name in ("offsets", "postings", "term_freqs")}
+    doc_lengths = np.load(os.path.join(index_dir, "doc_lengths.npy"))
+    return LexicalIndex(vocabulary["terms"], vocabulary["doc_ids"], arrays["offsets"], arrays["postings"],
+                        arrays["term_freqs"], doc_lengths, k1=vocabulary["k1"], b=vocabulary["b"])
+
+
+if __name__ == '__main__':
+    from app.processing.generate_vector_db import load_vector_store
+
+    # Build lexical indexes for vector stores created before hybrid retrieval
+    parser = argparse.ArgumentParser(description="Build lexical (BM25) indexes for existing vector stores")
+    parser.add_argument("--dir", default=config.VECTOR_STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild indexes that already exist")
+    args = parser.parse_args()
+
+    for name in sorted(os.listdir(args.dir)):
+        path = os.path.join(args.dir, name)
+        if not os.path.isdir(path) or name.endswith(".tmp"):
+            continue
+        if not args.rebuild and load_lexical_index(path) is not None:
+            continue
+        build_lexical_index_for_vector_store(load_vector_store(path), path)
+        logger.info(f"Built lexical index for {path}")
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import hashlib
+from functools import lru_cache
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("OCR_ENGINE")
+
+
+@lru_cache(maxsize=1)
+def tesseract_version():
+    import pytesseract
+    return str(pytesseract.get_tesseract_version())
+
+
+@lru_cache(maxsize=1)
+def ocr_available():
+    """pytesseract, pdf2image and the tesseract binary are all needed; without them scanned pages stay empty."""
+    try:
+        import pdf2image  # noqa: F401
+        tesseract_version()
+        return True
+    except Exception as e:
+        logger.warning(f"OCR unavailable, pages without a text layer will be skipped: {e}")
+        return False
+
+
+# Everything that changes OCR output; part of the cache key
+def get_ocr_settings():
+    return {"engine": "tesseract", "version": tesseract_version(), "languages": config.OCR_LANGUAGES,
+            "dpi": config.OCR_DPI, "tesseract_config": config.OCR_TESSERACT_CONFIG}
+
+
+def page_content_hash(pdf_path: str, page_number: int):
+    """
+    Hash of what a page draws: its content streams, the raw data of its images, and its rotation and
+    visible area, which change the image OCR reads. The same page in another upload of the PDF (or in
+    another PDF) hashes the same. Without PyMuPDF, the file and page number are hashed instead.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest.update(str(page_number).encode())
+        return digest.hexdigest()
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_number - 1]
+        digest.update(page.read_contents())
+        digest.update(f"{page.rotation}\0{tuple(page.rect)}".encode())
+        for image in page.get_images(full=True):
+            digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+def ocr_cache_path(page_hash: str, settings: dict):
+    key = hashlib.blake2b(f"{page_hash}\0{json.dumps(settings, sort_keys=True)}".encode("utf-8"),
+                          digest_size=16).hexdigest()
+    return os.path.join(config.OCR_CACHE_DIR, key[:2], f"{key}.txt")
+
+
+def ocr_page(pdf_path: str, page_number: int, settings: dict):
+    """
+    OCR one page (1-based), reusing the cached text for the same page content and settings.
+    Runs in an OCR worker process. Returns (text, served from cache, seconds).
+    """
+    start = time.perf_counter()
+    cache_path = ocr_cache_path(page_content_hash(pdf_path, page_number), settings)
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read(), True, time.perf_counter() - start
+
+    import pytesseract
+    from pdf2image import convert_from_path
+    image = convert_from_path(pdf_path, dpi=settings["dpi"], first_page=page_number, last_page=page_number)[0]
+    text = pytesseract.image_to_string(image, lang=settings["languages"], config=settings["tesseract_config"])
+
+    # Written atomically: several workers may OCR the same page content at once
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+    return text, False, time.perf_counter() - start
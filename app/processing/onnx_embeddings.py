@@ -0,0 +1,104 @@
+import os
+import argparse
+import numpy as np
+from filelock import FileLock
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+
+config = Config()
+logger = configure_logging("ONNX_EMBEDDINGS")
+
+# sentence-transformers presets for dynamic int8 quantization, by target CPU instruction set
+QUANTIZATION_CONFIGS = ["arm64", "avx2", "avx512", "avx512_vnni"]
+
+
+def get_onnx_export_dir(model_name: str):
+    return os.path.join(config.EMBEDDING_ONNX_DIR, model_name.replace("/", "--"))
+
+
+def get_onnx_file_name(quantization: str = None):
+    return f"onnx/model_qint8_{quantization}.onnx" if quantization else "onnx/model.onnx"
+
+
+def export_onnx_model(model_name: str, quantization: str = None):
+    """
+    Export `model_name` to ONNX under EMBEDDING_ONNX_DIR, plus an int8 dynamically quantized copy when
+    `quantization` is set. Done once; later calls reuse the files. Returns (export dir, ONNX file name in it).
+    """
+    if quantization and quantization not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown ONNX quantization '{quantization}'. Available: {QUANTIZATION_CONFIGS}")
+    export_dir = get_onnx_export_dir(model_name)
+    file_name = get_onnx_file_name(quantization)
+    os.makedirs(config.EMBEDDING_ONNX_DIR, exist_ok=True)
+    # Several ingestion workers may start at once: one exports, the others wait and reuse the files
+    with FileLock(f"{export_dir}.lock"):
+        if os.path.exists(os.path.join(export_dir, file_name)):
+            return export_dir, file_name
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        if not os.path.exists(os.path.join(export_dir, get_onnx_file_name())):
+            logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+            SentenceTransformer(model_name, device="cpu", backend="onnx").save_pretrained(export_dir)
+        if quantization:
+            logger.info(f"Quantizing {export_dir} to int8 for {quantization}")
+            model = SentenceTransformer(export_dir, device="cpu", backend="onnx")
+            export_dynamic_quantized_onnx_model(model, quantization, export_dir)
+    return export_dir, file_name
+
+
+# Sentence-transformer embeddings run by ONNX Runtime on CPU; thread counts of 0 keep ONNX Runtime's defaults
+def create_onnx_embeddings(model_name: str, quantization: str = None, intra_op_threads: int = 0,
+                           inter_op_threads: int = 0, batch_size: int = 32):
+    import onnxruntime
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    export_dir, file_name = export_onnx_model(model_name, quantization)
+    session_options = onnxruntime.SessionOptions()
+    if intra_op_threads:
+        session_options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        session_options.inter_op_num_threads = inter_op_threads
+    logger.info(f"Loading ONNX embedding model {export_dir}/{file_name} "
+                f"(intra-op threads {intra_op_threads or 'default'}, inter-op threads {inter_op_threads or 'default'})")
+    return HuggingFaceEmbeddings(
+        model_name=export_dir,
+        model_kwargs={"device": "cpu", "backend": "onnx",
+                      "model_kwargs": {"file_name": file_name, "provider": "CPUExecutionProvider",
+                                       "session_options": session_options}},
+        encode_kwargs={"normalize_embeddings": True, "batch_size": batch_size},
+    )
+
+
+def _normalized(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+
+
+def check_parity(reference, candidate, texts, queries, k: int = 5):
+    """
+    Compare a candidate embedding backend with a reference one: cosine similarity of the two vectors
+    of each text, and overlap of the top-k texts each backend retrieves for the same queries.
+    """
+    reference_texts, candidate_texts = _normalized(reference.embed_documents(texts)), _normalized(candidate.embed_documents(texts))
+    cosines = np.sum(reference_texts * candidate_texts, axis=1)
+
+    reference_queries, candidate_queries = _normalized(reference.embed_documents(queries)), _normalized(candidate.embed_documents(queries))
+    k = min(k, len(texts))
+    reference_top = np.argsort(-(reference_queries @ reference_texts.T), axis=1)[:, :k]
+    candidate_top = np.argsort(-(candidate_queries @ candidate_texts.T), axis=1)[:, :k]
+    overlaps = [len(set(a) & set(b)) / k for a, b in zip(reference_top, candidate_top)]
+    return {"texts": len(texts), "queries": len(queries), "k": k,
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            "overlap_at_k": round(float(np.mean(overlaps)), 4),
+            "top1_agreement": round(float(np.mean(reference_top[:, 0] == candidate_top[:, 0])), 4)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (optionally int8)")
+    parser.add_argument("--model", default=config.HUGGINGFACE_EMBEDDING_MODEL)
+    parser.add_argument("--quantization", choices=QUANTIZATION_CONFIGS, default=config.EMBEDDING_ONNX_QUANTIZATION)
+    args = parser.parse_args()
+
+    export_dir, file_name = export_onnx_model(args.model, args.quantization)
+    logger.info(f"ONNX model ready: {os.path.join(export_dir, file_name)}")
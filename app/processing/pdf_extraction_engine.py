@@ -0,0 +1,248 @@
+import os
+import time
+import unicodedata
+import multiprocessing
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging, forward_logs_to, log_worker_queue
+from app.processing.ocr_engine import ocr_available, get_ocr_settings, ocr_page
+
+config = Config()
+logger = configure_logging("PDF_EXTRACTION_ENGINE")
+
+ExtractedPage = namedtuple("ExtractedPage", ["page_number", "text", "backend"])
+
+# Pages extracted ahead of a page still being OCR'd, at most
+MAX_BUFFERED_PAGES = 256
+# Share of unmapped glyphs above which a text layer is treated as broken
+MAX_UNMAPPED_RATIO = 0.1
+# Pools are started from pipeline threads of a process running embedding and tokenizer threads; a forked
+# child could inherit a lock held by one of them and deadlock
+SPAWN_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _extract_pages_pymupdf(pdf_path, page_numbers):
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        return {n: doc[n].get_text("text") for n in page_numbers}
+
+
+def _extract_pages_pdfplumber(pdf_path, page_numbers):
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return {n: pdf.pages[n].extract_text() or "" for n in page_numbers}
+
+
+def _extract_pages_pypdf(pdf_path, page_numbers):
+    from pypdf import PdfReader
+    reader = PdfReader(pdf_path)
+    return {n: reader.pages[n].extract_text() or "" for n in page_numbers}
+
+
+EXTRACTION_BACKENDS = {
+    "pymupdf": _extract_pages_pymupdf,
+    "pdfplumber": _extract_pages_pdfplumber,
+    "pypdf": _extract_pages_pypdf,
+}
+
+
+def get_page_count(pdf_path: str):
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except ImportError:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+
+def parse_backends(backends):
+    if isinstance(backends, str):
+        backends = [name.strip() for name in backends.split(",") if name.strip()]
+    unknown = [name for name in backends if name not in EXTRACTION_BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown PDF extraction backends: {unknown}. Available: {list(EXTRACTION_BACKENDS)}")
+    return list(backends)
+
+
+def has_usable_text_layer(text: str):
+    """
+    Whether extracted page text can be used as is: at least OCR_MIN_PAGE_CHARS non-space characters,
+    few of them unmapped glyphs (private-use, control or replacement characters that fonts without a
+    Unicode map produce). Other pages are scans, or text layers that OCR reads better.
+    """
+    characters = "".join(text.split()) if text else ""
+    if len(characters) < config.OCR_MIN_PAGE_CHARS:
+        return False
+    unmapped = sum(1 for ch in characters if ch == "\ufffd" or unicodedata.category(ch) in ("Co", "Cc", "Cs"))
+    return unmapped / len(characters) <= MAX_UNMAPPED_RATIO
+
+
+# Extract a range of pages, trying each backend in order for pages the previous one failed on
+def extract_page_range(pdf_path: str, start: int, end: int, backends):
+    remaining = list(range(start, end))
+    pages = {}
+    # Text of pages without a usable text layer, kept in case OCR is unavailable or finds nothing
+    partial = {}
+    for backend in backends:
+        if not remaining:
+            break
+        try:
+            texts = EXTRACTION_BACKENDS[backend](pdf_path, remaining)
+        except Exception as e:
+            # Whole-range failure (e.g. broken page tree); fall back page by page
+            logger.debug(f"{backend} failed on pages {remaining[0] + 1}-{remaining[-1] + 1} of {pdf_path}: {e}")
+            texts = {}
+            for n in remaining:
+                try:
+                    texts.update(EXTRACTION_BACKENDS[backend](pdf_path, [n]))
+                except Exception as page_error:
+                    logger.debug(f"{backend} failed on page {n + 1} of {pdf_path}: {page_error}")
+        for n, text in texts.items():
+            if has_usable_text_layer(text):
+                pages[n] = ExtractedPage(n + 1, text, backend)
+            elif text and text.strip():
+                partial.setdefault(n, text)
+        remaining = [n for n in remaining if n not in pages]
+    # Pages without a usable text layer (e.g. scanned images) have no backend and are routed to OCR
+    for n in remaining:
+        pages[n] = ExtractedPage(n + 1, partial.get(n, ""), None)
+    return [pages[n] for n in range(start, end)]
+
+
+def timed_extract_page_range(pdf_path: str, start: int, end: int, backends):
+    started = time.perf_counter()
+    pages = extract_page_range(pdf_path, start, end, backends)
+    return pages, time.perf_counter() - started
+
+
+def iter_text_layer_pages(pdf_path: str, backends, workers: int, pages_per_task: int, stats: dict):
+    """
+    Yield ExtractedPage tuples in page order from the PDF's text layer. Page ranges are extracted across
+    a process pool, with at most two ranges per worker in flight so memory stays bounded on large documents.
+    """
+    page_count = get_page_count(pdf_path)
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+    def collect(result):
+        pages, seconds = result
+        stats["text_layer"]["seconds"] += seconds
+        return pages
+
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield from collect(timed_extract_page_range(pdf_path, start, end, backends))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=SPAWN_CONTEXT,
+                             initializer=forward_logs_to, initargs=(log_worker_queue(),)) as executor:
+        in_flight = deque()
+        pending_ranges = iter(ranges)
+        for start, end in pending_ranges:
+            in_flight.append(executor.submit(timed_extract_page_range, pdf_path, start, end, backends))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            pages = collect(in_flight.popleft().result())
+            next_range = next(pending_ranges, None)
+            if next_range is not None:
+                in_flight.append(executor.submit(timed_extract_page_range, pdf_path, *next_range, backends))
+            yield from pages
+
+
+def route_pages_to_ocr(pdf_path: str, pages, workers: int, stats: dict):
+    """
+    Yield `pages` in order, with the ones that have no usable text layer replaced by their OCR text.
+    Only those pages are OCR'd, across a process pool started on the first one; at most two OCR pages
+    per worker are in flight. A page OCR cannot read keeps whatever text it had.
+    """
+    settings = get_ocr_settings()
+    executor = None
+    pending = deque()
+    ocr_in_flight = 0
+
+    def resolve(page, future):
+        if future is None:
+            return page
+        try:
+            text, cached, seconds = future.result()
+        except Exception as e:
+            logger.warning(f"OCR failed on page {page.page_number} of {pdf_path}: {e}")
+            return page
+        stats["ocr"]["seconds"] += seconds
+        stats["ocr"]["cached"] += int(cached)
+        return ExtractedPage(page.page_number, text, "ocr") if text.strip() else page
+
+    try:
+        for page in pages:
+            future = None
+            if page.backend is None:
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=workers, mp_context=SPAWN_CONTEXT,
+                                                   initializer=forward_logs_to, initargs=(log_worker_queue(),))
+                future = executor.submit(ocr_page, pdf_path, page.page_number, settings)
+                ocr_in_flight += 1
+            pending.append((page, future))
+            # Pages leave in order: as soon as the first is ready, or blocking on it when too much is buffered
+            while pending and (pending[0][1] is None or pending[0][1].done()
+                               or ocr_in_flight >= workers * 2 or len(pending) >= MAX_BUFFERED_PAGES):
+                page, future = pending.popleft()
+                ocr_in_flight -= future is not None
+                yield resolve(page, future)
+        while pending:
+            yield resolve(*pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def iter_pdf_pages(pdf_path: str, backends=None, workers: int = None, pages_per_task: int = None,
+                   ocr: bool = None, stats: dict = None):
+    """
+    Yield ExtractedPage tuples in page order. Pages come from the text layer when it is usable and
+    from OCR otherwise (when OCR_ENABLED and Tesseract is installed), with backend "ocr".
+
+    `stats`, if given, is filled with per-route page counts and worker seconds: text_layer (extraction
+    of every page, including the detection of pages without a usable layer), ocr (of which `cached`
+    came from the OCR cache) and no_text, plus the wall time.
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    backends = parse_backends(backends or config.PDF_EXTRACTION_BACKENDS)
+    workers = workers or config.PDF_EXTRACTION_WORKERS
+    pages_per_task = pages_per_task or config.PDF_EXTRACTION_PAGES_PER_TASK
+    ocr = config.OCR_ENABLED if ocr is None else ocr
+    stats = stats if stats is not None else {}
+    stats.update(text_layer={"pages": 0, "seconds": 0.0}, ocr={"pages": 0, "cached": 0, "seconds": 0.0},
+                 no_text={"pages": 0}, elapsed_s=0.0)
+    start = time.perf_counter()
+
+    pages = iter_text_layer_pages(pdf_path, backends, workers, pages_per_task, stats)
+    if ocr and ocr_available():
+        pages = route_pages_to_ocr(pdf_path, pages, config.OCR_WORKERS, stats)
+    for page in pages:
+        route = "no_text" if page.backend is None else "ocr" if page.backend == "ocr" else "text_layer"
+        stats[route]["pages"] += 1
+        yield page
+
+    for route in ("text_layer", "ocr"):
+        stats[route]["seconds"] = round(stats[route]["seconds"], 3)
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Page routes for {pdf_path}: {stats}")
+
+
+# Extract text page by page, streaming it to the output file, and return the full text
+def pdf2text_parallel(pdf_filepath, output_text_file_path, backends=None, workers: int = None):
+    parts = []
+    backend_counts = {}
+    with open(output_text_file_path, "w", encoding="utf-8") as f:
+        for page in iter_pdf_pages(pdf_filepath, backends=backends, workers=workers):
+            backend_counts[page.backend] = backend_counts.get(page.backend, 0) + 1
+            if page.text:
+                f.write(page.text + "\n")
+                parts.append(page.text)
+    logger.info(f"Extracted {sum(backend_counts.values())} pages from {pdf_filepath} by backend: {backend_counts}")
+    return "\n".join(parts) + ("\n" if parts else "")
@@ -1,9 +1,7 @@
-import fitz  # PyMuPDF
-import pdfplumber
-from bangla_pdf_ocr import process_pdf
-from langchain_community.document_loaders import PyPDFLoader
+# PDF libraries are imported inside each extractor, so importing this module stays cheap
 
 def pdf2text_langchain(pdf_filepath, output_text_file_path):
+    from langchain_community.document_loaders import PyPDFLoader
     try:
         # Load single PDF
         loader = PyPDFLoader(pdf_filepath)
@@ -27,13 +25,15 @@ def pdf2text_langchain(pdf_filepath, output_text_file_path):
         return None
 
 def pdf2text_pdfplumber(pdf_filepath, output_text_file_path):
-    full_text = ""
+    import pdfplumber
+    page_texts = []
     try:
         with pdfplumber.open(pdf_filepath) as pdf:
             for page in pdf.pages:
                 text = page.extract_text()
                 if text:
-                    full_text += text + "\n"
+                    page_texts.append(text + "\n")
+        full_text = "".join(page_texts)
 
         # Save
         with open(output_text_file_path, "w", encoding="utf-8") as f:
@@ -46,11 +46,13 @@ def pdf2text_pdfplumber(pdf_filepath, output_text_file_path):
         return None
 
 def pdf2text_pymupdf(pdf_filepath, output_text_file_path):
-    full_text = ""
-    doc = fitz.open(pdf_filepath)
-    for page in doc:
-        text = page.get_text("text")  # "text" keeps Unicode if available
-        full_text += text + "\n"
+    import fitz  # PyMuPDF
+    page_texts = []
+    with fitz.open(pdf_filepath) as doc:
+        for page in doc:
+            text = page.get_text("text")  # "text" keeps Unicode if available
+            page_texts.append(text + "\n")
+    full_text = "".join(page_texts)
 
     with open(output_text_file_path, "w", encoding="utf-8") as f:
         f.write(full_text)
@@ -68,5 +70,6 @@ if __name__ == '__main__':
     text = pdf2text_langchain(pdf_filepath, prospectus_langchain)
     # text = pdf2text_pdfplumber(pdf_filepath, prospectus_pdfplumber)
     # text = pdf2text_pymupdf(pdf_filepath, prospectus_pymupdf)
+    # from bangla_pdf_ocr import process_pdf
     # text = process_pdf(pdf_filepath, output_text_file_path)
     print('PDF text: ', text[:500])  # print only first 500 chars for sanity check
@@ -0,0 +1,169 @@
+import time
+import hashlib
+import threading
+from typing import Any, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.metrics import observe_stage
+from app.core.readiness import readiness
+
+config = Config()
+logger = configure_logging("RERANKER")
+
+_shared_reranker = None
+_shared_reranker_lock = threading.Lock()
+
+# Reranking runs off the request thread so a query can give up on it when its time budget runs out
+rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+
+# Cross-encoder that scores (query, chunk) pairs in batches on CPU, with an LRU cache of pair scores
+class CrossEncoderReranker:
+    def __init__(self, model_name: str, backend: str = "torch", onnx_file: str = None,
+                 batch_size: int = 32, cache_max_entries: int = 10000, max_pending: int = 4):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.batch_size = batch_size
+        self.cache_max_entries = cache_max_entries
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._scores = OrderedDict()
+        self._scores_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queries = 0
+        self.fallbacks = 0
+        self.retrieve_ms_total = 0.0
+        self.rerank_ms_total = 0.0
+        self._pending_slots = threading.Semaphore(max_pending)
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    logger.info(f"Loading cross-encoder {self.model_name} ({self.backend})")
+                    if self.backend == "onnx":
+                        # e.g. RERANKER_ONNX_FILE=onnx/model_qint8_avx512_vnni.onnx for int8 weights
+                        model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else {}
+                        self._model = CrossEncoder(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+                    else:
+                        self._model = CrossEncoder(self.model_name, device="cpu")
+                    readiness.mark_ready("reranker")
+        return self._model
+
+    def _pair_key(self, query: str, text: str):
+        return hashlib.blake2b(f"{query}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def score(self, query: str, texts):
+        """Relevance score per text; cached pairs are reused and the rest are scored in one batched pass."""
+        keys = [self._pair_key(query, text) for text in texts]
+        scores = [None] * len(texts)
+        with self._scores_lock:
+            for i, key in enumerate(keys):
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[i] = self._scores[key]
+        missing = [i for i, value in enumerate(scores) if value is None]
+        self.cache_hits += len(texts) - len(missing)
+        self.cache_misses += len(missing)
+
+        if missing:
+            predicted = self._get_model().predict([(query, texts[i]) for i in missing],
+                                                  batch_size=self.batch_size, show_progress_bar=False)
+            with self._scores_lock:
+                for i, value in zip(missing, predicted):
+                    scores[i] = float(value)
+                    self._scores[keys[i]] = scores[i]
+                while len(self._scores) > self.cache_max_entries:
+                    self._scores.popitem(last=False)
+        return scores
+
+    def try_submit(self, query: str, texts):
+        """Queue a scoring pass on the rerank thread, or return None when too many passes are already queued."""
+        if not self._pending_slots.acquire(blocking=False):
+            return None
+        future = rerank_executor.submit(self.score, query, texts)
+        future.add_done_callback(lambda _: self._pending_slots.release())
+        return future
+
+    def stats(self):
+        return {"model": self.model_name, "backend": self.backend, "loaded": self._model is not None,
+                "queries": self.queries, "fallbacks": self.fallbacks,
+                "cache_entries": len(self._scores), "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+                "avg_retrieve_ms": round(self.retrieve_ms_total / self.queries, 2) if self.queries else 0.0,
+                "avg_rerank_ms": round(self.rerank_ms_total / self.queries, 2) if self.queries else 0.0}
+
+
+# Shared cross-encoder; the model itself is loaded on first use
+def get_reranker():
+    global _shared_reranker
+    if _shared_reranker is None:
+        with _shared_reranker_lock:
+            if _shared_reranker is None:
+                _shared_reranker = CrossEncoderReranker(model_name=config.RERANKER_MODEL,
+                                                        backend=config.RERANKER_BACKEND,
+                                                        onnx_file=config.RERANKER_ONNX_FILE,
+                                                        batch_size=config.RERANKER_BATCH_SIZE,
+                                                        cache_max_entries=config.RERANKER_CACHE_MAX_ENTRIES,
+                                                        max_pending=config.RERANKER_MAX_PENDING)
+    return _shared_reranker
+
+
+# Over-fetches candidates from `base_retriever` and keeps the `k` best by cross-encoder score.
+# When reranking would exceed `time_budget_ms` (or too many passes are queued) the first `k`
+# candidates are returned in retrieval order instead.
+class RerankingRetriever(BaseRetriever):
+    base_retriever: BaseRetriever
+    reranker: Any
+    k: int = 5
+    time_budget_ms: float = 300
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        start = time.perf_counter()
+        candidates = self.base_retriever.invoke(query)
+        return self.rerank(query, candidates, retrieve_ms=(time.perf_counter() - start) * 1000)
+
+    def rerank(self, query: str, candidates, retrieve_ms: float = 0.0) -> List[Document]:
+        """Rerank already retrieved candidates; `retrieve_ms` counts against the time budget."""
+        reranker = self.reranker
+        reranker.queries += 1
+        reranker.retrieve_ms_total += retrieve_ms
+
+        scores = None
+        remaining = (self.time_budget_ms - retrieve_ms) / 1000
+        rerank_start = time.perf_counter()
+        future = None
+        if len(candidates) > 1 and remaining > 0:
+            future = reranker.try_submit(query, [doc.page_content for doc in candidates])
+        if future is not None:
+            try:
+                scores = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # A pass that has not started is dropped; a running one still fills the pair cache
+                future.cancel()
+                logger.warning(f"Reranking exceeded the {self.time_budget_ms}ms budget, using retrieval order")
+            except Exception as e:
+                logger.error(f"Reranking error, using retrieval order: {e}")
+        rerank_ms = (time.perf_counter() - rerank_start) * 1000
+        reranker.rerank_ms_total += rerank_ms
+        observe_stage("rerank", rerank_ms / 1000)
+
+        timings = {"retrieve_ms": round(retrieve_ms, 2), "rerank_ms": round(rerank_ms, 2),
+                   "candidates": len(candidates), "reranked": scores is not None}
+        if scores is None:
+            if len(candidates) > 1:
+                reranker.fallbacks += 1
+            ranked = [(doc, None) for doc in candidates[:self.k]]
+        else:
+            ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)[:self.k]
+        logger.info(f"Retrieval timings: {timings}")
+        return [Document(id=doc.id, page_content=doc.page_content,
+                         metadata={**doc.metadata, "rerank_score": score, "retrieval_timings": timings})
+                for doc, score in ranked]
@@ -1,4 +1,10 @@
+import time
+import asyncio
+from langchain_core.prompts import format_document
+
 from app.core.logger import configure_logging
+from app.core.inference_limiter import run_blocking
+from app.core.metrics import track_stage, get_metrics_callbacks
 from app.processing.generate_vector_db import load_vector_store
 from app.processing.generate_rag_chain import create_rag_chain
 
@@ -7,11 +13,102 @@ logger = configure_logging("SINGLE_QUERY_INFERENCE")
 # Run inference
 def run_inference(rag_chain, query: str):
     try:
-        result = rag_chain.invoke({"query": query})
+        result = rag_chain.invoke({"query": query}, config={"callbacks": get_metrics_callbacks()})
+        return result.get("result", "").strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+# Run inference without blocking the event loop: native async chain call, else the bounded thread pool.
+# Metrics callbacks are passed per call so they reach the retriever run inside the chain.
+async def run_inference_async(rag_chain, query: str):
+    try:
+        run_config = {"callbacks": get_metrics_callbacks()}
+        if hasattr(rag_chain, "ainvoke"):
+            result = await rag_chain.ainvoke({"query": query}, config=run_config)
+        else:
+            result = await run_blocking(rag_chain.invoke, {"query": query}, config=run_config)
         return result.get("result", "").strip()
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Answer from already retrieved documents, so callers that also need the context retrieve only once
+def answer_from_documents(rag_chain, docs, query: str):
+    result = rag_chain.combine_documents_chain.invoke({"input_documents": docs, "question": query})
+    return result.get("output_text", "").strip()
+
+async def answer_from_documents_async(rag_chain, docs, query: str):
+    result = await rag_chain.combine_documents_chain.ainvoke({"input_documents": docs, "question": query})
+    return result.get("output_text", "").strip()
+
+# Short description of each retrieved chunk, sent to streaming clients before the answer
+def format_sources(docs):
+    return [{"index": i + 1, "metadata": doc.metadata, "preview": doc.page_content[:200]}
+            for i, doc in enumerate(docs)]
+
+# Fill the chain's "stuff" prompt with the retrieved documents, as RetrievalQA would (packing them first
+# with a PackedStuffDocumentsChain). Returns the LLM, the prompt and the context stats.
+def build_stream_prompt(rag_chain, docs, query: str):
+    combine_chain = rag_chain.combine_documents_chain
+    if hasattr(combine_chain, "build_inputs"):
+        inputs, context_stats = combine_chain.build_inputs(docs, question=query)
+    else:
+        context = combine_chain.document_separator.join(
+            format_document(doc, combine_chain.document_prompt) for doc in docs)
+        inputs, context_stats = {"context": context, "question": query}, {}
+    return combine_chain.llm_chain.llm, combine_chain.llm_chain.prompt.format(**inputs), context_stats
+
+# Prompt size fields of a response: the prompt's token count and how the context was packed
+def context_fields(context_stats: dict):
+    if not context_stats:
+        return {}
+    return {"prompt_tokens": context_stats.get("prompt_tokens"),
+            "context": {key: value for key, value in context_stats.items() if key != "prompt_tokens"}}
+
+def _timings(start, first_token_at):
+    total_ms = (time.perf_counter() - start) * 1000
+    ttft_ms = (first_token_at - start) * 1000 if first_token_at else None
+    return {"time_to_first_token_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "total_ms": round(total_ms, 1)}
+
+async def stream_inference(rag_chain, query: str):
+    """
+    Yield ("sources", [...]), then ("token", text) per LLM chunk, then ("done", timings).
+    Closing the generator (e.g. on client disconnect) cancels the LLM stream.
+    """
+    start = time.perf_counter()
+    with track_stage("retrieve"):
+        docs = await rag_chain.retriever.ainvoke(query)
+    yield "sources", format_sources(docs)
+
+    with track_stage("prompt_build"):
+        llm, prompt, context_stats = build_stream_prompt(rag_chain, docs, query)
+    first_token_at = None
+    async for chunk in llm.astream(prompt):
+        if chunk.content:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            yield "token", chunk.content
+    timings = _timings(start, first_token_at)
+    logger.info(f"Streamed answer in {timings['total_ms']} ms (first token {timings['time_to_first_token_ms']} ms)")
+    yield "done", {**timings, **context_fields(context_stats)}
+
+# Synchronous counterpart of stream_inference, for the Streamlit client
+def stream_inference_sync(rag_chain, query: str):
+    start = time.perf_counter()
+    docs = rag_chain.retriever.invoke(query)
+    yield "sources", format_sources(docs)
+
+    llm, prompt, context_stats = build_stream_prompt(rag_chain, docs, query)
+    first_token_at = None
+    for chunk in llm.stream(prompt):
+        if chunk.content:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            yield "token", chunk.content
+    yield "done", {**_timings(start, first_token_at), **context_fields(context_stats)}
+
 if __name__ == "__main__":
     saved_vector_store_path = "app/data/vectorstores/faiss_index"
     vector_store = load_vector_store(saved_vector_store_path)
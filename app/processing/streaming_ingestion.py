@@ -0,0 +1,215 @@
+import time
+import queue
+import threading
+import contextvars
+from itertools import islice
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.processing.generate_embeddings import get_embeddings
+from app.processing.embedding_cache import embed_texts_with_cache
+from app.processing.generate_text_chunks import iter_text_pages, iter_page_chunks
+from app.processing.compact_vector_store import CompactVectorStoreWriter
+from app.processing.faiss_index_factory import build_faiss_index, save_index_params
+from app.processing.lexical_index import LexicalIndexBuilder
+
+config = Config()
+logger = configure_logging("STREAMING_INGESTION")
+
+_END = object()
+
+
+class StageFailed:
+    """Carries a stage's exception downstream, where it is raised again."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StageStats:
+    """
+    Throughput of one pipeline stage. busy_s is time spent working, starved_s waiting on the stage
+    before it and blocked_s waiting for room in the buffer after it (backpressure).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_s = 0.0
+        self.starved_s = 0.0
+        self.blocked_s = 0.0
+        self.started = None
+        self.finished = None
+
+    def report(self):
+        wall_s = ((self.finished or time.perf_counter()) - self.started) if self.started else 0.0
+        return {"items": self.items,
+                "items_per_s": round(self.items / self.busy_s, 1) if self.busy_s else None,
+                "busy_s": round(self.busy_s, 3), "starved_s": round(self.starved_s, 3),
+                "blocked_s": round(self.blocked_s, 3), "wall_s": round(wall_s, 3),
+                "running": self.started is not None and self.finished is None}
+
+
+class StreamingPipeline:
+    """
+    Generator stages, each in its own thread, joined by bounded queues. A full queue blocks the stage
+    that feeds it, so no stage runs more than its buffer ahead of the next one. Errors travel downstream
+    to the consumer; close() stops every stage.
+    """
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.threads = []
+        self.stats = {}
+
+    def _put(self, outbox, item, stats):
+        start = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.blocked_s += time.perf_counter() - start
+
+    def drain(self, inbox, stats):
+        """Iterate a stage's output queue, counting time waited as the reading stage's starved time."""
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                stats.starved_s += time.perf_counter() - start
+                continue
+            stats.starved_s += time.perf_counter() - start
+            if item is _END:
+                return
+            if isinstance(item, StageFailed):
+                raise item.error
+            yield item
+
+    def _run(self, iterator, outbox, stats, size):
+        stats.started = time.perf_counter()
+        try:
+            while not self.stop.is_set():
+                start, starved = time.perf_counter(), stats.starved_s
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.busy_s += time.perf_counter() - start - (stats.starved_s - starved)
+                stats.items += size(item)
+                self._put(outbox, item, stats)
+            else:
+                iterator.close()
+            self._put(outbox, _END, stats)
+        except Exception as e:
+            self._put(outbox, StageFailed(e), stats)
+        finally:
+            stats.finished = time.perf_counter()
+
+    def add_stage(self, name: str, make_iterator, inbox=None, buffer_size: int = 8, size=None):
+        """
+        Start a stage. `make_iterator` receives the items of `inbox` (None for the first stage) and
+        returns the stage's output iterator. Returns the stage's bounded output queue. `size(item)` is
+        the number of items an output counts for (default 1).
+        """
+        stats = self.stats[name] = StageStats(name)
+        outbox = queue.Queue(maxsize=buffer_size)
+        iterator = make_iterator(self.drain(inbox, stats) if inbox is not None else None)
+        # Threads do not inherit context variables; run the stage in a copy of the caller's context so its
+        # log records keep the job's request ID
+        thread = threading.Thread(target=contextvars.copy_context().run,
+                                  args=(self._run, iterator, outbox, stats, size or (lambda item: 1)),
+                                  name=f"ingestion-{name}", daemon=True)
+        self.threads.append(thread)
+        thread.start()
+        return outbox
+
+    def report(self):
+        return {name: stats.report() for name, stats in self.stats.items()}
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+
+def iter_batches(items, batch_size: int):
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+# Embed chunks batch by batch through the embedding cache; cache statistics are summed into `cache_stats`
+def iter_embedded_batches(chunks, embeddings, batch_size: int, cache_stats: dict):
+    for batch in iter_batches(chunks, batch_size):
+        vectors, stats = embed_texts_with_cache([doc.page_content for doc in batch], embeddings, batch_size=batch_size)
+        for key in ("chunks", "cache_hits", "cache_misses", "bytes_saved"):
+            cache_stats[key] = cache_stats.get(key, 0) + stats[key]
+        yield batch, vectors
+
+
+def stream_pdf_to_vector_store(pdf_path: str, cache_path: str, source: str, saved_vector_store_path: str,
+                               on_progress=None, extract_stats: dict = None):
+    """
+    Build a compact vector store from a PDF with extract, chunk, embed and index running concurrently.
+    Pages flow through bounded buffers (INGESTION_STREAM_BUFFER), chunks are embedded in batches of
+    INGESTION_EMBED_BATCH_SIZE and written to the docstore and a vector spill file as they arrive, and
+    their BM25 postings to a postings spill file. While streaming, memory holds the buffers, the BM25
+    vocabulary and one small entry per chunk (doc id, length). The FAISS index and the BM25 postings
+    arrays are built from the spill files at the end, so those two do grow with the document.
+
+    `on_progress(report)` is called from the calling thread after each indexed batch with the per-stage
+    throughput report, and `extract_stats` receives the pages per extraction route (text layer or OCR).
+    Returns (chunk count, final report, embedding cache stats, index build params).
+    """
+    buffer_size = config.INGESTION_STREAM_BUFFER
+    batch_size = config.INGESTION_EMBED_BATCH_SIZE
+    embeddings = get_embeddings()
+    cache_stats = {}
+
+    pipeline = StreamingPipeline()
+    writer = CompactVectorStoreWriter(saved_vector_store_path)
+    lexical = LexicalIndexBuilder(saved_vector_store_path)
+    index = None
+    try:
+        pages = pipeline.add_stage("extract", lambda _: iter_text_pages(pdf_path, cache_path, extract_stats),
+                                   buffer_size=buffer_size)
+        chunks = pipeline.add_stage("chunk", lambda pages: iter_page_chunks(pages, source), pages,
+                                    buffer_size=buffer_size * batch_size)
+        batches = pipeline.add_stage("embed", lambda chunks: iter_embedded_batches(chunks, embeddings, batch_size, cache_stats),
+                                     chunks, buffer_size=buffer_size, size=lambda batch: len(batch[0]))
+
+        # The index stage runs in the calling thread
+        index_stats = pipeline.stats["index"] = StageStats("index")
+        index_stats.started = time.perf_counter()
+        for docs, vectors in pipeline.drain(batches, index_stats):
+            start = time.perf_counter()
+            # BM25 postings for hybrid retrieval, from the same batch
+            lexical.add(docs, writer.add(docs, vectors))
+            index_stats.items += len(docs)
+            index_stats.busy_s += time.perf_counter() - start
+            if on_progress is not None:
+                on_progress(pipeline.report())
+        if writer.count == 0:
+            raise ValueError("No text extracted from PDF with pdf2text")
+
+        start = time.perf_counter()
+        # Built over the memory-mapped spill file, so the vectors are read from disk rather than copied
+        index, build_params = build_faiss_index(writer.vectors(), config.FAISS_INDEX_TYPE)
+        lexical.build().save(saved_vector_store_path)
+        index_stats.busy_s += time.perf_counter() - start
+        index_stats.finished = time.perf_counter()
+    finally:
+        pipeline.close()
+        writer.close(index)
+        lexical.discard()
+
+    save_index_params(saved_vector_store_path, build_params)
+
+    cache_stats["hit_rate"] = round(cache_stats["cache_hits"] / cache_stats["chunks"], 4) if cache_stats.get("chunks") else 0.0
+    report = pipeline.report()
+    logger.info(f"Streamed {pdf_path} into {saved_vector_store_path}: {writer.count} chunks, stages {report}, "
+                f"embedding cache {cache_stats}")
+    return writer.count, report, cache_stats, build_params
@@ -0,0 +1,124 @@
+import os
+import shutil
+import hashlib
+from filelock import FileLock
+
+from app.config.configuration import Config
+from app.core.logger import configure_logging
+from app.core.document_catalog import get_base_vector_store_path, get_vector_store_path, new_vector_store_version_path, switch_document_store
+from app.processing.embedding_cache import normalize_chunk_text
+from app.processing.compact_vector_store import is_compact_vector_store, read_live_chunks, read_tombstones, update_compact_vector_store
+from app.processing.generate_vector_db import embed_chunks, build_vector_store_from_embeddings, load_vector_store
+from app.processing.faiss_index_factory import load_index_params
+from app.processing.lexical_index import build_lexical_index
+
+config = Config()
+logger = configure_logging("VECTOR_STORE_UPDATES")
+
+
+# Content hash of a chunk, insensitive to whitespace differences between extractions
+def chunk_hash(text: str):
+    return hashlib.blake2b(normalize_chunk_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# A source is one ingested PDF; its ID is the file name without extension
+def get_source_id(source: str):
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+# (doc_id, Document) of every live chunk in the store
+def list_live_chunks(saved_vector_store_path: str):
+    if is_compact_vector_store(saved_vector_store_path):
+        return read_live_chunks(saved_vector_store_path)
+    vector_store = load_vector_store(saved_vector_store_path)
+    return [(doc_id, vector_store.docstore.search(doc_id)) for doc_id in vector_store.index_to_docstore_id.values()]
+
+
+def list_sources(saved_vector_store_path: str):
+    sources = {}
+    for _, doc in list_live_chunks(saved_vector_store_path):
+        source = doc.metadata.get("source", "")
+        entry = sources.setdefault(source, {"source_id": get_source_id(source), "source": source, "chunk_count": 0})
+        entry["chunk_count"] += 1
+    return list(sources.values())
+
+
+def diff_source_chunks(saved_vector_store_path: str, source: str, chunks):
+    """
+    Compare a source's new chunks with its chunks in the store by content hash. Returns the doc ids of
+    stored chunks that are no longer present and the new chunks that need embedding; unchanged chunks
+    are kept as they are.
+    """
+    stored = {}
+    for doc_id, doc in list_live_chunks(saved_vector_store_path):
+        if doc.metadata.get("source") == source:
+            stored.setdefault(chunk_hash(doc.page_content), []).append(doc_id)
+    new_chunks = []
+    for chunk in chunks:
+        doc_ids = stored.get(chunk_hash(chunk.page_content))
+        if doc_ids:
+            doc_ids.pop()
+        else:
+            new_chunks.append(chunk)
+    removed_doc_ids = [doc_id for doc_ids in stored.values() for doc_id in doc_ids]
+    return removed_doc_ids, new_chunks
+
+
+def update_vector_store(document_id: str, remove_doc_ids=(), docs=(), vectors=(), remove_sources=()):
+    """
+    Remove chunks (by doc id or by source) from a document's store and add new chunks with their vectors.
+
+    The update is written to a new version of the store directory, and the catalog is switched to it in
+    one transaction before the previous version is deleted, so readers (and a restart after a crash at
+    any point) find either the old store or the new one. Writers of one document are serialized by a file
+    lock. Compact stores mark removed rows as tombstones and append to the index; once tombstones exceed
+    COMPACTION_TOMBSTONE_RATIO of the index, or for pickle stores, the store is rebuilt from its live
+    chunks with vectors from the embedding cache.
+    """
+    with FileLock(f"{get_base_vector_store_path(document_id)}.lock"):
+        saved_vector_store_path = get_vector_store_path(document_id)
+        if not os.path.exists(saved_vector_store_path):
+            raise FileNotFoundError(f"FAISS index not found at: {saved_vector_store_path}")
+        live_chunks = list_live_chunks(saved_vector_store_path)
+        removed = set(remove_doc_ids) | {doc_id for doc_id, doc in live_chunks
+                                         if doc.metadata.get("source") in set(remove_sources)}
+        removed &= {doc_id for doc_id, _ in live_chunks}
+        chunk_count = len(live_chunks) - len(removed) + len(docs)
+        if chunk_count == 0:
+            raise ValueError("The update would leave the vector store without chunks, delete the document instead")
+
+        compact = is_compact_vector_store(saved_vector_store_path)
+        tombstones = len(read_tombstones(saved_vector_store_path)) + len(removed) if compact else 0
+        rebuild = not compact or tombstones / (tombstones + chunk_count) > config.COMPACTION_TOMBSTONE_RATIO
+
+        new_path = new_vector_store_version_path(document_id)
+        tmp_path = f"{new_path}.tmp"
+        try:
+            if rebuild:
+                kept_docs = [doc for doc_id, doc in live_chunks if doc_id not in removed]
+                kept_vectors, _ = embed_chunks(kept_docs)
+                build_vector_store_from_embeddings(kept_docs + list(docs), list(kept_vectors) + list(vectors), tmp_path)
+                tombstones = 0
+            else:
+                shutil.copytree(saved_vector_store_path, tmp_path)
+                update_compact_vector_store(tmp_path, removed, docs, vectors)
+                # BM25 postings are positional, so the lexical index is rebuilt over the live chunks
+                updated_chunks = read_live_chunks(tmp_path)
+                build_lexical_index([doc for _, doc in updated_chunks],
+                                    [doc_id for doc_id, _ in updated_chunks]).save(tmp_path)
+            # Only complete versions carry a version name
+            os.rename(tmp_path, new_path)
+            switch_document_store(document_id, new_path, chunk_count=chunk_count,
+                                  index_type=load_index_params(new_path).get("index_type"))
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.rmtree(new_path, ignore_errors=True)
+            raise
+        # Readers that resolved the old path before the switch may still be loading it; on POSIX, files they
+        # have open stay readable
+        shutil.rmtree(saved_vector_store_path, ignore_errors=True)
+
+    stats = {"removed": len(removed), "added": len(docs), "chunk_count": chunk_count,
+             "tombstones": tombstones, "compacted": rebuild}
+    logger.info(f"Updated vector store of document {document_id} ({new_path}): {stats}")
+    return stats
@@ -1,13 +1,21 @@
 import os
-import time
 from fastapi.responses import FileResponse
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
 
-from app.schemas.rag_schema import QueryOnlySchema, QueryWithReferenceSchema, QueryWithDocumentIdSchema
-from app.services.rag_service import query_rag_with_reference, query_rag_without_reference, generate_vector_store_for_pdf, query_rag_by_document, get_all_vectors_list
+from app.schemas.rag_schema import QueryOnlySchema, QueryWithReferenceSchema, QueryWithDocumentIdSchema, QueryCorpusSchema, EvaluateBatchSchema, QueryBatchSchema
+from app.services.rag_service import evaluate_rag_batch, query_rag_batch, query_rag_with_reference, query_rag_without_reference, generate_vector_store_for_pdf, upload_pdfs, new_document_id, query_rag_by_document, get_all_vectors_list, get_vector_store_cache_stats, get_ingestion_job_status, query_rag_corpus, delete_document, append_pdf_to_document, replace_document_pdf, get_document_sources, delete_document_source, stream_query_rag, stream_query_rag_by_document
 
 router = APIRouter()
 
+# Upload bodies are streamed by the services rather than parsed by FastAPI (which would spool the whole
+# file first), so the multipart schema is declared here for the API docs
+def pdf_upload_body(field_name: str, multiple: bool = False):
+    file_schema = {"type": "string", "format": "binary"}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": [field_name],
+        "properties": {field_name: {"type": "array", "items": file_schema} if multiple else file_schema}}}}}}
+
 @router.get("/")
 async def get_index():  
     return {"message": "Welcome to the Document Question Answering API!"}
@@ -16,37 +24,131 @@ async def get_index():
 async def query_rag(request: QueryOnlySchema):
     return await query_rag_without_reference(request)
 
+@router.post("/query-stream")
+async def query_rag_stream(request: QueryOnlySchema, http_request: Request):
+    """
+    Server-sent events: `sources`, then one `token` event per answer chunk, then `done` with timings.
+    """
+    return await stream_query_rag(request, http_request)
+
+@router.post("/query-batch")
+async def query_batch(request: QueryBatchSchema, http_request: Request):
+    """
+    Answer many (query, document_id) pairs in one request. Server-sent events: one `result` per item
+    as soon as it is answered (with the item's `index`), then `done` with batch stats.
+    """
+    return await query_rag_batch(request, http_request)
+
 @router.post("/query-with-reference")
 async def query_rag_reference(request: QueryWithReferenceSchema):
     return await query_rag_with_reference(request)
 
-@router.post("/upload-document-pdf")
-async def upload_pdf(pdf_file: UploadFile = File(...)):
+@router.post("/evaluate-batch")
+async def evaluate_batch_route(request: EvaluateBatchSchema):
+    """
+    Evaluate a test set in one request: per-item answers, cosine similarity to the expected answer,
+    recall@k / reciprocal rank when gold chunks are given, and a summary.
+    """
+    return await evaluate_rag_batch(request)
+
+@router.post("/upload-document-pdf", openapi_extra=pdf_upload_body("pdf_file"))
+async def upload_pdf(request: Request):
     
     # Generate a unique ID based on current time
-    document_id = str(int(time.time() * 1000))  # Timestamp in milliseconds
+    document_id = new_document_id()  # Timestamp in milliseconds
     saved_pdf_path = f"app/data/pdfs/{document_id}.pdf"
     output_text_file_path = f"app/data/texts/{document_id}.txt"
     saved_vector_store_path = f"app/data/vectorstores/faiss_index_{document_id}"
 
-    return await generate_vector_store_for_pdf(pdf_file=pdf_file,
+    return await generate_vector_store_for_pdf(request=request,
                                                document_id=document_id, 
                                                saved_pdf_path=saved_pdf_path, 
                                                output_text_file_path=output_text_file_path, 
                                                saved_vector_store_path=saved_vector_store_path)
 
+@router.post("/upload-document-pdfs", openapi_extra=pdf_upload_body("pdf_files", multiple=True))
+async def upload_pdf_files(request: Request):
+    """
+    Upload several PDFs in one request (`pdf_files` parts); each becomes its own document with its own
+    ingestion job.
+    """
+    return await upload_pdfs(request)
+
+@router.get("/ingestion-jobs/{job_id}")
+async def ingestion_job_status(job_id: str):
+    """
+    Status of a PDF ingestion job with per-stage progress and timings.
+    """
+    return await get_ingestion_job_status(job_id)
+
 @router.post("/query-by-document")
 async def query_by_document(request: QueryWithDocumentIdSchema):
     return await query_rag_by_document(request)
         
+@router.post("/query-by-document-stream")
+async def query_by_document_stream(request: QueryWithDocumentIdSchema, http_request: Request):
+    """
+    Streaming variant of /query-by-document (server-sent events).
+    """
+    return await stream_query_rag_by_document(request, http_request)
+
+@router.post("/query-corpus")
+async def query_corpus(request: QueryCorpusSchema):
+    """
+    Query across documents: all documents, or only the given document IDs.
+    """
+    return await query_rag_corpus(request)
+
 @router.get("/list-vector-stores")
 async def list_vector_stores():
     """
-    List all saved FAISS vector store directories/files.
-    Returns the document IDs extracted from the folder names.
+    List all catalogued FAISS vector stores with their document IDs.
     """
     return await get_all_vectors_list()
 
+@router.get("/cache-stats")
+async def cache_stats():
+    """
+    Hit, miss and eviction counters of the loaded vector store cache.
+    """
+    return await get_vector_store_cache_stats()
+
+@router.delete("/documents/{document_id}")
+async def remove_document(document_id: str):
+    """
+    Delete a document's vector store, PDFs and extracted text.
+    """
+    return await delete_document(document_id)
+
+@router.post("/documents/{document_id}/append", openapi_extra=pdf_upload_body("pdf_file"))
+async def append_document_pdf(document_id: str, request: Request):
+    """
+    Add a PDF's chunks to an existing document's vector store (background job).
+    """
+    return await append_pdf_to_document(request, document_id)
+
+@router.put("/documents/{document_id}", openapi_extra=pdf_upload_body("pdf_file"))
+async def replace_document(document_id: str, request: Request, source_id: Optional[str] = None):
+    """
+    Replace one source PDF of a document; only chunks whose content changed are re-embedded.
+    `source_id` can be omitted for single-PDF documents.
+    """
+    return await replace_document_pdf(request, document_id, source_id)
+
+@router.get("/documents/{document_id}/sources")
+async def document_sources(document_id: str):
+    """
+    Source PDFs of a document with their chunk counts.
+    """
+    return await get_document_sources(document_id)
+
+@router.delete("/documents/{document_id}/sources/{source_id}")
+async def remove_document_source(document_id: str, source_id: str):
+    """
+    Remove one source PDF's chunks from a document's vector store.
+    """
+    return await delete_document_source(document_id, source_id)
+
 @router.get("/pdf/{document_id}")
 async def get_pdf(document_id: str):
     pdf_path = f"app/data/pdfs/{document_id}.pdf"
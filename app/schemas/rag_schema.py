@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Schema without expected answer
 class QueryOnlySchema(BaseModel):
@@ -12,4 +12,36 @@ class QueryWithReferenceSchema(BaseModel):
 # Query with Document ID
 class QueryWithDocumentIdSchema(BaseModel):
     query: str
-    document_id: str
\ No newline at end of file
+    document_id: str
+    # Optional search-time knobs for IVF (nprobe) and HNSW (ef_search) indexes
+    nprobe: int | None = Field(default=None, ge=1)
+    ef_search: int | None = Field(default=None, ge=1)
+
+# Query across documents: all catalogued documents when document_ids is omitted
+class QueryCorpusSchema(BaseModel):
+    query: str
+    document_ids: list[str] | None = None
+
+# One evaluation item; gold_chunks are text snippets of the chunks that should be retrieved
+class EvaluationItemSchema(BaseModel):
+    id: str | None = None
+    query: str
+    expected_answer: str
+    gold_chunks: list[str] = []
+
+# Batch evaluation against the default vector store, or an uploaded document's when document_id is set
+class EvaluateBatchSchema(BaseModel):
+    items: list[EvaluationItemSchema] = Field(min_length=1)
+    document_id: str | None = None
+    concurrency: int | None = Field(default=None, ge=1)
+    pass_threshold: float = 0.8
+
+# One question of a query batch; document_id omitted queries the default vector store
+class BatchQueryItemSchema(BaseModel):
+    query: str
+    document_id: str | None = None
+
+# Several questions in one request, answered as a stream of results
+class QueryBatchSchema(BaseModel):
+    items: list[BatchQueryItemSchema] = Field(min_length=1)
+    concurrency: int | None = Field(default=None, ge=1)
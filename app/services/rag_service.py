@@ -1,25 +1,162 @@
 import os
 import time
 import shutil
-from fastapi import HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse
+import json
+import asyncio
+import threading
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from app.config.configuration import Config
 from app.core.logger import configure_logging
-from app.processing.generate_rag_chain import create_rag_chain
-from app.processing.generate_vector_db import load_vector_store, create_vector_store
-from app.processing.single_query_inference import run_inference
+from app.core.metrics import track_stage, register_stats_collector
+from app.core.readiness import readiness
+from app.core.vector_store_cache import vector_store_cache, get_directory_version
+from app.core.answer_cache import answer_cache, chain_fingerprint
+from app.core.inference_limiter import inference_limiter, run_blocking
+from app.core.ingestion_jobs import ingestion_job_manager, IngestionQueueFullError
+from app.core.job_store import load_job, APPEND, REPLACE
+from app.core.document_registry import find_document_by_hash, register_document, unregister_document_id
+from app.core.upload_storage import receive_pdf_uploads, UploadTooLargeError, InvalidUploadError
+from app.core.document_catalog import get_vector_store_path, get_document_store, list_document_stores, list_vector_store_versions, remove_document_store
+from app.processing.generate_rag_chain import create_rag_chain, create_rag_chain_with_retriever, tune_rag_chain_search
+from app.processing.corpus_search import CorpusRetriever
+from app.processing.generate_vector_db import load_vector_store
+from app.processing.vector_store_updates import list_sources, update_vector_store
+from app.processing.lexical_index import load_lexical_index
+from app.processing.reranker import get_reranker
+from app.processing.single_query_inference import run_inference_async, stream_inference, context_fields
+from app.processing.context_packing import collect_context_stats
 from app.processing.evaluate_rag import evaluate_rag_with_reference
-from app.processing.generate_embeddings import get_embeddings
-from app.processing.generate_text_chunks import generate_text_chunks_from_pdf
-from app.schemas.rag_schema import QueryOnlySchema, QueryWithReferenceSchema, QueryWithDocumentIdSchema
+from app.processing.batch_evaluation import evaluate_batch
+from app.processing.batch_query import answer_query_batch
+from app.processing.generate_embeddings import get_embeddings, initialize_embeddings, get_embedding_batcher_stats
+from app.schemas.rag_schema import QueryOnlySchema, QueryWithReferenceSchema, QueryWithDocumentIdSchema, QueryCorpusSchema, EvaluateBatchSchema, QueryBatchSchema
 
 
 config=Config()
 logger = configure_logging("RAG_SERVICE")
-embeddings = get_embeddings()
-vector_store = load_vector_store(config.VECTOR_STORE_PATH)
-rag_chain = create_rag_chain(vector_store)
+
+# Models, the default index and the chains are loaded on first use, or ahead of time by warm_up()
+_default_rag_chain = None
+_default_rag_chain_lock = threading.Lock()
+_corpus_rag_chain = None
+_corpus_rag_chain_lock = threading.Lock()
+
+# Load a saved vector store and its RAG chain; used as the cache loader
+def load_document(saved_vector_store_path: str):
+    with track_stage("index_load"):
+        vector_store = load_vector_store(saved_vector_store_path)
+        return {"vector_store": vector_store,
+                "rag_chain": create_rag_chain(vector_store, load_lexical_index(saved_vector_store_path))}
+
+def get_loaded_document(document_id: str):
+    return vector_store_cache.get_or_load(document_id, get_vector_store_path(document_id), load_document)
+
+def get_document_vector_store(document_id: str):
+    return get_loaded_document(document_id)["vector_store"]
+
+# RAG chain over the default vector store (VECTOR_STORE_PATH)
+def get_default_rag_chain():
+    global _default_rag_chain
+    if _default_rag_chain is None:
+        with _default_rag_chain_lock:
+            if _default_rag_chain is None:
+                _default_rag_chain = load_document(config.VECTOR_STORE_PATH)["rag_chain"]
+                readiness.mark_ready("default_rag_chain")
+    return _default_rag_chain
+
+# One chain over the whole corpus; each request narrows its retriever to the requested documents
+def get_corpus_rag_chain():
+    global _corpus_rag_chain
+    if _corpus_rag_chain is None:
+        with _corpus_rag_chain_lock:
+            if _corpus_rag_chain is None:
+                _corpus_rag_chain = create_rag_chain_with_retriever(
+                    CorpusRetriever(get_vector_store=get_document_vector_store))
+                readiness.mark_ready("corpus_rag_chain")
+    return _corpus_rag_chain
+
+def warm_up_reranker():
+    get_reranker().score("warm up", ["warm up"])
+
+# Startup components, loaded concurrently by warm_up
+def get_warmup_tasks():
+    tasks = {"embeddings": initialize_embeddings,
+             "default_rag_chain": get_default_rag_chain,
+             "corpus_rag_chain": get_corpus_rag_chain}
+    if config.RERANKER_ENABLED:
+        tasks["reranker"] = warm_up_reranker
+    return tasks
+
+async def warm_up(background: bool = False):
+    """
+    Load the startup components concurrently and record their progress for /health/ready.
+    With `background`, returns the running warm-up future instead of waiting for it.
+    """
+    tasks = get_warmup_tasks()
+    readiness.expect(tasks)
+    warmup = asyncio.gather(*(readiness.track(name, func) for name, func in tasks.items()))
+    if background:
+        return warmup
+    await warmup
+
+# Component counters exposed at /metrics, read at scrape time
+register_stats_collector("rag_inference", inference_limiter.stats, "LLM admission control",
+                         counters=("rejected", "timed_out"))
+register_stats_collector("rag_ingestion", ingestion_job_manager.stats, "Ingestion job queue")
+register_stats_collector("rag_vector_store_cache", vector_store_cache.stats, "Loaded vector store cache",
+                         counters=("hits", "misses", "evictions", "invalidations"))
+register_stats_collector("rag_answer_cache", answer_cache.stats, "Answer cache",
+                         counters=("exact_hits", "semantic_hits", "misses", "evictions"))
+register_stats_collector("rag_embedding_batcher", get_embedding_batcher_stats,
+                         "Query embedding micro-batching", counters=("batches", "batched_queries"))
+register_stats_collector("rag_startup", readiness.stats, "Startup warm-up")
+if config.RERANKER_ENABLED:
+    register_stats_collector("rag_reranker", get_reranker().stats, "Cross-encoder reranker",
+                             counters=("queries", "fallbacks", "cache_hits", "cache_misses"))
+
+def get_index_version(*vector_store_paths: str):
+    return ";".join("{}:{}".format(*get_directory_version(path)) for path in vector_store_paths)
+
+# Run the chain in an inference slot; returns the answer and the prompt size fields of the response
+async def answer_with_context_stats(rag_chain, query: str):
+    with collect_context_stats() as context_stats:
+        async with inference_limiter.slot():
+            answer = await run_inference_async(rag_chain=rag_chain, query=query)
+    return answer, context_fields(context_stats)
+
+# Serve the answer from the cache when the same (or a near-identical) question was already asked
+# against the same version of the searched stores, prompt and LLM; otherwise run the chain and cache
+# its answer. Store versions are read from disk and the answer written to the cache off the event loop.
+async def answer_with_cache(rag_chain, query: str, scope: str, vector_store_paths):
+    if not config.ANSWER_CACHE_ENABLED:
+        answer, context_info = await answer_with_context_stats(rag_chain, query)
+        return answer, {"cached": False, **context_info}
+
+    index_version = await run_blocking(get_index_version, *vector_store_paths)
+    version = f"{chain_fingerprint(rag_chain)}|{index_version}"
+    query_embedding = None
+    hit = answer_cache.lookup_exact(scope, version, query)
+    if hit is None:
+        embeddings = await run_blocking(get_embeddings)
+        query_embedding = await run_blocking(embeddings.embed_query, query)
+        hit = answer_cache.lookup_semantic(scope, version, query_embedding)
+    if hit is not None:
+        logger.info(f"Answer cache {hit['match']} hit for {scope} (similarity {hit['similarity']:.4f})")
+        return hit["answer"], {"cached": True, "cache_match": hit["match"],
+                               "cache_similarity": round(hit["similarity"], 4)}
+
+    answer, context_info = await answer_with_context_stats(rag_chain, query)
+    # Failed inferences come back as "Error: ..." strings and must not be served again
+    if not answer.startswith("Error:"):
+        try:
+            await run_blocking(answer_cache.store, scope, version, query, answer, query_embedding)
+        except Exception as e:
+            # The answer is still good; it just will not be served from the cache
+            logger.error(f"Answer cache write failed for {scope}: {e}")
+    return answer, {"cached": False, **context_info}
 
 async def query_rag_without_reference(request: QueryOnlySchema):
     try:
@@ -28,12 +165,17 @@ async def query_rag_without_reference(request: QueryOnlySchema):
 
         logger.info(f"Processing query: {request.query}")
 
-        answer = run_inference(rag_chain=rag_chain, query=request.query)
+        rag_chain = await run_blocking(get_default_rag_chain)
+        answer, cache_info = await answer_with_cache(rag_chain, request.query, scope="default",
+                                                     vector_store_paths=[config.VECTOR_STORE_PATH])
         response = {
             "query": request.query,
             "answer": answer,
+            **cache_info,
         }
         return JSONResponse(content=response)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Query processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -44,12 +186,15 @@ async def query_rag_with_reference(request: QueryWithReferenceSchema):
             raise HTTPException(status_code=400, detail="Query cannot be empty")
 
         logger.info(f"Processing query: {request.query}")
-        
+        rag_chain = await run_blocking(get_default_rag_chain)
+
         if request.expected_answer:
-            result=evaluate_rag_with_reference(query=request.query, 
-                                               expected_answer=request.expected_answer, 
-                                               rag_chain=rag_chain, 
-                                               embeddings=embeddings)
+            async with inference_limiter.slot():
+                result = await run_blocking(evaluate_rag_with_reference,
+                                            query=request.query,
+                                            expected_answer=request.expected_answer,
+                                            rag_chain=rag_chain,
+                                            embeddings=await run_blocking(get_embeddings))
             response = {
                 "query": result.get("query"),
                 "expected_answer": result.get("expected_answer"),
@@ -59,7 +204,8 @@ async def query_rag_with_reference(request: QueryWithReferenceSchema):
             }
             return JSONResponse(content=response)
         else:
-            answer = run_inference(rag_chain, request.query)
+            async with inference_limiter.slot():
+                answer = await run_inference_async(rag_chain, request.query)
             response = {
                 "query": request.query,
                 "expected_answer": "N/A",
@@ -68,83 +214,513 @@ async def query_rag_with_reference(request: QueryWithReferenceSchema):
                 "context": ["N/A"],
             }
             return JSONResponse(content=response)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Query processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def generate_vector_store_for_pdf(pdf_file: UploadFile,
+async def evaluate_rag_batch(request: EvaluateBatchSchema):
+    try:
+        if len(request.items) > config.EVALUATION_MAX_ITEMS:
+            raise HTTPException(status_code=413,
+                                detail=f"At most {config.EVALUATION_MAX_ITEMS} items can be evaluated per request.")
+        if request.document_id is None:
+            evaluation_chain = await run_blocking(get_default_rag_chain)
+        else:
+            if not os.path.exists(get_vector_store_path(request.document_id)):
+                raise HTTPException(status_code=404, detail="Document ID not found.")
+            evaluation_chain = (await run_blocking(get_loaded_document, request.document_id))["rag_chain"]
+
+        items = [item.model_dump() for item in request.items]
+        for position, item in enumerate(items):
+            item["id"] = item["id"] or str(position)
+        concurrency = min(request.concurrency or config.EVALUATION_MAX_CONCURRENCY, config.EVALUATION_MAX_CONCURRENCY)
+        logger.info(f"Evaluating batch of {len(items)} items with concurrency {concurrency}")
+
+        embeddings = await run_blocking(get_embeddings)
+        # Each LLM call also takes an inference slot, so evaluation shares capacity with live queries. It
+        # waits for one rather than being rejected, so results do not depend on how busy the server is
+        results, summary = await evaluate_batch(items, evaluation_chain, embeddings, concurrency=concurrency,
+                                                pass_threshold=request.pass_threshold,
+                                                llm_slot=inference_limiter.background_slot)
+        return JSONResponse(content={"summary": summary, "results": results})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch evaluation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse_event(event: str, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Stream sources, answer tokens and timings as server-sent events
+async def stream_rag_response(http_request: Request, rag_chain, query: str):
+    # Take the inference slot before responding, so saturation still returns 429/503
+    await inference_limiter.acquire()
+    request_start = time.perf_counter()
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            inference_limiter.release()
+
+    async def event_stream():
+        first_byte_at = None
+        events = stream_inference(rag_chain, query)
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, stopping answer stream")
+                    return
+                if first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+                if event == "done":
+                    data["time_to_first_byte_ms"] = round((first_byte_at - request_start) * 1000, 1)
+                    logger.info(f"Stream timings: {data}")
+                yield sse_event(event, data)
+        except asyncio.CancelledError:
+            logger.info("Answer stream cancelled by client disconnect")
+            raise
+        except Exception as e:
+            logger.error(f"Streaming query error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            # Closing the generator closes the LLM stream, so no more tokens are paid for
+            await events.aclose()
+            release_slot()
+
+    # The background task also runs if the client left before the stream started
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(release_slot))
+
+async def query_rag_batch(request: QueryBatchSchema, http_request: Request):
+    if len(request.items) > config.QUERY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {config.QUERY_BATCH_MAX_ITEMS} queries can be sent per request.")
+    if any(not item.query.strip() for item in request.items):
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    document_ids = list(dict.fromkeys(item.document_id for item in request.items))
+    missing_ids = [document_id for document_id in document_ids
+                   if document_id is not None and not os.path.exists(get_vector_store_path(document_id))]
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Document IDs not found: {missing_ids}")
+
+    try:
+        # Each document's store and chain is loaded once for the whole batch; the cache scopes match
+        # /rag/query and /rag/query-by-document, so batch and single queries share cached answers
+        targets = {}
+        for document_id in document_ids:
+            if document_id is None:
+                rag_chain = await run_blocking(get_default_rag_chain)
+                scope, vector_store_path = "default", config.VECTOR_STORE_PATH
+            else:
+                rag_chain = (await run_blocking(get_loaded_document, document_id))["rag_chain"]
+                scope = f"document:{document_id}:nprobe=None:ef_search=None"
+                vector_store_path = get_vector_store_path(document_id)
+            index_version = await run_blocking(get_index_version, vector_store_path)
+            targets[document_id] = {"rag_chain": rag_chain, "scope": scope,
+                                    "version": f"{chain_fingerprint(rag_chain)}|{index_version}"}
+        embeddings = await run_blocking(get_embeddings)
+    except Exception as e:
+        logger.error(f"Batch query error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    items = [item.model_dump() for item in request.items]
+    concurrency = min(request.concurrency or config.QUERY_BATCH_MAX_CONCURRENCY, config.QUERY_BATCH_MAX_CONCURRENCY)
+    logger.info(f"Processing batch of {len(items)} queries over {len(targets)} documents")
+
+    async def event_stream():
+        # Each LLM call also takes an inference slot, so batches share capacity with live queries
+        events = answer_query_batch(items, targets, embeddings, concurrency=concurrency,
+                                    llm_slot=inference_limiter.slot,
+                                    answer_cache=answer_cache if config.ANSWER_CACHE_ENABLED else None)
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, stopping batch query")
+                    return
+                yield sse_event(event, data)
+        except asyncio.CancelledError:
+            logger.info("Batch query cancelled by client disconnect")
+            raise
+        except Exception as e:
+            logger.error(f"Batch query error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def stream_query_rag(request: QueryOnlySchema, http_request: Request):
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    logger.info(f"Processing streaming query: {request.query}")
+    rag_chain = await run_blocking(get_default_rag_chain)
+    return await stream_rag_response(http_request, rag_chain, request.query)
+
+async def stream_query_rag_by_document(request: QueryWithDocumentIdSchema, http_request: Request):
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    if not os.path.exists(get_vector_store_path(request.document_id)):
+        raise HTTPException(status_code=404, detail="Document ID not found.")
+
+    loaded_document = await run_blocking(get_loaded_document, request.document_id)
+    document_chain = tune_rag_chain_search(loaded_document["rag_chain"],
+                                           nprobe=request.nprobe, ef_search=request.ef_search)
+    logger.info(f"Processing streaming query for document {request.document_id}: {request.query}")
+    return await stream_rag_response(http_request, document_chain, request.query)
+
+# Look up a previously uploaded PDF with the same content that is ingested or still being ingested
+def find_existing_document(content_hash: str):
+    entry = find_document_by_hash(content_hash)
+    if entry is None:
+        return None
+    job = load_job(entry["job_id"]) if entry.get("job_id") else None
+    vector_store_exists = os.path.exists(get_vector_store_path(entry["document_id"]))
+    if job is not None and job["status"] != "failed":
+        status = job["status"]
+    elif vector_store_exists:
+        status = "completed"
+    else:
+        return None
+    return {"document_id": entry["document_id"],
+            "job_id": entry.get("job_id"),
+            "status": status,
+            "duplicate": True,
+            "message": "Identical PDF was already uploaded, existing document returned."}
+
+_document_id_lock = threading.Lock()
+_last_document_id = 0
+
+# Millisecond timestamp IDs, kept unique when several documents are created in the same millisecond
+def new_document_id():
+    global _last_document_id
+    with _document_id_lock:
+        _last_document_id = max(int(time.time() * 1000), _last_document_id + 1)
+        return str(_last_document_id)
+
+# Stream a request's PDFs to the upload staging directory; limit violations become 413, bad uploads 400
+async def receive_pdfs(request: Request, field_name: str, max_files: int = 1):
+    try:
+        return await receive_pdf_uploads(request, field_name, max_files)
+    except UploadTooLargeError as e:
+        logger.warning(f"Rejected PDF upload: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUploadError as e:
+        logger.warning(f"Rejected PDF upload: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Queue a staged PDF's ingestion as a new document, or return the existing document with the same content.
+# Returns (HTTP status, response content); the staged file is removed on a duplicate or an error.
+def ingest_staged_pdf(upload, document_id: str, saved_pdf_path: str, output_text_file_path: str,
+                      saved_vector_store_path: str):
+    try:
+        # An identical PDF was ingested before: return the existing document instead
+        existing = find_existing_document(upload.content_hash)
+        if existing is not None:
+            upload.discard()
+            logger.info(f"Duplicate PDF upload, reusing document ID: {existing['document_id']}")
+            return 200, existing
+
+        upload.commit(saved_pdf_path)
+        # Extraction, chunking, embedding and indexing run as a background job
+        job_id = ingestion_job_manager.submit(document_id, {"pdf": saved_pdf_path,
+                                                            "text": output_text_file_path,
+                                                            "vector_store": saved_vector_store_path})
+    except Exception:
+        upload.discard()
+        raise
+    register_document(upload.content_hash, document_id, job_id)
+    logger.info(f"PDF uploaded with ID: {document_id}, ingestion job: {job_id}")
+
+    # Return the document ID for querying once the job completes
+    return 202, {"document_id": document_id,
+                 "job_id": job_id,
+                 "status": "queued",
+                 "pages": upload.pages,
+                 "message": "PDF uploaded, vector store creation queued."}
+
+async def generate_vector_store_for_pdf(request: Request,
                                         document_id: str,
                                         saved_pdf_path: str,
                                         output_text_file_path: str,
                                         saved_vector_store_path: str):
+    [upload] = await receive_pdfs(request, "pdf_file")
     try:
-        
-        # Save the uploaded PDF
-        with open(saved_pdf_path, "wb") as f:
-            shutil.copyfileobj(pdf_file.file, f)
-
-        # Process the PDF into chunks
-        chunks = generate_text_chunks_from_pdf(saved_pdf_path, output_text_file_path)
-
-        # Create the FAISS vector store and save it with the document ID
-        vector_store = create_vector_store(chunks, saved_vector_store_path)
-
-        logger.info(f"PDF uploaded and processed successfully with ID: {document_id}")
-        
-        # Return the document ID for querying later
-        return JSONResponse(content={"document_id": document_id, 
-                                     "message": "PDF uploaded and vector store created."})
+        # Registry lookups and the job submission (which may start a worker process) stay off the event loop
+        status_code, content = await run_blocking(ingest_staged_pdf, upload, document_id, saved_pdf_path,
+                                                  output_text_file_path, saved_vector_store_path)
+        return JSONResponse(status_code=status_code, content=content)
 
+    except IngestionQueueFullError as e:
+        logger.warning(f"Rejected PDF upload: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error in PDF upload and vector processing: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing the PDF: {str(e)}")
+
+# Several PDFs in one request, each ingested as its own document. Per-file results are returned in
+# request order; a PDF repeated in the request or uploaded before maps to one document.
+async def upload_pdfs(request: Request):
+    uploads = await receive_pdfs(request, "pdf_files", max_files=config.UPLOAD_MAX_FILES)
+    results = []
+    accepted = {}
+    for upload in uploads:
+        if upload.content_hash in accepted:
+            upload.discard()
+            results.append({"filename": upload.filename, **accepted[upload.content_hash], "duplicate": True})
+            continue
+        document_id = new_document_id()
+        saved_pdf_path, output_text_file_path = get_source_paths(document_id)
+        try:
+            _, content = await run_blocking(ingest_staged_pdf, upload, document_id, saved_pdf_path,
+                                            output_text_file_path, get_vector_store_path(document_id))
+            accepted[upload.content_hash] = content
+        except IngestionQueueFullError as e:
+            logger.warning(f"Rejected PDF upload {upload.filename}: {str(e)}")
+            content = {"status": "rejected", "error": str(e)}
+        except Exception as e:
+            logger.error(f"Error in PDF upload {upload.filename}: {str(e)}")
+            content = {"status": "failed", "error": f"Error processing the PDF: {str(e)}"}
+        results.append({"filename": upload.filename, **content})
+
+    if accepted:
+        status_code = 202
+    elif any(result["status"] == "rejected" for result in results):
+        status_code = 429
+    else:
+        status_code = 500
+    return JSONResponse(status_code=status_code, content={"documents": results})
+
+async def get_ingestion_job_status(job_id: str):
+    job = load_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return JSONResponse(content=job)
     
 
 async def query_rag_by_document(request: QueryWithDocumentIdSchema):
     try:
         # Load the correct vector store based on document ID
-        saved_vector_store_path = f"app/data/vectorstores/faiss_index_{request.document_id}"
+        saved_vector_store_path = get_vector_store_path(request.document_id)
         
         if not os.path.exists(saved_vector_store_path):
             raise HTTPException(status_code=404, detail="Document ID not found.")
 
-        vector_store = load_vector_store(saved_vector_store_path)
-        rag_chain = create_rag_chain(vector_store)
-        
-        # Query the vector store
-        answer = run_inference(rag_chain=rag_chain, query=request.query)
+        loaded_document = await run_blocking(get_loaded_document, request.document_id)
+        document_chain = tune_rag_chain_search(loaded_document["rag_chain"],
+                                               nprobe=request.nprobe, ef_search=request.ef_search)
+
+        # Search-time knobs change the retrieved context, so they are part of the cache scope
+        scope = f"document:{request.document_id}:nprobe={request.nprobe}:ef_search={request.ef_search}"
+        answer, cache_info = await answer_with_cache(document_chain, request.query, scope=scope,
+                                                     vector_store_paths=[saved_vector_store_path])
         response = {
             "query": request.query,
             "answer": answer,
+            **cache_info,
         }
         return JSONResponse(content=response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error querying document with ID {request.document_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing the query: {str(e)}")
     
-async def get_all_vectors_list():
+async def query_rag_corpus(request: QueryCorpusSchema):
     try:
-        if not os.path.exists(config.VECTOR_STORE_DIR):
-            return JSONResponse(content={"vector_stores": [], "message": "No vector stores found."})
+        if not request.query.strip():
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+        catalogued_paths = {document["document_id"]: document["vector_store_path"] for document in list_document_stores()}
+        document_ids = sorted(catalogued_paths) if request.document_ids is None else list(dict.fromkeys(request.document_ids))
+        missing_ids = [document_id for document_id in document_ids if document_id not in catalogued_paths]
+        if missing_ids:
+            raise HTTPException(status_code=404, detail=f"Document IDs not found: {missing_ids}")
+        if not document_ids:
+            raise HTTPException(status_code=404, detail="No documents available to search.")
+
+        logger.info(f"Processing corpus query over {len(document_ids)} documents: {request.query}")
+        corpus_rag_chain = await run_blocking(get_corpus_rag_chain)
+        retriever = corpus_rag_chain.retriever.model_copy(update={"document_ids": document_ids})
+        rag_chain = corpus_rag_chain.model_copy(update={"retriever": retriever})
+
+        answer, cache_info = await answer_with_cache(rag_chain, request.query,
+                                                     scope=f"corpus:{','.join(sorted(document_ids))}",
+                                                     vector_store_paths=[catalogued_paths[document_id]
+                                                                         for document_id in document_ids])
+        response = {
+            "query": request.query,
+            "answer": answer,
+            "document_ids": document_ids,
+            **cache_info,
+        }
+        return JSONResponse(content=response)
 
-        # Get all folders that start with "faiss_index"
-        vector_stores = [
-            name for name in os.listdir(config.VECTOR_STORE_DIR)
-            if os.path.isdir(os.path.join(config.VECTOR_STORE_DIR, name)) and name.startswith("faiss_index")
-        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing corpus query: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing the query: {str(e)}")
 
-        # Extract document IDs from folder names
-        document_ids = [name.replace("faiss_index_", "") for name in vector_stores]
+async def get_all_vectors_list():
+    try:
+        documents = list_document_stores()
+        if not documents:
+            return JSONResponse(content={"vectors": {"vector_stores": [], "document_ids": []},
+                                         "message": "No vector stores found."})
 
         vectors = {
             "vectors": { 
-                "vector_stores": vector_stores, 
-                 "document_ids": document_ids
-                 }
+                "vector_stores": [os.path.basename(document["vector_store_path"]) for document in documents], 
+                 "document_ids": [document["document_id"] for document in documents]
+                 },
+            "documents": documents,
             }
 
         return JSONResponse(content=vectors)
 
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+# PDF and extracted text of one ingested source
+def get_source_paths(source_id: str):
+    return f"app/data/pdfs/{source_id}.pdf", f"app/data/texts/{source_id}.txt"
+
+def remove_source_files(source_id: str):
+    for path in get_source_paths(source_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+async def get_document_sources(document_id: str):
+    saved_vector_store_path = get_vector_store_path(document_id)
+    if not os.path.exists(saved_vector_store_path):
+        raise HTTPException(status_code=404, detail="Document ID not found.")
+    sources = await run_blocking(list_sources, saved_vector_store_path)
+    return JSONResponse(content={"document_id": document_id, "sources": sources})
+
+async def find_document_source(document_id: str, source_id: str = None):
+    saved_vector_store_path = get_vector_store_path(document_id)
+    if not os.path.exists(saved_vector_store_path):
+        raise HTTPException(status_code=404, detail="Document ID not found.")
+    sources = await run_blocking(list_sources, saved_vector_store_path)
+    if source_id is None:
+        if len(sources) != 1:
+            raise HTTPException(status_code=400, detail="Document has several sources, pass a source_id.")
+        return sources[0], sources
+    for source in sources:
+        if source["source_id"] == source_id:
+            return source, sources
+    raise HTTPException(status_code=404, detail="Source ID not found in document.")
+
+# Queue an append or replace job for a staged PDF; the job resolves the document's current store when it runs
+def submit_document_update(upload, document_id: str, operation: str, paths: dict):
+    try:
+        upload.commit(paths["pdf"])
+        return ingestion_job_manager.submit(document_id, {**paths, "vector_store": get_vector_store_path(document_id)},
+                                            operation=operation, content_hash=upload.content_hash)
+    except Exception:
+        upload.discard()
+        raise
+
+async def append_pdf_to_document(request: Request, document_id: str):
+    if not os.path.exists(get_vector_store_path(document_id)):
+        raise HTTPException(status_code=404, detail="Document ID not found.")
+    [upload] = await receive_pdfs(request, "pdf_file")
+    try:
+        source_id = f"{document_id}_{int(time.time() * 1000)}"
+        saved_pdf_path, output_text_file_path = get_source_paths(source_id)
+        job_id = await run_blocking(submit_document_update, upload, document_id, APPEND,
+                                        {"pdf": saved_pdf_path, "text": output_text_file_path})
+        logger.info(f"PDF {source_id} queued for appending to document {document_id}, ingestion job: {job_id}")
+        return JSONResponse(status_code=202,
+                            content={"document_id": document_id,
+                                     "source_id": source_id,
+                                     "job_id": job_id,
+                                     "status": "queued",
+                                     "message": "PDF uploaded, append to the vector store queued."})
+
+    except IngestionQueueFullError as e:
+        logger.warning(f"Rejected PDF append: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error appending PDF to document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing the PDF: {str(e)}")
+
+async def replace_document_pdf(request: Request, document_id: str, source_id: str = None):
+    source, sources = await find_document_source(document_id, source_id)
+    [upload] = await receive_pdfs(request, "pdf_file")
+    try:
+        # Staged next to the source; the ingestion job moves it into place once the index is updated
+        saved_pdf_path, output_text_file_path = get_source_paths(source["source_id"])
+        staged_pdf_path = f"app/data/pdfs/{source['source_id']}.{int(time.time() * 1000)}.upload.pdf"
+        job_id = await run_blocking(submit_document_update, upload, document_id, REPLACE,
+                                        {"pdf": staged_pdf_path, "text": output_text_file_path,
+                                         "source": source["source"]})
+        # The job updates the document registry once the new content is indexed
+        logger.info(f"Source {source['source_id']} of document {document_id} queued for replacement, ingestion job: {job_id}")
+        return JSONResponse(status_code=202,
+                            content={"document_id": document_id,
+                                     "source_id": source["source_id"],
+                                     "job_id": job_id,
+                                     "status": "queued",
+                                     "message": "PDF uploaded, replacement of the document's chunks queued."})
+
+    except IngestionQueueFullError as e:
+        logger.warning(f"Rejected PDF replacement: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error replacing PDF of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing the PDF: {str(e)}")
+
+async def delete_document_source(document_id: str, source_id: str):
+    source, sources = await find_document_source(document_id, source_id)
+    if len(sources) == 1:
+        raise HTTPException(status_code=400, detail="Source is the document's only source, delete the document instead.")
+    try:
+        update = await run_blocking(update_vector_store, document_id, remove_sources=[source["source"]])
+        remove_source_files(source_id)
+        logger.info(f"Deleted source {source_id} of document {document_id}")
+        return JSONResponse(content={"document_id": document_id, "source_id": source_id, **update,
+                                     "message": "Source deleted."})
+
+    except Exception as e:
+        logger.error(f"Error deleting source {source_id} of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting the source: {str(e)}")
+
+async def delete_document(document_id: str):
+    saved_vector_store_path = get_vector_store_path(document_id)
+    if get_document_store(document_id) is None and not os.path.exists(saved_vector_store_path):
+        raise HTTPException(status_code=404, detail="Document ID not found.")
+
+    # Appended PDFs are removed along with the document's own
+    source_ids = {document_id}
+    if os.path.exists(saved_vector_store_path):
+        try:
+            source_ids.update(source["source_id"] for source in await run_blocking(list_sources, saved_vector_store_path))
+        except Exception as e:
+            logger.warning(f"Could not list sources of document {document_id}: {str(e)}")
+
+    # Drop from the catalog first so no new query is routed to the store being deleted
+    remove_document_store(document_id)
+    vector_store_cache.invalidate(document_id)
+    answer_cache.invalidate_scope_prefix(f"document:{document_id}:")
+    unregister_document_id(document_id)
+    for path in {saved_vector_store_path, *list_vector_store_versions(document_id)}:
+        shutil.rmtree(path, ignore_errors=True)
+    for source_id in source_ids:
+        remove_source_files(source_id)
+    logger.info(f"Deleted document {document_id}")
+    return JSONResponse(content={"document_id": document_id, "message": "Document deleted."})
+
+async def get_vector_store_cache_stats():
+    content = {"cache": vector_store_cache.stats(), "answer_cache": answer_cache.stats()}
+    if config.RERANKER_ENABLED:
+        content["reranker"] = get_reranker().stats()
+    return JSONResponse(content=content)
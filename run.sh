@@ -1,8 +1,19 @@
 # python -m app.processing.pdf_to_text
 # python -m app.processing.vector_store
 # python -m app.processing.generate_vector_db
+# python -m app.processing.convert_vector_stores
+# python -m app.processing.lexical_index
+# python -m app.processing.onnx_embeddings --quantization avx512_vnni
 # python -m app.processing.generate_rag_chain
 # python -m app.processing.generate_text_chunks
 # python -m app.processing.evaluate_rag
+# python -m app.processing.batch_evaluation --test-set tests.jsonl
 # python -m app.processing.single_query_inference
+# python -m app.benchmarks.benchmark_concurrent_queries
+# python -m app.benchmarks.benchmark_pdf_extraction
+# python -m app.benchmarks.benchmark_faiss_index_types
+# python -m app.benchmarks.benchmark_hybrid_retrieval
+# python -m app.benchmarks.benchmark_embedding_backends --threads 1,4
+# python -m app.benchmarks.benchmark_startup --runs 5
+# python -m app.benchmarks.benchmark_suite --output app/data/benchmarks/baseline.json
 python -m app.processing.generate_embeddings
\ No newline at end of file
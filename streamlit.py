@@ -4,7 +4,8 @@ from app.config.configuration import Config
 from app.core.logger import configure_logging
 from app.processing.generate_vector_db import load_vector_store
 from app.processing.generate_rag_chain import create_rag_chain
-from app.processing.single_query_inference import run_inference as rag_run_inference
+from app.processing.lexical_index import load_lexical_index
+from app.processing.single_query_inference import stream_inference_sync
 
 config = Config()
 logger = configure_logging("STREAMLIT_APP")
@@ -33,7 +34,7 @@ def main():
     if "rag_chain" not in st.session_state:
         try:
             vector_store = load_vector_store(config.VECTOR_STORE_PATH)
-            st.session_state.rag_chain = create_rag_chain(vector_store)
+            st.session_state.rag_chain = create_rag_chain(vector_store, load_lexical_index(config.VECTOR_STORE_PATH))
             st.success("RAG system initialized successfully!")
         except Exception as e:
             st.error(f"Failed to initialize RAG system: {str(e)}")
@@ -53,15 +54,29 @@ def main():
 
         with st.spinner("Processing your query..."):
             try:
-                #  Correct order & using the imported function
-                answer_text = rag_run_inference(
-                    rag_chain=st.session_state.rag_chain,
-                    query=query
-                )
-
                 st.subheader("Result")
                 st.write(f"**Query**: {query}")
-                st.write(f"**Answer**: {answer_text}")
+                st.write("**Answer**:")
+
+                # Render answer tokens as they arrive
+                events = stream_inference_sync(st.session_state.rag_chain, query)
+                _, sources = next(events)
+                timings = {}
+
+                def answer_tokens():
+                    for event, data in events:
+                        if event == "token":
+                            yield data
+                        elif event == "done":
+                            timings.update(data)
+
+                answer_text = st.write_stream(answer_tokens())
+
+                with st.expander(f"Sources ({len(sources)})"):
+                    for source in sources:
+                        st.write(f"**[Doc {source['index']}]** {source['preview']}")
+                st.caption(f"First token: {timings.get('time_to_first_token_ms')} ms, total: {timings.get('total_ms')} ms, "
+                           f"prompt: {timings.get('prompt_tokens')} tokens")
 
                 # Save to history
                 st.session_state.chat_history.append({
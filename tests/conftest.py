@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Config() requires these; tests only exercise code that does not load models or call the LLM
+os.environ.setdefault("CORS_ORIGINS", "*")
+os.environ.setdefault("HUGGINGFACE_EMBEDDING_MODEL", "l3cube-pune/bengali-sentence-similarity-sbert")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("LLM_MODEL", "test")
+os.environ.setdefault("VECTOR_STORE_PATH", os.path.join(tempfile.gettempdir(), "rag-tests", "faiss_index"))
+os.environ.setdefault("VECTOR_STORE_DIR", os.path.join(tempfile.gettempdir(), "rag-tests"))
+os.environ.setdefault("CHUNK_OVERLAP", "50")
+os.environ.setdefault("CHUNK_SIZE", "500")
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "rag-tests", "test.log"))
+os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+from app.core.answer_cache import AnswerCache, normalize_query
+from app.core.vector_store_cache import get_directory_version
+
+
+def make_cache(db_path=None, max_entries=10, ttl_seconds=3600, similarity_threshold=0.9):
+    return AnswerCache(max_entries=max_entries, ttl_seconds=ttl_seconds, similarity_threshold=similarity_threshold,
+                       db_path=db_path)
+
+
+def test_normalized_queries_hit_exactly():
+    cache = make_cache()
+    cache.store("default", "v1", "What is the CGPA?", "3.41", [1.0, 0.0])
+
+    assert normalize_query("  what is  the CGPA ? ") == normalize_query("What is the CGPA")
+    assert cache.lookup_exact("default", "v1", "what is the cgpa")["answer"] == "3.41"
+    assert cache.lookup_exact("default", "v1", "What is the name?") is None
+    assert cache.lookup_exact("document:1:nprobe=None:ef_search=None", "v1", "What is the CGPA?") is None
+
+
+def test_semantic_match_needs_the_similarity_threshold():
+    cache = make_cache(similarity_threshold=0.9)
+    cache.store("default", "v1", "What is the CGPA?", "3.41", [1.0, 0.0])
+
+    hit = cache.lookup_semantic("default", "v1", [0.95, 0.1])
+    assert hit["match"] == "semantic" and hit["answer"] == "3.41" and hit["similarity"] >= 0.9
+    assert cache.lookup_semantic("default", "v1", [0.5, 0.5]) is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 1)
+
+
+def test_a_new_index_version_drops_the_old_answers():
+    cache = make_cache()
+    cache.store("default", "v1", "What is the CGPA?", "3.41", [1.0, 0.0])
+
+    assert cache.lookup_exact("default", "v2", "What is the CGPA?") is None
+    assert cache.lookup_semantic("default", "v2", [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_rebuilding_a_store_changes_its_version(tmp_path):
+    store = tmp_path / "faiss_index_1"
+    store.mkdir()
+    (store / "index.faiss").write_bytes(b"a" * 10)
+    before = get_directory_version(str(store))
+
+    (store / "index.faiss").write_bytes(b"b" * 12)
+    os.utime(store / "index.faiss", ns=(before[0] + 10 ** 9, before[0] + 10 ** 9))
+
+    assert get_directory_version(str(store)) != before
+
+
+def test_expired_entries_are_not_served():
+    cache = make_cache(ttl_seconds=-1)
+    cache.store("default", "v1", "What is the CGPA?", "3.41")
+
+    assert cache.lookup_exact("default", "v1", "What is the CGPA?") is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = make_cache(max_entries=2)
+    cache.store("default", "v1", "first", "1")
+    cache.store("default", "v1", "second", "2")
+    cache.lookup_exact("default", "v1", "first")
+    cache.store("default", "v1", "third", "3")
+
+    assert cache.lookup_exact("default", "v1", "second") is None
+    assert cache.lookup_exact("default", "v1", "first")["answer"] == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_processes_sharing_a_sqlite_file_do_not_collide(tmp_path):
+    db_path = str(tmp_path / "answers.sqlite")
+    first, second = make_cache(db_path, max_entries=2), make_cache(db_path, max_entries=2)
+    first.store("default", "v1", "first", "1", [1.0, 0.0])
+    second.store("default", "v1", "second", "2", [0.0, 1.0])
+    first.store("default", "v1", "third", "3")
+
+    # first evicted "first" from its memory only; the table keeps the newest max_entries rows
+    with sqlite3.connect(db_path) as db:
+        assert [row[0] for row in db.execute("SELECT query FROM answers ORDER BY entry_id")] == ["second", "third"]
+    assert second.lookup_exact("default", "v1", "second")["answer"] == "2"
+
+    restarted = make_cache(db_path)
+    assert restarted.lookup_exact("default", "v1", "third")["answer"] == "3"
+    assert restarted.lookup_semantic("default", "v1", [0.0, 1.0])["answer"] == "2"
+
+
+def test_stale_rows_are_deleted_from_sqlite_on_the_next_store(tmp_path):
+    db_path = str(tmp_path / "answers.sqlite")
+    cache = make_cache(db_path)
+    cache.store("default", "v1", "What is the CGPA?", "3.41")
+
+    assert cache.lookup_exact("default", "v2", "What is the CGPA?") is None
+    cache.store("default", "v2", "What is the name?", "Faisal")
+
+    with sqlite3.connect(db_path) as db:
+        assert [row[0] for row in db.execute("SELECT version FROM answers")] == ["v2"]
+
+
+def test_invalidating_a_document_removes_its_rows(tmp_path):
+    db_path = str(tmp_path / "answers.sqlite")
+    cache = make_cache(db_path)
+    cache.store("document:1:nprobe=None:ef_search=None", "v1", "q", "a")
+    cache.store("document:12:nprobe=None:ef_search=None", "v1", "q", "b")
+
+    cache.invalidate_scope_prefix("document:1:")
+
+    assert cache.lookup_exact("document:1:nprobe=None:ef_search=None", "v1", "q") is None
+    assert make_cache(db_path).lookup_exact("document:12:nprobe=None:ef_search=None", "v1", "q")["answer"] == "b"
+    assert make_cache(db_path).lookup_exact("document:1:nprobe=None:ef_search=None", "v1", "q") is None
@@ -0,0 +1,89 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from app.core.inference_limiter import InferenceLimiter
+from app.processing import batch_evaluation
+from app.processing.batch_evaluation import evaluate_batch
+
+
+class StaticRetriever:
+    async def ainvoke(self, query):
+        return [Document(page_content=f"context for {query}")]
+
+
+class StaticChain:
+    retriever = StaticRetriever()
+
+
+class ConstantEmbeddings:
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+async def answer_from_documents(rag_chain, docs, query):
+    await asyncio.sleep(0.01)
+    return f"answer to {query}"
+
+
+def run_against_saturated_limiter(monkeypatch, slot_name):
+    monkeypatch.setattr(batch_evaluation, "answer_from_documents_async", answer_from_documents)
+    items = [{"id": str(i), "query": f"question {i}", "expected_answer": "answer"} for i in range(4)]
+
+    async def scenario():
+        # One slot, no queue and a short wait: every live query beyond the running one is rejected
+        limiter = InferenceLimiter(max_concurrency=1, max_queue=0, queue_timeout=0.05)
+
+        async def live_query():
+            async with limiter.slot():
+                await asyncio.sleep(0.3)
+
+        busy = asyncio.create_task(live_query())
+        await asyncio.sleep(0)
+        results, summary = await evaluate_batch(items, StaticChain(), ConstantEmbeddings(), concurrency=4,
+                                                llm_slot=getattr(limiter, slot_name))
+        await busy
+        return results, summary, limiter.stats()
+
+    return asyncio.run(scenario())
+
+
+def test_evaluation_waits_for_a_saturated_limiter(monkeypatch):
+    results, summary, stats = run_against_saturated_limiter(monkeypatch, "background_slot")
+
+    assert summary["errors"] == 0
+    assert [result["actual"] for result in results] == [f"answer to question {i}" for i in range(4)]
+    assert (stats["rejected"], stats["timed_out"], stats["in_flight"]) == (0, 0, 0)
+
+
+def test_live_slots_would_reject_the_same_evaluation(monkeypatch):
+    _, summary, stats = run_against_saturated_limiter(monkeypatch, "slot")
+
+    assert summary["errors"] > 0
+    assert stats["rejected"] + stats["timed_out"] > 0
+
+
+def test_background_waiters_do_not_fill_the_live_queue():
+    async def scenario():
+        limiter = InferenceLimiter(max_concurrency=1, max_queue=1, queue_timeout=1)
+        release = asyncio.Event()
+
+        async def hold(slot):
+            async with slot():
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold(limiter.slot))]
+        await asyncio.sleep(0.01)
+        tasks += [asyncio.create_task(hold(limiter.background_slot)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        waiting = limiter.stats()
+        # The live queue still has room for one query
+        live = asyncio.create_task(hold(limiter.slot))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks, live)
+        return waiting, limiter.stats()
+
+    waiting, done = asyncio.run(scenario())
+    assert (waiting["waiting"], waiting["background_waiting"], waiting["in_flight"]) == (0, 3, 1)
+    assert done["rejected"] == 0 and done["in_flight"] == 0
@@ -0,0 +1,53 @@
+from langchain_core.documents import Document
+
+from app.processing.context_packing import join_passages, merge_passages
+
+TEXT = " ".join(f"word{i}" for i in range(60))
+
+
+def chunk(start, end, source="doc.pdf"):
+    return Document(page_content=TEXT[start:end], metadata={"source": source, "start_offset": start, "end_offset": end})
+
+
+def test_overlapping_chunks_join_by_offsets():
+    assert join_passages(chunk(0, 80), chunk(60, 140)) == TEXT[:140]
+
+
+def test_adjacent_chunks_join_with_a_space():
+    assert TEXT[80] == " "
+    assert join_passages(chunk(0, 80), chunk(81, 140)) == TEXT[:140]
+
+
+def test_contained_chunk_joins_to_the_outer_text():
+    assert join_passages(chunk(0, 120), chunk(30, 90)) == TEXT[:120]
+
+
+def test_distant_chunks_and_other_sources_do_not_join():
+    assert join_passages(chunk(0, 80), chunk(200, 280)) is None
+    assert join_passages(chunk(0, 80), chunk(60, 140, source="other.pdf")) is None
+
+
+def test_offsets_that_disagree_with_the_text_are_not_trusted():
+    # A chunk kept through a replace: same text, offsets of the previous version of the PDF
+    stale = Document(page_content=TEXT[200:280], metadata={"source": "doc.pdf", "start_offset": 60, "end_offset": 140})
+    assert join_passages(chunk(0, 80), stale) is None
+
+
+def test_stale_offsets_fall_back_to_the_text_overlap():
+    moved = Document(page_content=TEXT[60:140], metadata={"source": "doc.pdf", "start_offset": 300, "end_offset": 380})
+    assert join_passages(chunk(0, 80), moved) == TEXT[:140]
+
+
+def test_passages_joined_by_text_drop_their_offsets():
+    moved = Document(page_content=TEXT[60:140], metadata={"source": "doc.pdf", "start_offset": 300, "end_offset": 380})
+    [(rank, passage, count)] = merge_passages([chunk(0, 80), moved])
+
+    assert (rank, count, passage.page_content) == (0, 2, TEXT[:140])
+    assert "start_offset" not in passage.metadata and "end_offset" not in passage.metadata
+
+
+def test_passages_joined_by_offsets_widen_them():
+    [(_, passage, _)] = merge_passages([chunk(60, 140), chunk(0, 80)])
+
+    assert passage.page_content == TEXT[:140]
+    assert (passage.metadata["start_offset"], passage.metadata["end_offset"]) == (0, 140)
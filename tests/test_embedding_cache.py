@@ -0,0 +1,70 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.processing import embedding_cache
+from app.processing.embedding_cache import EmbeddingCache, chunk_cache_key, embed_texts_with_cache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0, 0.0, 0.5] for text in texts]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    monkeypatch.setattr(embedding_cache, "get_embedding_cache", lambda model_name=None: cache)
+    return cache
+
+
+def test_misses_are_embedded_once_and_hits_count_vector_bytes(cache):
+    embeddings = CountingEmbeddings()
+    embed_texts_with_cache(["first chunk", "second chunk"], embeddings)
+
+    vectors, stats = embed_texts_with_cache(["first  chunk", "third"], embeddings)
+
+    assert embeddings.embedded == ["first chunk", "second chunk", "third"]
+    assert vectors[0] == [11.0, 1.0, 0.0, 0.5]
+    assert (stats["cache_hits"], stats["cache_misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    # One 4-dimensional float32 vector was read instead of computed
+    assert stats["bytes_saved"] == 16
+
+
+def test_keys_are_looked_up_on_disk_by_another_instance(tmp_path, cache):
+    cache.add(["a", "b", "a"], [[1.0, 0.0], [0.0, 1.0], [9.0, 9.0]])
+    other = EmbeddingCache(str(tmp_path), "model")
+
+    assert other.lookup(["b", "a", "c"]) == [[0.0, 1.0], [1.0, 0.0], None]
+    assert other.stats()["entries"] == 2
+
+
+def test_vectors_without_keys_are_overwritten(cache):
+    cache.add(["a"], [[1.0, 0.0]])
+    # An append interrupted after its vectors were written
+    with open(cache.vectors_path, "ab") as f:
+        f.write(np.array([[7.0, 7.0]], dtype=np.float32).tobytes())
+
+    cache.add(["b"], [[0.0, 1.0]])
+
+    assert cache.lookup(["a", "b"]) == [[1.0, 0.0], [0.0, 1.0]]
+
+
+def test_keys_of_an_older_cache_are_imported(tmp_path):
+    directory = tmp_path / "model"
+    directory.mkdir()
+    (directory / "meta.json").write_text('{"model_name": "model", "dim": 2}')
+    (directory / "vectors.f32").write_bytes(np.array([[1.0, 2.0], [3.0, 4.0]], dtype=np.float32).tobytes())
+    (directory / "keys.bin").write_bytes(chunk_cache_key("model", "a") + chunk_cache_key("model", "b"))
+
+    cache = EmbeddingCache(str(tmp_path), "model")
+
+    assert cache.lookup(["b", "a"]) == [[3.0, 4.0], [1.0, 2.0]]
+    assert not (directory / "keys.bin").exists()
+    with sqlite3.connect(cache.keys_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM keys").fetchone()[0] == 2
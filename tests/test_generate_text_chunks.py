@@ -0,0 +1,110 @@
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.processing.generate_text_chunks import PAGE_BREAK, clean_text, iter_page_chunks, read_cached_pages
+from app.processing.pdf_extraction_engine import ExtractedPage
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho sigma tau".split()
+
+
+def make_splitter(chunk_size=60, chunk_overlap=15):
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len,
+                                          separators=["\n\n", "\n", "।", " ", ""])
+
+
+def make_pages(page_texts):
+    return [ExtractedPage(number, text, "text") for number, text in enumerate(page_texts, start=1)]
+
+
+# The text the offsets refer to: cleaned non-empty pages joined by a space
+def joined_text(pages):
+    return " ".join(clean_text(page.text) for page in pages if clean_text(page.text))
+
+
+# (start offset, page number) of each non-empty page in the joined text
+def page_spans(pages):
+    spans, offset = [], 0
+    for page in pages:
+        text = clean_text(page.text)
+        if text:
+            spans.append((offset, page.page_number))
+            offset += len(text) + 1
+    return spans
+
+
+def page_at(spans, offset):
+    return [number for start, number in spans if start <= offset][-1]
+
+
+def test_offsets_and_pages_match_the_joined_text():
+    pages = make_pages([" ".join(WORDS[i % len(WORDS)] for i in range(start, start + 23))
+                        for start in range(0, 23 * 12, 23)])
+    chunks = list(iter_page_chunks(pages, "doc.pdf", make_splitter()))
+    text, spans = joined_text(pages), page_spans(pages)
+
+    assert chunks
+    for chunk in chunks:
+        metadata = chunk.metadata
+        assert metadata["source"] == "doc.pdf"
+        assert text[metadata["start_offset"]:metadata["end_offset"]] == chunk.page_content
+        assert metadata["page"] == page_at(spans, metadata["start_offset"])
+        assert metadata["page_end"] == page_at(spans, metadata["end_offset"] - 1)
+
+
+def test_chunks_carried_across_pages_match_splitting_the_whole_text():
+    pages = make_pages([" ".join(WORDS[:count]) for count in (15, 4, 19, 2, 11, 17)])
+    splitter = make_splitter()
+    chunks = list(iter_page_chunks(pages, "doc.pdf", splitter))
+
+    assert [chunk.page_content for chunk in chunks] == splitter.split_text(joined_text(pages))
+    assert any(chunk.metadata["page"] != chunk.metadata["page_end"] for chunk in chunks)
+
+
+def test_empty_pages_are_skipped_but_keep_the_numbering():
+    pages = make_pages(["alpha beta gamma", "   \n ", "delta epsilon zeta"])
+    [chunk] = list(iter_page_chunks(pages, "doc.pdf", make_splitter()))
+
+    assert chunk.page_content == "alpha beta gamma delta epsilon zeta"
+    assert (chunk.metadata["page"], chunk.metadata["page_end"]) == (1, 3)
+    assert (chunk.metadata["start_offset"], chunk.metadata["end_offset"]) == (0, len(chunk.page_content))
+
+
+def test_no_chunks_without_text():
+    assert list(iter_page_chunks(make_pages(["", "  "]), "doc.pdf", make_splitter())) == []
+
+
+def test_read_cached_pages_splits_on_page_breaks(tmp_path):
+    cache_path = tmp_path / "doc.txt"
+    cache_path.write_text(f"first page\nsecond line{PAGE_BREAK}{PAGE_BREAK}third page{PAGE_BREAK}", encoding="utf-8")
+
+    pages = list(read_cached_pages(str(cache_path)))
+
+    assert [(page.page_number, page.text) for page in pages] == [
+        (1, "first page\nsecond line"), (2, ""), (3, "third page")]
+    assert {page.backend for page in pages} == {"cache"}
+
+
+def test_read_cached_pages_keeps_a_last_page_without_break(tmp_path):
+    cache_path = tmp_path / "doc.txt"
+    cache_path.write_text(f"one{PAGE_BREAK}two\n", encoding="utf-8")
+
+    assert [(page.page_number, page.text) for page in read_cached_pages(str(cache_path))] == [(1, "one"), (2, "two\n")]
+
+
+def test_read_cached_pages_reads_a_cache_without_page_breaks_as_one_page(tmp_path):
+    cache_path = tmp_path / "doc.txt"
+    cache_path.write_text("line one\nline two\n", encoding="utf-8")
+
+    assert [(page.page_number, page.text) for page in read_cached_pages(str(cache_path))] == [(1, "line one\nline two\n")]
+
+
+def test_cached_pages_chunk_like_the_extracted_pages(tmp_path):
+    pages = make_pages([" ".join(WORDS[:count]) for count in (9, 14, 3, 18)])
+    cache_path = tmp_path / "doc.txt"
+    cache_path.write_text("".join(page.text + PAGE_BREAK for page in pages), encoding="utf-8")
+    splitter = make_splitter()
+
+    from_cache = [chunk.metadata | {"text": chunk.page_content}
+                  for chunk in iter_page_chunks(read_cached_pages(str(cache_path)), "doc.pdf", splitter)]
+    extracted = [chunk.metadata | {"text": chunk.page_content}
+                 for chunk in iter_page_chunks(pages, "doc.pdf", splitter)]
+    assert from_cache == extracted
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from app.core import job_store
+from app.core.ingestion_jobs import IngestionJobManager
+from app.core.job_store import (new_job_record, save_job, load_job, claim_job, job_has_live_owner,
+                                QUEUED, RUNNING, COMPLETED, FAILED)
+from app.processing.ingestion_pipeline import run_ingestion_job
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store.config, "INGESTION_JOBS_DIR", str(tmp_path / "jobs"))
+    return tmp_path
+
+
+def make_job(tmp_path, job_id, status=QUEUED):
+    paths = {"pdf": str(tmp_path / f"{job_id}.pdf"), "text": str(tmp_path / f"{job_id}.txt"),
+             "vector_store": str(tmp_path / f"faiss_index_{job_id}")}
+    job = new_job_record(job_id, job_id, paths)
+    job["status"] = status
+    save_job(job)
+    return job
+
+
+def test_new_job_is_queued_without_owner(tmp_path):
+    job = load_job(make_job(tmp_path, "a")["job_id"])
+
+    assert (job["status"], job["owner_pid"], job["error"]) == (QUEUED, None, None)
+    assert {stage["status"] for stage in job["stages"].values()} == {"pending"}
+    assert not job_has_live_owner("a")
+
+
+def test_failed_job_records_its_error_and_owner(tmp_path):
+    make_job(tmp_path, "a")
+
+    assert run_ingestion_job("a") == FAILED
+    job = load_job("a")
+    assert job["status"] == FAILED and job["error"]
+    assert job["owner_pid"] == os.getpid()
+    assert job["started_at"] is not None and job["finished_at"] is not None
+    assert FAILED in {stage["status"] for stage in job["stages"].values()}
+    # The claim is released with the job
+    assert not job_has_live_owner("a")
+
+
+def test_job_owned_by_another_process_is_not_run(tmp_path):
+    make_job(tmp_path, "a")
+    lock = claim_job("a")
+    try:
+        assert job_has_live_owner("a")
+        assert run_ingestion_job("a") is None
+        assert load_job("a")["status"] == QUEUED
+    finally:
+        lock.release()
+
+
+def test_finished_job_is_not_run_again(tmp_path):
+    make_job(tmp_path, "a", status=COMPLETED)
+
+    assert run_ingestion_job("a") is None
+    assert load_job("a")["status"] == COMPLETED
+
+
+def test_resume_skips_finished_jobs_and_jobs_with_a_live_owner(tmp_path):
+    make_job(tmp_path, "queued")
+    make_job(tmp_path, "orphaned", status=RUNNING)
+    make_job(tmp_path, "running", status=RUNNING)
+    make_job(tmp_path, "done", status=COMPLETED)
+    make_job(tmp_path, "failed", status=FAILED)
+    manager = IngestionJobManager(max_workers=1, max_pending=8)
+    dispatched = []
+    manager._dispatch = dispatched.append
+
+    lock = claim_job("running")
+    try:
+        assert manager.resume_pending_jobs() == 2
+    finally:
+        lock.release()
+    assert sorted(dispatched) == ["orphaned", "queued"]
+    assert load_job("orphaned")["status"] == QUEUED
+    assert load_job("running")["status"] == RUNNING
+
+
+def test_resume_skips_jobs_already_pending_in_this_process(tmp_path):
+    make_job(tmp_path, "a")
+    manager = IngestionJobManager(max_workers=1, max_pending=8)
+    manager._pending.add("a")
+    manager._dispatch = lambda job_id: pytest.fail("dispatched twice")
+
+    assert manager.resume_pending_jobs() == 0
@@ -0,0 +1,40 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from app.processing.lexical_index import LexicalIndexBuilder, build_lexical_index
+
+TEXTS = ["CGPA 3.41 in Computer Science", "computer vision, computer graphics", "email: a.b@example.com",
+         "সিজিপিএ ৩.৪১", "Science and engineering", "", "graphics graphics graphics"]
+
+
+def test_batched_builder_with_spill_file_matches_a_single_build(tmp_path):
+    docs = [Document(page_content=text) for text in TEXTS]
+    doc_ids = [f"id-{i}" for i in range(len(docs))]
+    builder = LexicalIndexBuilder(str(tmp_path))
+    for start in range(0, len(docs), 3):
+        builder.add(docs[start:start + 3], doc_ids[start:start + 3])
+    batched, single = builder.build(), build_lexical_index(docs, doc_ids)
+
+    assert batched.terms == single.terms and batched.doc_ids == single.doc_ids
+    for name in ("offsets", "postings", "term_freqs", "doc_lengths"):
+        assert np.array_equal(getattr(batched, name), getattr(single, name))
+    assert list(tmp_path.iterdir()) == []
+    assert [doc_id for doc_id, _ in batched.search("computer graphics", k=2)] == ["id-1", "id-6"]
+
+
+def test_chunks_without_tokens_match_nothing():
+    index = build_lexical_index([Document(page_content=text) for text in ("", "  ", "।")], ["a", "b", "c"])
+
+    assert index.avg_doc_length == 0.0
+    with np.errstate(all="raise"):
+        assert index.search("CGPA", k=3) == []
+        assert index.search("", k=3) == []
+
+
+def test_empty_chunks_among_others_score_finite():
+    index = build_lexical_index([Document(page_content=text) for text in TEXTS], [str(i) for i in range(len(TEXTS))])
+
+    with np.errstate(all="raise"):
+        results = index.search("science graphics", k=len(TEXTS))
+    assert results and all(np.isfinite(score) and score > 0 for _, score in results)
+    assert "5" not in [doc_id for doc_id, _ in results]
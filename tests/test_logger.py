@@ -0,0 +1,39 @@
+import os
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core import logger as app_logger
+from app.core.logger import configure_logging, forward_logs_to, log_worker_queue, log_context
+
+
+def log_in_worker(message):
+    with log_context("job-1"):
+        configure_logging("WORKER_TEST").info(message)
+    return os.getpid(), [type(handler).__name__ for handler in app_logger._writer.handlers]
+
+
+def read_log(message, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(app_logger.config.LOG_FILE):
+            with open(app_logger.config.LOG_FILE, encoding="utf-8") as f:
+                lines = [line for line in f if message in line]
+            if lines:
+                return lines
+        time.sleep(0.05)
+    return []
+
+
+def test_pool_worker_records_are_written_by_the_parent():
+    message = f"from worker {uuid.uuid4().hex}"
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=forward_logs_to, initargs=(log_worker_queue(),)) as executor:
+        worker_pid, worker_handlers = executor.submit(log_in_worker, message).result()
+
+    [line] = read_log(message)
+    assert worker_pid != os.getpid()
+    # The worker never opens the log file
+    assert worker_handlers == ["QueueHandler"]
+    assert '"request_id": "job-1"' in line and '"logger": "WORKER_TEST"' in line
@@ -0,0 +1,106 @@
+import os
+import gc
+import threading
+
+from app.core.vector_store_cache import VectorStoreCache
+
+
+def make_store(tmp_path, name, size=10):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "index.faiss").write_bytes(b"x" * size)
+    return str(path)
+
+
+def loader(loads):
+    def load(path):
+        loads.append(path)
+        return {"path": path, "load": len(loads)}
+    return load
+
+
+def test_hits_are_served_without_loading_again(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=4, max_bytes=10 ** 6), []
+    path = make_store(tmp_path, "a")
+
+    first = cache.get_or_load("a", path, loader(loads))
+    assert cache.get_or_load("a", path, loader(loads)) is first
+    assert loads == [path]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_least_recently_used_is_evicted_by_count(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=2, max_bytes=10 ** 6), []
+    paths = {name: make_store(tmp_path, name) for name in "abc"}
+
+    cache.get_or_load("a", paths["a"], loader(loads))
+    cache.get_or_load("b", paths["b"], loader(loads))
+    cache.get_or_load("a", paths["a"], loader(loads))
+    cache.get_or_load("c", paths["c"], loader(loads))
+
+    assert cache.stats()["keys"] == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_least_recently_used_is_evicted_by_bytes(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=10, max_bytes=250), []
+    paths = {name: make_store(tmp_path, name, size=100) for name in "abc"}
+
+    for name in "abc":
+        cache.get_or_load(name, paths[name], loader(loads))
+
+    stats = cache.stats()
+    assert stats["keys"] == ["b", "c"]
+    assert stats["estimated_bytes"] == 200
+
+
+def test_an_entry_larger_than_the_budget_is_still_kept(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=10, max_bytes=50), []
+    path = make_store(tmp_path, "a", size=100)
+
+    cache.get_or_load("a", path, loader(loads))
+    cache.get_or_load("a", path, loader(loads))
+
+    assert cache.stats()["keys"] == ["a"] and len(loads) == 1
+
+
+def test_reloads_when_the_store_changes_on_disk(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=4, max_bytes=10 ** 6), []
+    path = make_store(tmp_path, "a")
+    cache.get_or_load("a", path, loader(loads))
+
+    index_file = os.path.join(path, "index.faiss")
+    with open(index_file, "wb") as f:
+        f.write(b"y" * 20)
+    mtime = os.stat(index_file).st_mtime_ns + 10 ** 9
+    os.utime(index_file, ns=(mtime, mtime))
+
+    assert cache.get_or_load("a", path, loader(loads))["load"] == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_reloads_when_the_document_moves_to_a_new_store_version(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=4, max_bytes=10 ** 6), []
+    cache.get_or_load("a", make_store(tmp_path, "faiss_index_a"), loader(loads))
+
+    new_path = make_store(tmp_path, "faiss_index_a.v1")
+    assert cache.get_or_load("a", new_path, loader(loads))["path"] == new_path
+
+
+def test_concurrent_misses_share_one_load_and_leave_no_lock_behind(tmp_path):
+    cache, loads = VectorStoreCache(max_entries=4, max_bytes=10 ** 6), []
+    path = make_store(tmp_path, "a")
+
+    def slow_load(directory_path):
+        threading.Event().wait(0.1)
+        return loader(loads)(directory_path)
+
+    threads = [threading.Thread(target=cache.get_or_load, args=("a", path, slow_load)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [path]
+    gc.collect()
+    assert len(cache._loading_locks) == 0